@@ -1,24 +1,88 @@
-from sentence_transformers import SentenceTransformer
+import os, time, threading
+from typing import List
+from common_fastapi.shared.metrics import EMBED_LATENCY, EMBED_BATCH_SIZE
+from common_fastapi.shared.tracing import span
+
+# 로컬 모드 encode 백엔드 : torch(기본, SentenceTransformer float32) | onnx (int8 양자화 ONNX Runtime, common_fastapi/ai/embed_onnx.py)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+
+def load_encoder(model_name: str = "jhgan/ko-sroberta-multitask"): # encode(texts, convert_to_numpy=True) 를 가진 객체 (embed_server도 사용)
+    if EMBED_BACKEND == "onnx":
+        from common_fastapi.ai.embed_onnx import OnnxEncoder # torch를 import하지 않음
+        return OnnxEncoder(model_name)
+    from sentence_transformers import SentenceTransformer # torch 포함 무거운 import라 로컬 모드일 때만
+    return SentenceTransformer(model_name)
 
 class EmbedderKo:
 
-    def __init__(self, model_name="jhgan/ko-sroberta-multitask"):
+    # socket_path(또는 EMBED_SERVER_SOCKET)가 있으면 클라이언트 모드 : 모델은 embed_server 프로세스가 들고 있고 여기선 요청만 보냄
+    # 없으면 기존처럼 이 프로세스에서 모델 로딩 (EMBED_BACKEND : torch SentenceTransformer 또는 int8 ONNX)
+    def __init__(self, model_name="jhgan/ko-sroberta-multitask", socket_path: str = None):
         self.model_name = model_name
-        print(f"[EmbedderKo] 모델 로딩 중: {model_name}")
+        self.socket_path = socket_path or os.getenv("EMBED_SERVER_SOCKET")
+        self.model = None
+        self.client = None
+        if self.socket_path:
+            from common_fastapi.ai.embed_server import EmbedServerClient
+            self.client = EmbedServerClient(self.socket_path)
+            print(f"[EmbedderKo] 임베딩 서버 사용: {self.socket_path}")
+            return
+        print(f"[EmbedderKo] 모델 로딩 중: {model_name} ({EMBED_BACKEND})")
         try:
-            self.model = SentenceTransformer(model_name)
+            self.model = load_encoder(model_name)
             print(f"[EmbedderKo] 모델 로딩 완료: {model_name}")
         except Exception as e:
             print(f"❌ 모델 로딩 실패: {e}")
             raise
 
+    def _encode(self, texts: List[str]):
+        with span("jhgan.encode", **{"embed.model": self.model_name, "embed.inputs": len(texts), "embed.mode": "server" if self.client is not None else EMBED_BACKEND}):
+            if self.client is not None:
+                return self.client.encode(texts)
+            return self.model.encode(texts, convert_to_numpy=True)
+
     def create_embedding(self, text: str):
         # 문자열 하나를 벡터로 변환
         # Args => text: 임베딩할 텍스트
         # Return => list: 임베딩 벡터 (768차원)
+        t0 = time.perf_counter()
         try: # sentence-transformers는 numpy array를 반환하므로 list로 변환
-            embedding = self.model.encode(text, convert_to_numpy=True)
+            embedding = self._encode([text])[0]
             return embedding.tolist()
         except Exception as e:
             print(f"❌ 임베딩 생성 실패: {e}")
             return []
+        finally:
+            EMBED_LATENCY.labels("jhgan").observe(time.perf_counter() - t0)
+            EMBED_BATCH_SIZE.labels("jhgan").observe(1)
+
+    def create_embeddings(self, texts: List[str]):
+        # 여러 문자열을 한 번에 벡터로 변환 (배치 encode)
+        # Return => list[list]: 입력 순서대로 임베딩 벡터, 실패시 []
+        if not texts:
+            return []
+        t0 = time.perf_counter()
+        try:
+            return self._encode(list(texts)).tolist()
+        except Exception as e:
+            print(f"❌ 임베딩 생성 실패: {e}")
+            return []
+        finally:
+            EMBED_LATENCY.labels("jhgan").observe(time.perf_counter() - t0)
+            EMBED_BATCH_SIZE.labels("jhgan").observe(len(texts))
+
+
+# 768차원 임베딩 모델 싱글톤 (hybrid_search, admin 백필, 기동시 warmup이 같은 인스턴스를 공유)
+_embedder_768 = None
+_embedder_768_lock = threading.Lock() # warmup 스레드와 첫 요청이 동시에 로딩하지 않도록
+
+def get_embedder_768() -> EmbedderKo:
+    global _embedder_768
+    if _embedder_768 is None:
+        with _embedder_768_lock:
+            if _embedder_768 is None:
+                _embedder_768 = EmbedderKo()
+    return _embedder_768
+
+def is_embedder_768_loaded() -> bool:
+    return _embedder_768 is not None
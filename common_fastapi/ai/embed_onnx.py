@@ -0,0 +1,140 @@
+"""
+jhgan 임베딩 ONNX Runtime 백엔드 (EMBED_BACKEND=onnx)
+- GPU가 없으므로 float32 torch 대신 int8 동적 양자화(dynamic quantization) ONNX 모델을 CPU에서 실행 => encode 비용/메모리 절감
+- 런타임은 onnxruntime + tokenizers만 사용 (torch를 import하지 않음). 변환(export)할 때만 torch/transformers/onnx 필요
+- SentenceTransformer와 같은 결과 형식 : mean pooling(attention mask 기준), 최대 128토큰, encode(texts) => (n, 768) float32
+- EMBED_ONNX_DIR에 모델이 없으면 첫 로딩시 변환 (운영에서는 배포 전에 미리 --export 권장)
+
+실행 예)
+    python -m common_fastapi.ai.embed_onnx --export            # 변환 + int8 양자화 + torch 결과와 코사인 일치 확인
+    python -m common_fastapi.ai.embed_onnx --check             # 이미 변환된 모델의 일치 확인만
+    EMBED_BACKEND=onnx uvicorn main:app                        # EmbedderKo / embed_server가 ONNX로 동작
+"""
+import os, json, inspect, argparse
+from typing import List
+import numpy as np
+from common_fastapi.shared.config import get_env, get_env_int, get_env_float
+
+EMBED_ONNX_DIR = get_env("EMBED_ONNX_DIR", "models/ko-sroberta-multitask-onnx")
+EMBED_ONNX_THREADS = get_env_int("EMBED_ONNX_THREADS", 0) # 0이면 onnxruntime 기본 (물리 코어 수)
+EMBED_ONNX_MIN_COSINE = get_env_float("EMBED_ONNX_MIN_COSINE", 0.99) # torch 결과와의 최소 코사인 유사도 (검증 기준)
+MAX_SEQ_LENGTH = 128 # jhgan/ko-sroberta-multitask의 SentenceTransformer max_seq_length
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+
+# 코사인 일치 확인용 문장 (짧은 발화 + 공고 본문 형태)
+CHECK_TEXTS = [
+    "바리스타 자격증 있어요",
+    "주말 오전에 시급 12000원 이상 알바 찾아요",
+    "운전면허 있고 배달 경험 있음",
+    "아이들 좋아하고 영어 가능",
+    "오늘 날씨 어때?",
+    "카페 홀서빙 및 음료 제조. 주말 근무 가능자 우대, 바리스타 자격증 소지자 우대, 성실하고 밝은 분",
+    "물류센터 상하차 및 분류 작업. 야간 근무, 체력 좋으신 분, 경력 무관, 주 5일 근무 시 주휴수당 지급",
+    "초등학생 영어 학원 보조 강사 모집. 평일 오후 2시~6시, 영어 회화 가능자, 아이를 좋아하는 분",
+]
+
+
+def export(model_name: str = "jhgan/ko-sroberta-multitask", model_dir: str = EMBED_ONNX_DIR) -> str:
+    """HF 모델 => ONNX(fp32) => int8 동적 양자화. tokenizer.json도 같이 저장. int8 모델 경로 반환"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(model_dir) # tokenizer.json (fast tokenizer) => 런타임은 tokenizers만 사용
+
+    sample = tokenizer(["샘플 문장"], return_tensors="pt")
+    fp32_path = os.path.join(model_dir, FP32_FILE)
+    legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {} # torch 2.9+ 기본 dynamo exporter는 onnxscript 필요 + dynamic_axes 미사용
+    class _Encoder(torch.nn.Module): # 키워드 인자로 호출 (transformers 버전마다 forward의 위치 인자 순서가 다름)
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(model).eval(), (sample["input_ids"], sample["attention_mask"]), fp32_path,
+            input_names=["input_ids", "attention_mask"], output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": {0: "batch", 1: "seq"}, "attention_mask": {0: "batch", 1: "seq"}, "last_hidden_state": {0: "batch", 1: "seq"}},
+            opset_version=14, **legacy,
+        )
+    int8_path = os.path.join(model_dir, INT8_FILE)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8) # 가중치 int8, 활성값은 실행 중 양자화
+    with open(os.path.join(model_dir, "embed_onnx.json"), "w", encoding="utf-8") as f:
+        json.dump({"model_name": model_name, "max_seq_length": MAX_SEQ_LENGTH, "pooling": "mean", "quantization": "dynamic int8"}, f, ensure_ascii=False)
+    print(f"[embed_onnx] 변환 완료: {int8_path}")
+    return int8_path
+
+
+class OnnxEncoder:
+    """SentenceTransformer.encode 대체 (EmbedderKo._encode / embed_server 에서 같은 방식으로 호출)"""
+
+    def __init__(self, model_name: str = "jhgan/ko-sroberta-multitask", model_dir: str = EMBED_ONNX_DIR):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        path = os.path.join(model_dir, INT8_FILE)
+        if not os.path.exists(path):
+            print(f"[OnnxEncoder] {path} 없음 - 변환 시작 (torch/transformers/onnx 필요)")
+            export(model_name, model_dir)
+        options = ort.SessionOptions()
+        if EMBED_ONNX_THREADS:
+            options.intra_op_num_threads = EMBED_ONNX_THREADS
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        pad = next((t for t in ("[PAD]", "<pad>") if self.tokenizer.token_to_id(t) is not None), None) # 모델의 패딩 토큰과 같게 (RoBERTa position id 계산)
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id(pad) if pad else 0, pad_token=pad or "[PAD]")
+        print(f"[OnnxEncoder] 모델 로딩 완료: {path}")
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, batch_size: int = 32) -> np.ndarray:
+        out = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer.encode_batch(list(texts[start:start + batch_size]))
+            input_ids = np.asarray([e.ids for e in encoded], dtype=np.int64)
+            mask = np.asarray([e.attention_mask for e in encoded], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, feeds)[0] # (batch, seq, 768)
+            m = mask[:, :, None].astype(np.float32) # mean pooling (패딩 제외)
+            out.append((hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None))
+        return np.concatenate(out).astype(np.float32) if out else np.zeros((0, 768), dtype=np.float32)
+
+
+def cosine_agreement(a: np.ndarray, b: np.ndarray) -> np.ndarray: # 행별 코사인 유사도
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def check(model_name: str = "jhgan/ko-sroberta-multitask", model_dir: str = EMBED_ONNX_DIR, texts: List[str] = CHECK_TEXTS) -> dict:
+    """torch(SentenceTransformer) 결과와 ONNX int8 결과의 코사인 일치 확인 (min이 EMBED_ONNX_MIN_COSINE 이상이어야 통과)"""
+    from sentence_transformers import SentenceTransformer
+    reference = SentenceTransformer(model_name).encode(texts, convert_to_numpy=True)
+    cos = cosine_agreement(reference, OnnxEncoder(model_name, model_dir).encode(texts))
+    result = {"n": len(texts), "min": round(float(cos.min()), 5), "mean": round(float(cos.mean()), 5),
+              "threshold": EMBED_ONNX_MIN_COSINE, "ok": bool(cos.min() >= EMBED_ONNX_MIN_COSINE)}
+    print(f"[embed_onnx] torch 대비 코사인 : {result}")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="jhgan ONNX int8 변환 / 검증")
+    parser.add_argument("--export", action="store_true", help="변환 + 양자화 (기존 파일 덮어씀)")
+    parser.add_argument("--check", action="store_true", help="torch 결과와 코사인 일치 확인")
+    parser.add_argument("--model", default="jhgan/ko-sroberta-multitask")
+    parser.add_argument("--dir", default=EMBED_ONNX_DIR)
+    args = parser.parse_args()
+    if args.export:
+        export(args.model, args.dir)
+    if args.check or args.export:
+        if not check(args.model, args.dir)["ok"]:
+            raise SystemExit(1)
@@ -1,12 +1,22 @@
-import json, re, os
+import json, re, os, time
 from typing import List, Optional, Tuple, Any
-from openai import OpenAI # type: ignore
+from common_fastapi.shared.config import get_env_float
+from common_fastapi.shared.metrics import EMBED_LATENCY, EMBED_BATCH_SIZE
+from common_fastapi.shared.tracing import span
 
 # 벡터(Vector)는 형식/구조, 임베딩(Embedding)은 목적/의미
 # 벡터 = 수치들의 배열로 표현된 데이터 구조
 # 임베딩 = 데이터(텍스트,이미지 등)를 의미를 보존하면서 숫자 벡터로 변환한 것 : list[float]
 
-_client_embed = OpenAI(api_key=os.getenv("OPENAI_API_KEY")) if os.getenv("OPENAI_API_KEY") else None
+_client_embed = None
+
+def get_client_embed(): # 최초 사용시 생성 (import 시점에 openai 로딩/클라이언트 생성을 하지 않아 기동이 빠름). 키 없으면 None
+    global _client_embed
+    if _client_embed is None and os.getenv("OPENAI_API_KEY"):
+        from openai import OpenAI # type: ignore
+        _client_embed = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL") or None,
+                               timeout=get_env_float("OPENAI_EMBED_TIMEOUT_S", 10)) # 요청 예산으로 취소돼도 스레드의 HTTP 호출은 이 시간 안에 끝남
+    return _client_embed
 
 def _coerce_to_list(emb: Any) -> Optional[List[float]]: # 리스트로 강제 형 변환
     # emb => list[float]. 성공시 list[float] 반환, 실패(if cannot coerce)시 None
@@ -58,7 +68,31 @@ def prepare_embedding_param(embedding: Any) -> Tuple[bool, Any]: # DB SQL문에
         raise ValueError("Cannot prepare openai embedding parameter: unsupported format")
     
 def get_embedding(text: str) -> List[float]: # Generate embedding for given text using OpenAI client
-    if _client_embed is None:
+    client = get_client_embed()
+    if client is None:
         raise RuntimeError("OpenAI API key not configured for embeddings (OPENAI_API_KEY missing)")
-    response = _client_embed.embeddings.create(model="text-embedding-3-small", input=text)
-    return response.data[0].embedding
+    t0 = time.perf_counter()
+    try:
+        with span("openai.embeddings", **{"embed.model": "text-embedding-3-small", "embed.inputs": 1}) as sp:
+            response = client.embeddings.create(model="text-embedding-3-small", input=text)
+            if response.usage:
+                sp.set_attribute("llm.tokens.prompt", response.usage.prompt_tokens)
+        return response.data[0].embedding
+    finally:
+        EMBED_LATENCY.labels("openai").observe(time.perf_counter() - t0)
+        EMBED_BATCH_SIZE.labels("openai").observe(1)
+
+def get_embeddings(texts: List[str]) -> List[List[float]]: # 여러 텍스트를 API 호출 한 번으로 (배치 처리용, 입력 순서대로 반환)
+    client = get_client_embed()
+    if client is None:
+        raise RuntimeError("OpenAI API key not configured for embeddings (OPENAI_API_KEY missing)")
+    t0 = time.perf_counter()
+    try:
+        with span("openai.embeddings", **{"embed.model": "text-embedding-3-small", "embed.inputs": len(texts)}) as sp:
+            response = client.embeddings.create(model="text-embedding-3-small", input=texts)
+            if response.usage:
+                sp.set_attribute("llm.tokens.prompt", response.usage.prompt_tokens)
+        return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+    finally:
+        EMBED_LATENCY.labels("openai").observe(time.perf_counter() - t0)
+        EMBED_BATCH_SIZE.labels("openai").observe(len(texts))
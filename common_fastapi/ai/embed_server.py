@@ -0,0 +1,307 @@
+"""
+jhgan 임베딩 사이드카 서버 + 클라이언트
+- uvicorn 워커마다 SentenceTransformer(+torch)를 올리면 워커 수만큼 수백 MB씩 메모리를 쓰므로
+  모델은 이 프로세스 하나만 올리고, 워커들은 Unix domain socket으로 encode 요청을 보냄
+- 여러 워커에서 동시에 들어온 요청은 EMBED_SERVER_BATCH_WAIT_MS 동안 모아서 한 번에 encode (워커 간 배칭)
+- 결과 벡터는 소켓으로 보내지 않고, 클라이언트가 연결시 만들어 둔 shared memory 버퍼에 float32로 바로 씀
+- 요청마다 id + 버퍼 위치(offset, 클라이언트가 슬롯으로 나눔)를 붙여서 한 연결로 여러 요청을 동시에 보냄 (응답은 끝나는 순서대로, id로 구분)
+
+실행 예)
+    python -m common_fastapi.ai.embed_server --socket /tmp/gigchat_embed.sock
+    앱은 EMBED_SERVER_SOCKET=/tmp/gigchat_embed.sock 으로 띄우면 EmbedderKo가 클라이언트 모드로 동작
+
+프로토콜 : 4바이트 길이(big endian) + JSON
+    연결 직후 {"shm": 이름, "capacity": 바이트수} => {"ok": true, "dim": 768}
+    이후 {"id": n, "texts": [...], "offset": 바이트} => {"id": n, "ok": true, "n": 개수, "dim": 768} (벡터는 shm 버퍼 offset 위치에 n x dim float32)
+"""
+import os, json, queue, socket, struct, asyncio, argparse, itertools, threading
+from typing import Dict, List
+from multiprocessing import shared_memory
+import numpy as np
+from common_fastapi.shared.config import get_env_int, get_env_float
+
+EMBED_SERVER_BATCH_WAIT_MS = get_env_float("EMBED_SERVER_BATCH_WAIT_MS", 5)
+EMBED_SERVER_MAX_BATCH = get_env_int("EMBED_SERVER_MAX_BATCH", 64)
+EMBED_CLIENT_MAX_TEXTS = 64 # 클라이언트 shm 슬롯 크기 기준 (이보다 많으면 나눠서 요청)
+EMBED_CLIENT_SLOTS = get_env_int("EMBED_CLIENT_SLOTS", 8) # 연결 하나로 동시에 보낼 수 있는 요청 수 (shm 버퍼를 슬롯으로 나눔)
+EMBED_DIM = 768
+_SLOT_BYTES = EMBED_CLIENT_MAX_TEXTS * EMBED_DIM * 4
+
+def _pack(obj) -> bytes:
+    data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    return struct.pack(">I", len(data)) + data
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    # 서버는 버퍼를 빌려 쓰기만 함 => resource_tracker가 서버 종료시 unlink하지 않도록 추적 해제
+    try:
+        return shared_memory.SharedMemory(name=name, track=False) # python 3.13+
+    except TypeError:
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+#####################################################
+# 서버
+#####################################################
+class EmbedServer:
+
+    def __init__(self, model_name: str = "jhgan/ko-sroberta-multitask"):
+        from common_fastapi.ai.embed_jhgan import load_encoder, EMBED_BACKEND
+        print(f"[EmbedServer] 모델 로딩 중: {model_name} ({EMBED_BACKEND})")
+        self.model = load_encoder(model_name) # EMBED_BACKEND=onnx 이면 int8 ONNX
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True, batch_size=EMBED_SERVER_MAX_BATCH).astype(np.float32)
+
+    async def batcher(self): # 요청들을 짧게 모아서 한 번에 encode
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            count = len(items[0][0])
+            deadline = loop.time() + EMBED_SERVER_BATCH_WAIT_MS / 1000
+            while count < EMBED_SERVER_MAX_BATCH:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                count += len(item[0])
+            texts = [t for item_texts, _ in items for t in item_texts]
+            try:
+                vectors = await loop.run_in_executor(None, self._encode, texts)
+                start = 0
+                for item_texts, fut in items:
+                    if not fut.done():
+                        fut.set_result(vectors[start:start + len(item_texts)])
+                    start += len(item_texts)
+            except Exception as e:
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        shm = None
+        tasks = set()
+        write_lock = asyncio.Lock() # 응답은 요청별 태스크가 끝나는 순서대로 씀
+        try:
+            hello = await self._read(reader)
+            shm = _attach_shm(hello["shm"])
+            capacity = int(hello["capacity"])
+            writer.write(_pack({"ok": True, "dim": EMBED_DIM}))
+            await writer.drain()
+            while True: # 앞 요청의 encode를 기다리지 않고 계속 읽음 (같은 연결의 요청도 한 배치로 모임)
+                req = await self._read(reader)
+                task = asyncio.create_task(self._serve(req, shm, capacity, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass # 워커 종료
+        finally:
+            if tasks: # 처리중인 요청이 shm에 다 쓴 뒤에 닫음
+                await asyncio.gather(*tasks, return_exceptions=True)
+            if shm is not None:
+                shm.close()
+            writer.close()
+
+    async def _serve(self, req: dict, shm: shared_memory.SharedMemory, capacity: int, writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        texts = req.get("texts") or []
+        offset = int(req.get("offset") or 0)
+        if offset < 0 or offset + len(texts) * EMBED_DIM * 4 > capacity:
+            resp = {"ok": False, "error": "버퍼 크기 초과"}
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            await self.queue.put((texts, fut))
+            try:
+                vectors = await fut
+                out = np.ndarray(vectors.shape, dtype=np.float32, buffer=shm.buf, offset=offset)
+                out[:] = vectors
+                del out # shm.close() 전에 버퍼 참조 해제
+                resp = {"ok": True, "n": len(texts), "dim": vectors.shape[1] if len(texts) else EMBED_DIM}
+            except Exception as e:
+                resp = {"ok": False, "error": str(e)}
+        async with write_lock:
+            writer.write(_pack({"id": req.get("id"), **resp}))
+            await writer.drain()
+
+    @staticmethod
+    async def _read(reader: asyncio.StreamReader):
+        size = struct.unpack(">I", await reader.readexactly(4))[0]
+        return json.loads((await reader.readexactly(size)).decode("utf-8"))
+
+async def serve(socket_path: str, model_name: str):
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = EmbedServer(model_name)
+    batcher = asyncio.create_task(server.batcher())
+    srv = await asyncio.start_unix_server(server.handle, path=socket_path)
+    print(f"[EmbedServer] 대기 중: {socket_path}")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        batcher.cancel()
+
+#####################################################
+# 클라이언트 (EmbedderKo 클라이언트 모드에서 사용)
+#####################################################
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("임베딩 서버 연결 끊김")
+        buf.extend(chunk)
+    return bytes(buf)
+
+def _recv_msg(sock: socket.socket) -> dict:
+    size = struct.unpack(">I", _recv_exact(sock, 4))[0]
+    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+class _Connection:
+    """
+    사이드카 연결 하나 : 여러 스레드가 요청마다 id + shm 슬롯을 받아 동시에 보내고, 수신 스레드가 id로 응답을 나눠줌
+    - 결과는 수신 스레드가 슬롯에서 복사한 뒤 슬롯을 반납 => 타임아웃으로 포기한 요청도 늦은 응답이 오면 그때 슬롯이 돌아옴
+    - 연결이 끊기면 기다리던 요청은 모두 ConnectionError, shm은 수신 스레드가 정리
+    """
+
+    def __init__(self, socket_path: str, timeout: float):
+        self.shm = shared_memory.SharedMemory(create=True, size=_SLOT_BYTES * EMBED_CLIENT_SLOTS)
+        self.free: queue.Queue = queue.Queue()
+        for slot in range(EMBED_CLIENT_SLOTS):
+            self.free.put(slot)
+        self.pending: Dict[int, dict] = {} # id => {"event", "slot", "resp"}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock() # pending / closed
+        self.send_lock = threading.Lock()
+        self.closed = False
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.settimeout(timeout)
+            self.sock.connect(socket_path)
+            self.sock.sendall(_pack({"shm": self.shm.name, "capacity": self.shm.size}))
+            resp = _recv_msg(self.sock)
+            if not resp.get("ok"):
+                raise RuntimeError(f"임베딩 서버 연결 실패: {resp.get('error')}")
+            self.sock.settimeout(None) # 이후 대기는 수신 스레드가 (요청별 타임아웃은 request에서)
+        except BaseException:
+            self.sock.close()
+            self._release_shm()
+            raise
+        threading.Thread(target=self._receive, name="embed-client-recv", daemon=True).start()
+
+    def request(self, texts: List[str], timeout: float) -> np.ndarray:
+        try:
+            slot = self.free.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("임베딩 서버 응답 대기중인 요청이 많음 (빈 슬롯 없음)")
+        req_id = next(self.ids)
+        waiter = {"event": threading.Event(), "slot": slot, "resp": None}
+        with self.lock:
+            if self.closed:
+                self.free.put(slot)
+                raise ConnectionError("임베딩 서버 연결 끊김")
+            self.pending[req_id] = waiter
+        try:
+            with self.send_lock:
+                self.sock.sendall(_pack({"id": req_id, "texts": texts, "offset": slot * _SLOT_BYTES}))
+        except OSError as e:
+            with self.lock:
+                if self.pending.pop(req_id, None) is not None:
+                    self.free.put(slot)
+            self.close()
+            raise ConnectionError(f"임베딩 서버 전송 실패: {e}")
+        if not waiter["event"].wait(timeout):
+            # 사이드카는 아직 처리중일 수 있으므로 다시 보내지 않음 (늦은 응답은 수신 스레드가 버리고 슬롯만 반납)
+            raise TimeoutError(f"임베딩 서버 응답 없음 ({timeout}초)")
+        resp = waiter["resp"]
+        if resp is None:
+            raise ConnectionError("임베딩 서버 연결 끊김")
+        if not resp.get("ok"):
+            raise RuntimeError(resp.get("error"))
+        return resp["vectors"]
+
+    def _receive(self):
+        try:
+            while True:
+                resp = _recv_msg(self.sock)
+                with self.lock:
+                    waiter = self.pending.pop(resp.get("id"), None)
+                if waiter is None:
+                    continue
+                if resp.get("ok"):
+                    view = np.ndarray((resp["n"], resp["dim"]), dtype=np.float32, buffer=self.shm.buf, offset=waiter["slot"] * _SLOT_BYTES)
+                    resp["vectors"] = view.copy()
+                    del view
+                self.free.put(waiter["slot"])
+                waiter["resp"] = resp
+                waiter["event"].set()
+        except (OSError, ConnectionError, ValueError):
+            pass # 연결 끊김 / close()
+        finally:
+            with self.lock:
+                self.closed = True
+                waiters, self.pending = list(self.pending.values()), {}
+            for waiter in waiters:
+                waiter["event"].set() # resp None => ConnectionError
+            self.sock.close()
+            self._release_shm()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR) # 수신 스레드를 깨워서 정리하게 함
+        except OSError:
+            pass
+
+    def _release_shm(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+class EmbedServerClient:
+
+    def __init__(self, socket_path: str, timeout: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._conn: _Connection = None
+        self._lock = threading.Lock() # 연결 생성/교체만 (요청은 잠금 없이 동시에)
+
+    def _connection(self) -> _Connection:
+        with self._lock:
+            if self._conn is None or self._conn.closed:
+                self._conn = _Connection(self.socket_path, self.timeout)
+            return self._conn
+
+    def _request(self, texts: List[str]) -> np.ndarray:
+        for attempt in range(2): # 서버 재시작 등으로 끊겼으면 새 연결로 한 번 더 (타임아웃은 사이드카가 아직 처리중일 수 있어서 재전송 안 함)
+            try:
+                return self._connection().request(texts, self.timeout)
+            except TimeoutError:
+                raise
+            except (OSError, ConnectionError):
+                if attempt:
+                    raise
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        chunks = [self._request(texts[i:i + EMBED_CLIENT_MAX_TEXTS]) for i in range(0, len(texts), EMBED_CLIENT_MAX_TEXTS)]
+        return np.concatenate(chunks) if chunks else np.zeros((0, EMBED_DIM), dtype=np.float32)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="jhgan 임베딩 사이드카 서버")
+    parser.add_argument("--socket", default=os.getenv("EMBED_SERVER_SOCKET", "/tmp/gigchat_embed.sock"))
+    parser.add_argument("--model", default="jhgan/ko-sroberta-multitask")
+    args = parser.parse_args()
+    asyncio.run(serve(args.socket, args.model))
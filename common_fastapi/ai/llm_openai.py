@@ -1,5 +1,7 @@
-from openai import OpenAI
-from common_fastapi.shared.config import OPENAI_API_KEY
+import time
+from common_fastapi.shared.config import OPENAI_API_KEY, OPENAI_BASE_URL, get_env_float
+from common_fastapi.shared.metrics import LLM_LATENCY, LLM_ERRORS, LLM_TOKENS
+from common_fastapi.shared.tracing import span
 
 class LLMClient:
 
@@ -7,12 +9,24 @@ class LLMClient:
         if not OPENAI_API_KEY:
             raise ValueError("❌ OPENAI_API_KEY가 공통 프로젝트 .env에 없습니다.")
         self.api_key = OPENAI_API_KEY
-        self.client = OpenAI(api_key=self.api_key)
+        from openai import OpenAI # 무거운 import는 실제 생성 시점에
+        self.client = OpenAI(api_key=self.api_key, base_url=OPENAI_BASE_URL, timeout=get_env_float("OPENAI_TIMEOUT_S", 30)) # 예산 없이 호출해도 무한 대기 안함
 
-    def chat(self, messages: list, model="gpt-4o-mini"):
-        try:
-            response = self.client.chat.completions.create(model=model, messages=messages, temperature=0)
-            return response.choices[0].message.content
-        except Exception as e:
-            print(f"❌ LLM(OPENAI) 호출 오류: {e}")
-            return None
+    def chat(self, messages: list, model="gpt-4o-mini", timeout: float = None): # timeout : 요청 지연 예산 중 남은 시간 (초과시 HTTP 호출 취소, 재시도 없음)
+        t0 = time.perf_counter()
+        with span("openai.chat", **{"llm.model": model, "llm.messages": len(messages), "llm.timeout": timeout}) as sp:
+            try:
+                client = self.client if timeout is None else self.client.with_options(timeout=timeout, max_retries=0)
+                response = client.chat.completions.create(model=model, messages=messages, temperature=0)
+                if response.usage: # 토큰 사용량 집계
+                    LLM_TOKENS.labels(model, "prompt").inc(response.usage.prompt_tokens)
+                    LLM_TOKENS.labels(model, "completion").inc(response.usage.completion_tokens)
+                    sp.set_attributes(**{"llm.tokens.prompt": response.usage.prompt_tokens, "llm.tokens.completion": response.usage.completion_tokens})
+                return response.choices[0].message.content
+            except Exception as e:
+                sp.record_exception(e)
+                LLM_ERRORS.labels(model).inc()
+                print(f"❌ LLM(OPENAI) 호출 오류: {e}")
+                return None
+            finally:
+                LLM_LATENCY.labels(model).observe(time.perf_counter() - t0)
@@ -18,15 +18,17 @@ def rsObj(obj: Optional[Dict[str, Any]] = {}):
         "rs": obj
     }
     
-def rsError(code=Const.CODE_NOT_OK, msg="", is500=False):
+def rsError(code=Const.CODE_NOT_OK, msg="", is500=False, status_code=None, headers=None):
+    # status_code를 주면 그대로 사용 (예: 429, 503 부하 차단). 없으면 기존처럼 is500 여부로 200/500
     payload = {
         "code": code,
         "msg": msg
     }
-    status_code=status.HTTP_200_OK
-    if is500:
-        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR        
-    return JSONResponse(status_code=status_code, content=jsonable_encoder(payload))
+    if status_code is None:
+        status_code=status.HTTP_200_OK
+        if is500:
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR        
+    return JSONResponse(status_code=status_code, content=jsonable_encoder(payload), headers=headers)
 
 # def raiseHttpEx(code=Const.CODE_NOT_OK, msg="", statusCode=status.HTTP_200_OK):
 #     # 클라이언트에서 axios 호출시 status.HTTP_200_OK이 아니면 try catch의 catch (ex)로 전달됨. status.HTTP_200_OK이면 try문 안에서 계속됨
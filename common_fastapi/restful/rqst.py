@@ -1,10 +1,16 @@
 from pydantic import BaseModel
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 class ChatRequest(BaseModel): # 챗봇에서 요청하는 검색 조건 채우기 또는 실제 검색용 공통 Request
     userid: Optional[str] = None
+    session_id: Optional[str] = None # 서버가 발급한 값 (응답의 session_id). 있으면 condition을 생략해도 서버에 보관된 조건을 이어서 사용
     text: str
-    condition: Optional[Dict[str, Any]] = {}
+    condition: Optional[Dict[str, Any]] = None # None(생략)일 때만 세션 조건 사용, {}를 보내면 빈 조건으로 새로 시작
     search: bool = False
     embeddingModel: str = 'jhgan'
-    similarityThreshold: float = 0.3
\ No newline at end of file
+    similarityThreshold: float = 0.3
+    facets: bool = False # True면 검색 결과와 함께 facet 건수(카테고리/지역/요일/시급구간)도 반환
+
+class ChatBatchRequest(BaseModel): # /chat/batch : 저장된 발화/프로필 여러 건을 한 번에 (결과는 NDJSON 스트림)
+    items: List[ChatRequest]
+    concurrency: Optional[int] = None # 동시 실행 수 (서버 설정 CHAT_BATCH_CONCURRENCY 이하)
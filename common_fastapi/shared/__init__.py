@@ -2,18 +2,25 @@
 
 from .constant import Const
 from .logger import logger
-from .config import OPENAI_API_KEY, DB_URL, get_env, validate_env
-from .db import init_db_pool, close_db_pool, get_pool, get_db_connection
+from .config import OPENAI_API_KEY, OPENAI_BASE_URL, DB_URL, get_env, get_env_int, get_env_float, validate_env
+from .db import POOL_INTERACTIVE, POOL_BATCH, init_db_pool, init_db_pools, close_db_pool, get_pool, get_pool_stats, get_db_connection
 
 __all__ = [
     "Const", 
     "logger",
     "OPENAI_API_KEY",
+    "OPENAI_BASE_URL",
     "DB_URL",
     "get_env",
+    "get_env_int",
+    "get_env_float",
     "validate_env",
+    "POOL_INTERACTIVE",
+    "POOL_BATCH",
     "init_db_pool",
+    "init_db_pools",
     "close_db_pool",
     "get_pool",
+    "get_pool_stats",
     "get_db_connection"
 ]
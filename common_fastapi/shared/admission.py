@@ -0,0 +1,119 @@
+# 요청 수락 제어(admission control) / 부하 차단(load shedding)
+# - 경로(route)별 동시 처리 한도 + 한도 초과분은 길이 제한 있는 대기열에서 deadline까지만 대기
+# - userid별 token bucket 으로 사용자 1명이 처리량을 독점하지 못하게 함
+# 처리 못할 요청은 오래 붙잡지 않고 바로 거절 (AdmissionRejected => rsError)
+import time, asyncio
+from contextlib import asynccontextmanager
+from typing import Dict
+from common_fastapi.shared.config import get_env_int, get_env_float
+from common_fastapi.shared.metrics import ADMISSION_INFLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED
+
+ADMISSION_QUEUE_MAX = get_env_int("ADMISSION_QUEUE_MAX", 50) # 경로별 대기열 최대 길이
+ADMISSION_DEADLINE_S = get_env_float("ADMISSION_DEADLINE_S", 2.0) # 대기열에서 기다릴 수 있는 최대 시간
+ADMISSION_USER_RATE = get_env_float("ADMISSION_USER_RATE", 2.0) # userid별 초당 허용 요청 (0이면 사용 안함)
+ADMISSION_USER_BURST = get_env_int("ADMISSION_USER_BURST", 10)
+_USER_BUCKETS_MAX = 10000 # 오래된 bucket 정리 기준
+
+# 경로별 동시 처리 한도 : LLM 호출(classify_input)은 느리지만 DB를 안 쓰고, hybrid_search는 임베딩+벡터 검색이라 가장 무거움
+ROUTE_LIMITS = {
+    "classify_input": get_env_int("ADMISSION_LIMIT_CLASSIFY_INPUT", 32),
+    "sql_search": get_env_int("ADMISSION_LIMIT_SQL_SEARCH", 16),
+    "hybrid_search": get_env_int("ADMISSION_LIMIT_HYBRID_SEARCH", 8),
+    "batch": get_env_int("ADMISSION_LIMIT_BATCH", 4), # /chat/batch 그룹 (interactive 경로 한도와 별도, CHAT_BATCH_CONCURRENCY 이상으로)
+}
+
+class AdmissionRejected(Exception):
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.reason = reason # queue_full | deadline | rate_limited
+        self.retry_after = retry_after
+
+class _TokenBucket:
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float: # 성공시 0, 실패시 다음 토큰까지 남은 초
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class _RouteGate:
+
+    def __init__(self, route: str, limit: int):
+        self.route = route
+        self.sem = asyncio.Semaphore(limit)
+        self.waiting = 0
+
+    async def enter(self):
+        if not self.sem.locked():
+            await self.sem.acquire()
+            return
+        if self.waiting >= ADMISSION_QUEUE_MAX:
+            raise AdmissionRejected("queue_full")
+        self.waiting += 1
+        ADMISSION_QUEUE_DEPTH.labels(self.route).set(self.waiting)
+        try:
+            await asyncio.wait_for(self.sem.acquire(), ADMISSION_DEADLINE_S)
+        except asyncio.TimeoutError:
+            raise AdmissionRejected("deadline")
+        finally:
+            self.waiting -= 1
+            ADMISSION_QUEUE_DEPTH.labels(self.route).set(self.waiting)
+
+    def leave(self):
+        self.sem.release()
+
+_gates: Dict[str, _RouteGate] = {}
+_buckets: Dict[str, _TokenBucket] = {}
+
+def _gate(route: str) -> _RouteGate:
+    gate = _gates.get(route)
+    if gate is None:
+        gate = _gates[route] = _RouteGate(route, ROUTE_LIMITS.get(route, 16))
+    return gate
+
+def _check_user(userid: str):
+    if not userid or ADMISSION_USER_RATE <= 0:
+        return
+    bucket = _buckets.get(userid)
+    if bucket is None:
+        if len(_buckets) >= _USER_BUCKETS_MAX: # 가득 찼으면 가장 오래 안 쓴 절반 정리
+            for uid, _ in sorted(_buckets.items(), key=lambda kv: kv[1].updated)[:_USER_BUCKETS_MAX // 2]:
+                _buckets.pop(uid, None)
+        bucket = _buckets[userid] = _TokenBucket(ADMISSION_USER_RATE, ADMISSION_USER_BURST)
+    wait = bucket.take()
+    if wait > 0:
+        raise AdmissionRejected("rate_limited", retry_after=wait)
+
+@asynccontextmanager
+async def admit(route: str, userid: str = None, per_user: bool = True):
+    """
+    사용 예)
+        async with admit("sql_search", payload.userid):
+            ... 실제 처리 ...
+    거절되면 AdmissionRejected 발생
+    per_user=False : userid별 요청 빈도 제한 없이 경로 한도만 (/chat/batch : 한 userid로 대량 제출하는 것이 정상 사용)
+    """
+    try:
+        if per_user:
+            _check_user(userid)
+        gate = _gate(route)
+        await gate.enter()
+    except AdmissionRejected as e:
+        ADMISSION_SHED.labels(route, e.reason).inc()
+        raise
+    ADMISSION_INFLIGHT.labels(route).inc()
+    try:
+        yield
+    finally:
+        ADMISSION_INFLIGHT.labels(route).dec()
+        gate.leave()
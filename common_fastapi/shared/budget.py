@@ -0,0 +1,58 @@
+# 요청 단위 지연 예산(latency budget) : chat_endpoint에서 마감시각(deadline)을 정하고 ChatState로 모든 노드에 전달
+# LLM/임베딩/DB 호출은 남은 시간만큼만 기다리고, 시간이 다 되면 취소 (BudgetExceeded)
+# 정해진 폴백 : hybrid_search => sql_search 결과, OpenAI 임베딩 => jhgan (남은 예산이 적을 때)
+import time, asyncio
+from typing import Any, Awaitable, List, Optional
+from common_fastapi.shared.config import get_env_float
+from common_fastapi.shared.metrics import BUDGET_FALLBACKS, BUDGET_EXCEEDED
+
+CHAT_BUDGET_S = get_env_float("CHAT_BUDGET_S", 15.0) # /chat 한 건 전체 예산 (admission 대기 포함)
+BUDGET_EMBED_FALLBACK_S = get_env_float("BUDGET_EMBED_FALLBACK_S", 3.0) # 남은 예산이 이보다 적으면 OpenAI 대신 jhgan 임베딩
+BUDGET_SQL_RESERVE_S = get_env_float("BUDGET_SQL_RESERVE_S", 1.0) # hybrid_search가 sql_search 폴백용으로 남겨두는 시간
+
+class BudgetExceeded(asyncio.TimeoutError): # 기존 asyncio.TimeoutError 처리(시간 초과 응답)를 그대로 탐
+
+    def __init__(self, stage: str):
+        super().__init__(f"지연 예산 초과: {stage}")
+        self.stage = stage
+        BUDGET_EXCEEDED.labels(stage).inc()
+
+def new_deadline(budget_s: float = None) -> float: # time.monotonic() 기준 마감시각
+    return time.monotonic() + (CHAT_BUDGET_S if budget_s is None else budget_s)
+
+def remaining(deadline: Optional[float]) -> Optional[float]: # 남은 초 (예산 없으면 None = 무제한)
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def call_timeout(deadline: Optional[float], stage: str, reserve: float = 0.0) -> Optional[float]:
+    """이번 호출에 줄 수 있는 시간 (reserve만큼은 뒤 단계용으로 남김). 남은 시간이 없으면 BudgetExceeded"""
+    left = remaining(deadline)
+    if left is None:
+        return None
+    left -= reserve
+    if left <= 0:
+        raise BudgetExceeded(stage)
+    return left
+
+async def within(deadline: Optional[float], stage: str, aw: Awaitable, reserve: float = 0.0) -> Any:
+    """
+    사용 예)
+        rows = await within(state.deadline, "sql_search", _query())
+    남은 시간 안에 끝나지 않으면 취소하고 BudgetExceeded
+    """
+    try:
+        timeout = call_timeout(deadline, stage, reserve)
+    except BudgetExceeded:
+        if asyncio.iscoroutine(aw):
+            aw.close() # 시작도 안 한 코루틴 정리 (never awaited 경고 방지)
+        raise
+    try:
+        return await asyncio.wait_for(aw, timeout)
+    except asyncio.TimeoutError:
+        raise BudgetExceeded(stage)
+
+def add_fallback(fallbacks: List[str], name: str): # 응답의 fallbacks 목록 + 메트릭
+    if name not in fallbacks:
+        fallbacks.append(name)
+    BUDGET_FALLBACKS.labels(name).inc()
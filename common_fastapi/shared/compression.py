@@ -0,0 +1,31 @@
+# 응답 압축 : 지정한 경로(/chat 등)만 Accept-Encoding 협상으로 br 또는 gzip 압축 (COMPRESS_MIN_BYTES 미만은 그대로)
+# br은 선택 패키지(brotli-asgi)가 설치된 경우에만. 없으면 gzip만 (starlette 기본 GZipMiddleware)
+# 사용 예) app.add_middleware(CompressionMiddleware, paths=("/chat",))
+from starlette.middleware.gzip import GZipMiddleware
+from common_fastapi.shared.config import get_env_int
+from common_fastapi.shared.logger import logger
+
+COMPRESS_MIN_BYTES = get_env_int("COMPRESS_MIN_BYTES", 1024) # 이보다 작은 응답은 압축 이득보다 CPU 비용이 큼
+COMPRESS_LEVEL = get_env_int("COMPRESS_LEVEL", 5) # gzip 1~9 (기본 5 : 한글 JSON 기준 압축률/속도 절충)
+
+try:
+    from brotli_asgi import BrotliMiddleware # type: ignore
+except ImportError:
+    BrotliMiddleware = None
+
+class CompressionMiddleware:
+
+    def __init__(self, app, paths=("/chat",), minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.paths = tuple(paths)
+        if BrotliMiddleware is not None: # br 미지원 클라이언트에는 gzip으로
+            self.compressed = BrotliMiddleware(app, minimum_size=minimum_size, gzip_fallback=True)
+        else:
+            self.compressed = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=COMPRESS_LEVEL)
+        logger.info(f"응답 압축 : {'br+gzip' if BrotliMiddleware else 'gzip'}, {minimum_size}바이트 이상, 경로 {self.paths}")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].rstrip("/") in self.paths:
+            await self.compressed(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
@@ -11,12 +11,27 @@ load_dotenv(_env_path)
 # 공통 환경 변수 (common_fastapi/.env)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 DB_URL = os.getenv("DB_URL")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None # 부하 테스트 등에서 로컬 stub 서버로 돌릴 때 사용 (예: http://127.0.0.1:8100/v1)
 
 # 프로젝트별 환경 변수 (각 프로젝트의 .env에서 읽음)
 # LOG_PATH, DEFAULT_TIMEZONE 등은 각 프로젝트에서 load_dotenv() 후 os.getenv()로 사용
 def get_env(key: str, default=None): # 환경 변수 가져오기
     return os.getenv(key, default)
 
+def get_env_int(key: str, default: int) -> int: # 숫자 환경 변수 : 잘못된 값이면 import가 죽지 않도록 기본값 사용
+    try:
+        return int(os.getenv(key, default))
+    except (TypeError, ValueError):
+        print(f"⚠️ 환경 변수 {key}={os.getenv(key)!r} 가 정수가 아님 - 기본값 {default} 사용")
+        return default
+
+def get_env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, default))
+    except (TypeError, ValueError):
+        print(f"⚠️ 환경 변수 {key}={os.getenv(key)!r} 가 숫자가 아님 - 기본값 {default} 사용")
+        return default
+
 def validate_env(): # 검증 (공통 환경 변수만) : 필수 공통 환경 변수 검증
     missing = []
     if not OPENAI_API_KEY:
@@ -7,8 +7,12 @@ class Const:
     CODE_NOT_FOUND: Final[str] = '-100'
     CODE_BLANK_DATA: Final[str] = '-101'
     CODE_ALREADY_EXIST: Final[str] = '-102'
+    CODE_BUSY: Final[str] = '-103'
+    CODE_RATE_LIMITED: Final[str] = '-104'
 
     MSG_NOT_OK: Final[str] = '오류가 발생하였습니다. '
     MSG_NOT_FOUND: Final[str] = '데이터가 없습니다. '
     MSG_BLANK_DATA: Final[str] = '값이 없습니다. '
     MSG_ALREADY_EXIST: Final[str] = '이미 존재하는 데이터입니다. '
+    MSG_BUSY: Final[str] = '요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해 주세요. '
+    MSG_RATE_LIMITED: Final[str] = '요청이 너무 잦습니다. 잠시 후 다시 시도해 주세요. '
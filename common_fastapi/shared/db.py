@@ -1,40 +1,256 @@
 # DB 연결 풀 중앙 관리 : 모든 프로젝트는 이 모듈의 pool 사용
+# 용도별로 이름 붙은 풀을 따로 둠
+# - interactive : /chat 검색 등 사용자 요청 (짧은 쿼리, 짧은 타임아웃)
+# - batch       : 관리자 임베딩 백필, EXPLAIN 등 장시간 작업 (커넥션 수 적게, 긴 타임아웃)
+# => 배치 작업이 커넥션을 오래 잡고 있어도 사용자 검색용 커넥션을 빼앗지 못함
+# 읽기 전용 검색은 get_db_connection(readonly=True)로 요청하면 복제본(DB_REPLICA_URLS) 풀로 분산됨
+# - 복제 지연(lag)이 DB_REPLICA_MAX_LAG_S를 넘거나 연결이 안 되는 복제본은 제외하고, 남은 복제본이 없으면 primary 사용
+# - 쓰기(UPDATE 등)는 readonly를 주지 않으므로 항상 primary
+import os, time, asyncio, itertools
 import asyncpg
 from pgvector.asyncpg import register_vector
-from contextlib import asynccontextmanager
-from common_fastapi.shared.config import DB_URL
+from contextlib import asynccontextmanager, AsyncExitStack
+from common_fastapi.shared.config import DB_URL, get_env_int, get_env_float
 from common_fastapi.shared.logger import logger
+from common_fastapi.shared.metrics import observe_pool, DB_POOL_LIMIT, DB_REPLICA_LAG, DB_READ_ROUTE
+from common_fastapi.shared.tracing import span
 
-_pool = None # 전역 DB 풀
+POOL_INTERACTIVE = "interactive"
+POOL_BATCH = "batch"
+
+# 풀별 설정 : burst_size는 적응형 크기 조정(DB_POOL_ADAPTIVE=1)시 interactive가 늘어날 수 있는 최대치
+POOL_CONFIGS = {
+    POOL_INTERACTIVE: {
+        "min_size": get_env_int("DB_POOL_INTERACTIVE_MIN", 1),
+        "max_size": get_env_int("DB_POOL_INTERACTIVE_MAX", 10),
+        "burst_size": get_env_int("DB_POOL_INTERACTIVE_BURST", get_env_int("DB_POOL_INTERACTIVE_MAX", 10)),
+        "command_timeout": get_env_float("DB_POOL_INTERACTIVE_TIMEOUT", 60),
+    },
+    POOL_BATCH: {
+        "min_size": get_env_int("DB_POOL_BATCH_MIN", 0),
+        "max_size": get_env_int("DB_POOL_BATCH_MAX", 2),
+        "command_timeout": get_env_float("DB_POOL_BATCH_TIMEOUT", 600),
+    },
+}
+
+# 복제본 : 콤마로 구분된 URL 목록. 풀 크기/타임아웃은 interactive와 동일하게 사용
+DB_REPLICA_URLS = [u.strip() for u in os.getenv("DB_REPLICA_URLS", "").split(",") if u.strip()]
+DB_REPLICA_MAX_LAG_S = get_env_float("DB_REPLICA_MAX_LAG_S", 5)
+DB_REPLICA_CHECK_INTERVAL = get_env_float("DB_REPLICA_CHECK_INTERVAL", 5) # 초
+
+# 복제본이 따라잡은 상태(receive == replay)면 0, 아니면 마지막 replay 이후 경과 시간. 복제본이 아닌 서버는 0
+_LAG_SQL = """
+    SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+           END::float8 AS lag
+"""
+
+DB_POOL_ADAPTIVE = os.getenv("DB_POOL_ADAPTIVE", "0") == "1"
+DB_POOL_ADAPT_INTERVAL = get_env_float("DB_POOL_ADAPT_INTERVAL", 5) # 초
+DB_POOL_ADAPT_WAIT_MS = get_env_float("DB_POOL_ADAPT_WAIT_MS", 20) # interactive 평균 대기가 이 값을 넘으면 batch를 줄이고 interactive를 늘림
+
+class _Limiter: # asyncpg 풀은 생성 후 max_size를 바꿀 수 없으므로 그 위에서 동시 사용 한도를 조절
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_use < self.limit)
+            self.in_use += 1
+
+    async def release(self):
+        async with self._cond:
+            self.in_use -= 1
+            self._cond.notify()
+
+    async def set_limit(self, limit: int):
+        async with self._cond:
+            self.limit = limit
+            self._cond.notify_all()
+
+_pools = {} # 이름 => asyncpg 풀
+_limiters = {} # 이름 => _Limiter
+_pool_stats = {} # 이름 => 커넥션 획득 대기시간 누적 (부하 테스트/모니터링용)
+_adapt_task = None
+_replicas = [] # 복제본 풀 이름 목록 (replica1, replica2, ...)
+_replica_health = {} # 이름 => {"healthy": bool, "lag_s": float, "error": str}
+_replica_rr = itertools.count() # round robin
+_replica_task = None
+
+def _new_stats() -> dict:
+    return {"acquired": 0, "wait_total": 0.0, "wait_max": 0.0, "window_acquired": 0, "window_wait": 0.0}
 
 # 아래 create_pool(...)에 init=register_vector를 전달하도록 수정
 # 이로써 풀에서 생성되는 모든 커넥션에 pgvector 타입 코덱이 등록되어 간헐적인 "expected str, got list" 오류를 방지
 # 안전을 위해 풀 생성 직후 단일 커넥션에 대해 호출하던 await register_vector(conn)도 그대로 남겨둠 (무해하며 충돌 없음)
-async def init_db_pool(database_url: str = None, min_size: int = 1, max_size: int = 10): # DB 연결 풀 초기화
-    global _pool    
+async def init_db_pool(database_url: str = None, min_size: int = 1, max_size: int = 10, name: str = POOL_INTERACTIVE, command_timeout: float = 60, limit: int = None): # DB 연결 풀 초기화
     db_url = database_url or DB_URL
     if not db_url:
         raise ValueError("❌ DB_URL이 설정되지 않았습니다")
-    _pool = await asyncpg.create_pool(db_url, min_size=min_size, max_size=max_size, command_timeout=60, init=register_vector) # pgvector 등록
-    async with _pool.acquire() as conn: # 첫 연결 테스트
+    pool = await asyncpg.create_pool(db_url, min_size=min_size, max_size=max_size, command_timeout=command_timeout, init=register_vector) # pgvector 등록
+    async with pool.acquire() as conn: # 첫 연결 테스트
         await register_vector(conn)
-    # logger.info(f"✅ DB 연결 풀 초기화 완료 (min={min_size}, max={max_size})")
-    return _pool
+    _pools[name] = pool
+    _limiters[name] = _Limiter(limit or max_size)
+    _pool_stats[name] = _new_stats()
+    DB_POOL_LIMIT.labels(name).set(_limiters[name].limit)
+    # logger.info(f"✅ DB 연결 풀 초기화 완료 ({name}, min={min_size}, max={max_size})")
+    return pool
+
+async def init_db_pools(database_url: str = None): # POOL_CONFIGS의 모든 풀 + 복제본 풀 초기화
+    global _adapt_task, _replica_task
+    for name, cfg in POOL_CONFIGS.items():
+        max_size = cfg.get("burst_size", cfg["max_size"]) if DB_POOL_ADAPTIVE else cfg["max_size"]
+        await init_db_pool(database_url, min_size=cfg["min_size"], max_size=max(max_size, cfg["max_size"]), name=name,
+                           command_timeout=cfg["command_timeout"], limit=cfg["max_size"])
+    icfg = POOL_CONFIGS[POOL_INTERACTIVE]
+    for i, url in enumerate(DB_REPLICA_URLS, start=1):
+        name = f"replica{i}"
+        try:
+            await init_db_pool(url, min_size=icfg["min_size"], max_size=icfg["max_size"], name=name, command_timeout=icfg["command_timeout"])
+        except Exception as e: # 복제본이 죽어 있어도 기동은 계속 (primary로 읽음)
+            logger.warning(f"[db] 복제본 {name} 연결 실패 - primary로 대체: {e}")
+            continue
+        _replicas.append(name)
+        _replica_health[name] = {"healthy": True, "lag_s": 0.0, "error": ""}
+    if DB_POOL_ADAPTIVE:
+        _adapt_task = asyncio.create_task(_adapt_loop())
+    if _replicas:
+        await _check_replicas()
+        _replica_task = asyncio.create_task(_replica_loop())
+    return _pools
+
+async def _check_replicas(): # 복제본별 지연 측정 후 사용 가능 여부 갱신
+    for name in _replicas:
+        health = _replica_health[name]
+        try:
+            async with _pools[name].acquire() as conn:
+                lag = await conn.fetchval(_LAG_SQL, timeout=2)
+            health.update(healthy=lag <= DB_REPLICA_MAX_LAG_S, lag_s=lag, error="" if lag <= DB_REPLICA_MAX_LAG_S else "lag")
+            DB_REPLICA_LAG.labels(name).set(lag)
+        except Exception as e:
+            health.update(healthy=False, error=str(e))
+
+async def _replica_loop():
+    while True:
+        await asyncio.sleep(DB_REPLICA_CHECK_INTERVAL)
+        try:
+            await _check_replicas()
+        except Exception as e:
+            logger.warning(f"[db] 복제본 상태 점검 실패: {e}")
+
+def _pick_replica(): # 사용 가능한 복제본 중 round robin, 없으면 None
+    healthy = [n for n in _replicas if _replica_health[n]["healthy"]]
+    if not healthy:
+        return None
+    return healthy[next(_replica_rr) % len(healthy)]
 
-async def close_db_pool(): # DB 연결 풀 종료
-    global _pool
-    if _pool:
-        await _pool.close()
-        # logger.info("✅ DB 연결 풀 종료")
-        _pool = None
+async def _adapt_loop(): # interactive 대기시간을 보고 interactive/batch 한도를 1씩 조정
+    icfg = POOL_CONFIGS[POOL_INTERACTIVE]
+    bcfg = POOL_CONFIGS[POOL_BATCH]
+    while True:
+        await asyncio.sleep(DB_POOL_ADAPT_INTERVAL)
+        try:
+            st = _pool_stats[POOL_INTERACTIVE]
+            avg_ms = st["window_wait"] / st["window_acquired"] * 1000 if st["window_acquired"] else 0.0
+            st["window_wait"], st["window_acquired"] = 0.0, 0
+            ilim = _limiters[POOL_INTERACTIVE]
+            blim = _limiters.get(POOL_BATCH)
+            if avg_ms > DB_POOL_ADAPT_WAIT_MS:
+                if ilim.limit < icfg.get("burst_size", icfg["max_size"]):
+                    await ilim.set_limit(ilim.limit + 1)
+                if blim and blim.limit > 1:
+                    await blim.set_limit(blim.limit - 1)
+            elif avg_ms < DB_POOL_ADAPT_WAIT_MS / 4:
+                if ilim.limit > icfg["max_size"]:
+                    await ilim.set_limit(ilim.limit - 1)
+                if blim and blim.limit < bcfg["max_size"]:
+                    await blim.set_limit(blim.limit + 1)
+            for name, lim in _limiters.items():
+                DB_POOL_LIMIT.labels(name).set(lim.limit)
+        except Exception as e:
+            logger.warning(f"[db] 풀 크기 조정 실패: {e}")
 
-def get_pool(): # 현재 DB 풀 반환
-    if _pool is None:
-        raise RuntimeError("❌ DB 풀이 초기화되지 않았습니다. init_db_pool()을 먼저 호출하세요")
-    return _pool
+async def close_db_pool(): # 모든 DB 연결 풀 종료
+    global _adapt_task, _replica_task
+    for task in (_adapt_task, _replica_task):
+        if task:
+            task.cancel()
+    _adapt_task = _replica_task = None
+    for name in list(_pools):
+        await _pools.pop(name).close()
+        # logger.info(f"✅ DB 연결 풀 종료 ({name})")
+    _limiters.clear()
+    _replicas.clear()
+    _replica_health.clear()
+
+def get_pool(name: str = POOL_INTERACTIVE): # 이름에 해당하는 DB 풀 반환 (batch 풀이 없으면 interactive 사용)
+    pool = _pools.get(name) or (_pools.get(POOL_INTERACTIVE) if name == POOL_BATCH else None)
+    if pool is None:
+        raise RuntimeError(f"❌ DB 풀({name})이 초기화되지 않았습니다. init_db_pool()을 먼저 호출하세요")
+    return pool
+
+def get_pool_stats(name: str = None) -> dict: # 풀 크기/사용중/대기시간 통계 반환 (name 없으면 전체 풀)
+    if name is None:
+        return {n: get_pool_stats(n) for n in _pools}
+    stats = {k: v for k, v in _pool_stats.get(name, _new_stats()).items() if not k.startswith("window_")}
+    stats["wait_avg"] = stats["wait_total"] / stats["acquired"] if stats["acquired"] else 0.0
+    pool = _pools.get(name)
+    if pool is not None:
+        stats["size"] = pool.get_size()
+        stats["idle"] = pool.get_idle_size()
+        stats["in_use"] = stats["size"] - stats["idle"]
+        stats["max_size"] = pool.get_max_size()
+        stats["limit"] = _limiters[name].limit
+    if name in _replica_health:
+        stats.update(_replica_health[name])
+    return stats
 
 @asynccontextmanager
-async def get_db_connection(): # DB 연결 가져오기 (컨텍스트 매니저)
-    pool = get_pool()
-    async with pool.acquire() as conn:
+async def get_db_connection(pool: str = POOL_INTERACTIVE, readonly: bool = False): # DB 연결 가져오기 (컨텍스트 매니저)
+    # readonly=True : 검색 등 읽기 전용이면 복제본 사용 (커넥션 획득 실패시 해당 복제본 제외 후 primary로 재시도)
+    primary = pool if pool in _pools else POOL_INTERACTIVE
+    replica = _pick_replica() if readonly and _replicas else None
+    async with AsyncExitStack() as stack:
+        with span("db.acquire", **{"db.pool": primary, "db.readonly": readonly}) as sp: # 획득(대기)까지만, 사용 시간은 제외
+            if replica:
+                try:
+                    conn = await stack.enter_async_context(_acquire(replica))
+                    DB_READ_ROUTE.labels("replica").inc()
+                    sp.set_attribute("db.route", replica)
+                except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                    logger.warning(f"[db] 복제본 {replica} 획득 실패 - primary로 대체: {e}")
+                    _replica_health[replica].update(healthy=False, error=str(e))
+                    conn = await stack.enter_async_context(_acquire(primary))
+                    DB_READ_ROUTE.labels("primary_fallback").inc()
+                    sp.set_attribute("db.route", "primary_fallback")
+            else:
+                conn = await stack.enter_async_context(_acquire(primary))
+                if readonly:
+                    DB_READ_ROUTE.labels("primary").inc()
         yield conn
+
+@asynccontextmanager
+async def _acquire(name: str): # 풀 한도 + 대기시간 기록
+    db_pool = get_pool(name)
+    limiter = _limiters[name]
+    stats = _pool_stats[name]
+    exhausted = limiter.in_use >= limiter.limit or (db_pool.get_idle_size() == 0 and db_pool.get_size() >= db_pool.get_max_size())
+    t0 = time.perf_counter()
+    await limiter.acquire()
+    try:
+        async with db_pool.acquire() as conn:
+            waited = time.perf_counter() - t0 # 풀이 고갈되면 이 값이 커짐
+            stats["acquired"] += 1
+            stats["wait_total"] += waited
+            stats["wait_max"] = max(stats["wait_max"], waited)
+            stats["window_acquired"] += 1
+            stats["window_wait"] += waited
+            observe_pool(name, db_pool, waited, exhausted)
+            yield conn
+    finally:
+        await limiter.release()
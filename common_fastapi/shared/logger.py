@@ -1,10 +1,11 @@
-import sys, os, logging
+import sys, os, json, random, atexit, logging, queue
+from contextvars import ContextVar
 from dotenv import load_dotenv # type: ignore
-from datetime import date
-from logging.handlers import TimedRotatingFileHandler
+from datetime import date, datetime
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
 
 # 1안)
-# logging.basicConfig(level=logging.INFO, format='%(asctime)s :: %(levelname)s :: %(message)s') 
+# logging.basicConfig(level=logging.INFO, format='%(asctime)s :: %(levelname)s :: %(message)s')
 # logger = logging.getLogger(__name__) # __name__ : 현재 모듈의 이름(파일 경로)을 나타내는 내장 변수
 
 # 2안)
@@ -16,6 +17,84 @@ from logging.handlers import TimedRotatingFileHandler
 #     logger.addHandler(stream_handler)
 #     logger.setLevel(logging.INFO)
 
+# 3안) 현재 : 요청 코루틴에서는 큐에 넣기만 하고(QueueHandler) 파일/콘솔 쓰기는 백그라운드 스레드(QueueListener)가 담당
+# => 디스크/stdout I/O가 이벤트 루프를 막지 않음. 레코드는 JSON 한 줄 (request_id 포함)
+#    LOG_FORMAT=text 이면 기존 '시각 :: 레벨 :: 메시지' 형식
+#    LOG_SAMPLING=classify_input=0.1,hybrid_search=0.5 => 해당 하위 로거의 INFO 이하 레코드를 비율만큼만 남김 (WARNING 이상은 항상)
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-") # main.py 미들웨어에서 요청마다 설정
+
+class RequestIdFilter(logging.Filter): # 로그를 남기는 쪽(요청 코루틴/스레드)에서 request_id를 레코드에 붙임
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter): # hot path 로그 샘플링
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+class _QueueHandler(QueueHandler):
+    # 기본 prepare()는 메시지와 traceback을 한 문자열로 합쳐버려서, 구조(exc)를 유지하도록 메시지/traceback만 미리 확정
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def build_formatter(fmt: str = None) -> logging.Formatter:
+    if (fmt or os.getenv("LOG_FORMAT", "json")) == "text":
+        return logging.Formatter('%(asctime)s :: %(levelname)s :: [%(request_id)s] %(message)s')
+    return JsonFormatter()
+
+def build_handlers(log_path: str = None, formatter: logging.Formatter = None) -> list: # 실제로 쓰는 핸들러 (벤치마크에서도 재사용)
+    formatter = formatter or build_formatter()
+    handlers = []
+    if log_path:
+        file_handler = TimedRotatingFileHandler(filename=os.path.join(log_path, f"{date.today()}.log"), when="midnight", interval=1, encoding="utf-8")
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    handlers.append(console_handler)
+    return handlers
+
+def start_queue_logging(target: logging.Logger, handlers: list) -> QueueListener:
+    q = queue.SimpleQueue()
+    queue_handler = _QueueHandler(q)
+    queue_handler.addFilter(RequestIdFilter())
+    target.addHandler(queue_handler)
+    listener = QueueListener(q, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+def get_logger(name: str) -> logging.Logger: # 하위 로거 (예: get_logger("classify_input")) : 상위 logger의 핸들러로 전달됨, 샘플링 단위
+    return logging.getLogger(f"{__name__}.{name}")
+
 logger = logging.getLogger(__name__)
 if not logger.hasHandlers(): # Reset handlers to avoid duplicate logs
 
@@ -23,20 +102,17 @@ if not logger.hasHandlers(): # Reset handlers to avoid duplicate logs
     LOG_PATH = os.getenv("LOG_PATH")
     if LOG_PATH:
         os.makedirs(LOG_PATH, exist_ok=True) # if not os.path.exists(LOG_PATH):
-    
-    logger.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(asctime)s :: %(levelname)s :: %(message)s')
 
-    if LOG_PATH:
-        file_handler = TimedRotatingFileHandler(filename=os.path.join(LOG_PATH, f"{date.today()}.log"), when="midnight", interval=1, encoding="utf-8")
-        file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    _listener = start_queue_logging(logger, build_handlers(LOG_PATH))
+    atexit.register(_listener.stop) # 종료시 큐에 남은 로그 flush
 
-    logger.addHandler(console_handler)
+    for _item in os.getenv("LOG_SAMPLING", "").split(","):
+        if "=" in _item:
+            _name, _rate = _item.split("=", 1)
+            try:
+                get_logger(_name.strip()).addFilter(SamplingFilter(float(_rate)))
+            except ValueError:
+                print(f"⚠️ LOG_SAMPLING 값이 잘못됨: {_item}", file=sys.stderr)
 
     # logger.info("Logging started.")
@@ -0,0 +1,96 @@
+# Prometheus 메트릭 중앙 관리 : 노드/경로 지연, DB 풀, LLM, 임베딩
+# main.py에서 /metrics로 노출. uvicorn --workers N 인 경우 PROMETHEUS_MULTIPROC_DIR 설정 필요 (prometheus_client multiprocess 모드)
+import time, inspect
+from functools import wraps
+from prometheus_client import Counter, Gauge, Histogram
+from common_fastapi.shared.tracing import span
+
+# 초 단위 버킷 (LLM 호출은 수 초까지 걸리므로 넉넉하게)
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+NODE_LATENCY = Histogram("gigchat_node_latency_seconds", "LangGraph 노드별 실행 시간", ["node"], buckets=_LATENCY_BUCKETS)
+NODE_ERRORS = Counter("gigchat_node_errors_total", "LangGraph 노드 예외 수", ["node"])
+ROUTE_LATENCY = Histogram("gigchat_route_latency_seconds", "그래프 경로별 /chat 전체 처리 시간", ["route"], buckets=_LATENCY_BUCKETS)
+
+DB_POOL_SIZE = Gauge("gigchat_db_pool_size", "DB 풀 현재 커넥션 수", ["pool"])
+DB_POOL_IN_USE = Gauge("gigchat_db_pool_in_use", "DB 풀 사용중 커넥션 수", ["pool"])
+DB_POOL_MAX = Gauge("gigchat_db_pool_max_size", "DB 풀 최대 커넥션 수", ["pool"])
+DB_POOL_LIMIT = Gauge("gigchat_db_pool_limit", "DB 풀 동시 사용 한도 (적응형 조정 결과)", ["pool"])
+DB_POOL_WAIT = Histogram("gigchat_db_pool_wait_seconds", "DB 커넥션 획득 대기시간", ["pool"], buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5))
+DB_REPLICA_LAG = Gauge("gigchat_db_replica_lag_seconds", "복제본 복제 지연", ["replica"])
+DB_READ_ROUTE = Counter("gigchat_db_read_route_total", "읽기 전용 커넥션이 실제로 간 곳", ["target"]) # target: replica | primary | primary_fallback
+DB_POOL_EXHAUSTED = Counter("gigchat_db_pool_exhausted_total", "획득 시점에 풀 한도까지 사용중이었던 횟수", ["pool"])
+
+LLM_LATENCY = Histogram("gigchat_llm_latency_seconds", "LLM 호출 시간", ["model"], buckets=_LATENCY_BUCKETS)
+LLM_ERRORS = Counter("gigchat_llm_errors_total", "LLM 호출 실패 수", ["model"])
+LLM_TOKENS = Counter("gigchat_llm_tokens_total", "LLM 사용 토큰 수", ["model", "kind"]) # kind: prompt | completion
+
+EMBED_LATENCY = Histogram("gigchat_embed_latency_seconds", "임베딩 생성 시간", ["model"], buckets=_LATENCY_BUCKETS)
+EMBED_BATCH_SIZE = Histogram("gigchat_embed_batch_size", "임베딩 호출당 텍스트 수", ["model"], buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+EMBED_CACHE = Counter("gigchat_embed_cache_total", "쿼리 임베딩 캐시 조회 수 (hit ratio = hit / (hit+miss))", ["model", "result"]) # result: hit | miss
+
+SINGLEFLIGHT_CALLS = Counter("gigchat_singleflight_calls_total", "single-flight 호출 수 (coalesced = 진행중 작업에 합류)", ["name", "result"]) # result: leader | coalesced
+SINGLEFLIGHT_INFLIGHT = Gauge("gigchat_singleflight_inflight", "single-flight 진행중 키 수", ["name"])
+
+ADMISSION_INFLIGHT = Gauge("gigchat_admission_inflight", "경로별 처리중 요청 수", ["route"])
+ADMISSION_QUEUE_DEPTH = Gauge("gigchat_admission_queue_depth", "경로별 대기열 길이", ["route"])
+ADMISSION_SHED = Counter("gigchat_admission_shed_total", "거절된 요청 수", ["route", "reason"]) # reason: queue_full | deadline | rate_limited
+
+EXTRACT_PROMPTS = Counter("gigchat_extract_prompts_total", "조건 추출 프롬프트 종류별 호출 수", ["kind"]) # kind: full | delta
+CATEGORY_MAP = Counter("gigchat_category_map_total", "업종 표현 => 카테고리 이름 매핑 결과", ["result"]) # result: exact | nearest | unmapped
+JOB_GATE = Counter("gigchat_job_gate_total", "LLM 전 일자리 무관 사전 판정 결과", ["decision"]) # decision: off_topic(LLM 생략) | llm
+SESSION_ACTIVE = Gauge("gigchat_sessions_active", "서버에 보관중인 대화 세션 수")
+SESSION_LOOKUPS = Counter("gigchat_session_lookups_total", "세션 조회 수", ["result"]) # result: hit | miss
+
+BUDGET_FALLBACKS = Counter("gigchat_budget_fallbacks_total", "지연 예산 때문에 폴백한 횟수", ["fallback"]) # hybrid_to_sql | embedding_openai_to_jhgan | ...
+BUDGET_EXCEEDED = Counter("gigchat_budget_exceeded_total", "지연 예산 초과로 취소된 호출 수", ["stage"])
+
+EMBED_WORKER_PENDING = Gauge("gigchat_embed_worker_pending", "임베딩 대기중인 jobs1 행 수")
+EMBED_WORKER_LAG = Gauge("gigchat_embed_worker_lag_seconds", "가장 오래 기다린 행의 대기 시간 (변경 ~ 현재)")
+EMBED_WORKER_QUARANTINED = Gauge("gigchat_embed_worker_quarantined", "재시도 한도(EMBED_WORKER_MAX_ATTEMPTS)를 넘겨 건너뛰는 jobs1 행 수")
+EMBED_WORKER_ROWS = Counter("gigchat_embed_worker_rows_total", "임베딩 워커가 처리한 행 수", ["result"]) # result: embedded | empty | failed
+EMBED_WORKER_BATCH_SECONDS = Histogram("gigchat_embed_worker_batch_seconds", "배치 하나(조회+임베딩+저장) 처리 시간")
+EMBED_WORKER_RETRIES = Counter("gigchat_embed_worker_retries_total", "임베딩 워커 실패 후 재시도 수")
+
+
+def observe_pool(name: str, pool, waited: float, exhausted: bool): # get_db_connection에서 커넥션 획득 직후 호출
+    DB_POOL_WAIT.labels(name).observe(waited)
+    if exhausted:
+        DB_POOL_EXHAUSTED.labels(name).inc()
+    size = pool.get_size()
+    DB_POOL_SIZE.labels(name).set(size)
+    DB_POOL_IN_USE.labels(name).set(size - pool.get_idle_size())
+    DB_POOL_MAX.labels(name).set(pool.get_max_size())
+
+
+def timed_node(name: str, fn):
+    """
+    노드 함수를 감싸서 실행 시간/예외를 기록 + 노드 span (노드 코드는 수정하지 않음)
+    LangGraph는 sync 노드를 스레드에서 돌리므로 sync/async 여부를 그대로 유지해야 함
+    """
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def async_wrapper(state):
+            t0 = time.perf_counter()
+            try:
+                with span(f"node.{name}"):
+                    return await fn(state)
+            except Exception:
+                NODE_ERRORS.labels(name).inc()
+                raise
+            finally:
+                NODE_LATENCY.labels(name).observe(time.perf_counter() - t0)
+        return async_wrapper
+
+    @wraps(fn)
+    def wrapper(state):
+        t0 = time.perf_counter()
+        try:
+            with span(f"node.{name}"):
+                return fn(state)
+        except Exception:
+            NODE_ERRORS.labels(name).inc()
+            raise
+        finally:
+            NODE_LATENCY.labels(name).observe(time.perf_counter() - t0)
+    return wrapper
@@ -0,0 +1,126 @@
+"""
+샘플링 프로파일러 (표준 라이브러리만 사용, 필요할 때만 켬)
+- 별도 스레드가 PROFILE_INTERVAL_MS 마다 sys._current_frames()로 모든 스레드의 스택을 떠서 횟수를 셈
+  (이벤트 루프 + asyncio.to_thread 워커 스레드 => LangGraph 동기 노드, ChatState 검증, encode 등이 모두 보임)
+- 결과는 collapsed stack 형식 ("스레드;모듈:함수;... 횟수" 한 줄씩) => flamegraph.pl, speedscope, inferno에 그대로 넣으면 됨
+- 대기 중인 스레드(select/Condition.wait/큐 대기 등)는 기본 제외 (PROFILE_INCLUDE_IDLE=1 이면 포함)
+- 한 번에 하나만 실행 (샘플링 자체가 GIL을 쓰므로 겹치면 결과가 왜곡됨)
+
+사용 예)
+    요청 단위 : /chat 요청에 헤더 X-Profile: 1 + server_key (server.acl) => PROFILE_DIR에 저장, 응답 헤더 X-Profile에 파일명
+    프로세스 전체 : POST /admin/profile?seconds=10 (server_key 필요) => collapsed stack 텍스트
+"""
+import os, re, sys, time, uuid, threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+from common_fastapi.shared.config import get_env, get_env_int, get_env_float
+from common_fastapi.shared.logger import logger
+
+PROFILE_INTERVAL_MS = get_env_float("PROFILE_INTERVAL_MS", 5) # 샘플 간격 (작을수록 정밀하지만 오버헤드 증가)
+PROFILE_MAX_S = get_env_float("PROFILE_MAX_S", 60) # 프로세스 전체 샘플링 최대 시간
+PROFILE_DIR = get_env("PROFILE_DIR", "profiles") # 요청 단위 프로파일 저장 위치
+PROFILE_KEEP = get_env_int("PROFILE_KEEP", 100) # 보관 개수 (오래된 것부터 삭제)
+PROFILE_INCLUDE_IDLE = get_env("PROFILE_INCLUDE_IDLE", "0") == "1"
+
+# 스택 맨 위가 이 함수들이면 대기 중인 스레드로 보고 제외
+IDLE_FRAMES = {
+    ("selectors", "select"), ("threading", "wait"), ("threading", "_wait_for_tstate_lock"),
+    ("queue", "get"), ("concurrent.futures.thread", "_worker"), ("logging.handlers", "dequeue"),
+}
+
+_lock = threading.Lock() # 동시에 하나만
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _label(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+class Sampler:
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, include_idle: bool = PROFILE_INCLUDE_IDLE):
+        self.interval = interval_ms / 1000
+        self.include_idle = include_idle
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "Sampler":
+        if not _lock.acquire(blocking=False):
+            raise ProfilerBusy("이미 프로파일링 중입니다.")
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "Sampler":
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+            self.elapsed = time.perf_counter() - self.started
+            _lock.release()
+        return self
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if not self.include_idle and (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)).replace(" ", "_"))
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common())
+
+
+def sample_process(seconds: float) -> Sampler: # 프로세스 전체를 seconds 동안 샘플링 (스레드에서 실행할 것)
+    sampler = Sampler().start()
+    try:
+        time.sleep(min(max(seconds, 0.1), PROFILE_MAX_S))
+    finally:
+        sampler.stop()
+    return sampler
+
+
+def save_profile(sampler: Sampler, name: str) -> str: # PROFILE_DIR/<시각>_<name>.collapsed 로 저장 후 파일명 반환
+    name = re.sub(r"[^A-Za-z0-9_-]", "", name or "")[:64] or uuid.uuid4().hex # name은 클라이언트 값(X-Request-ID)일 수 있음 => 경로 조작 방지
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{name}.collapsed"
+    Path(PROFILE_DIR, filename).write_text(sampler.collapsed(), encoding="utf-8")
+    for old in list_profiles()[PROFILE_KEEP:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, old))
+        except OSError:
+            pass
+    logger.info(f"[profiler] {filename} 저장 : {sampler.samples}회 샘플, {sampler.elapsed:.3f}초")
+    return filename
+
+
+def list_profiles() -> List[str]: # 최신순
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    return sorted((f for f in os.listdir(PROFILE_DIR) if f.endswith(".collapsed")), reverse=True)
+
+
+def read_profile(filename: str) -> Optional[str]:
+    if os.path.basename(filename) != filename or filename not in list_profiles(): # 경로 조작 방지
+        return None
+    return Path(PROFILE_DIR, filename).read_text(encoding="utf-8")
@@ -0,0 +1,25 @@
+# 기동 상태(readiness) 관리 : 서브시스템별 준비 여부를 기록하고 /health/ready 에서 보고
+# DB 풀/카테고리는 lifespan에서 동기적으로, LLM 클라이언트/임베딩 모델은 서버가 뜬 뒤 백그라운드 warmup에서 채움
+import time
+from typing import Any, Dict, Iterable
+
+_started_at = time.time()
+_status: Dict[str, Dict[str, Any]] = {}
+
+def mark_pending(name: str):
+    _status[name] = {"ready": False, "error": "", "elapsed_s": None}
+
+def mark_ready(name: str, elapsed_s: float = None):
+    _status[name] = {"ready": True, "error": "", "elapsed_s": round(elapsed_s, 3) if elapsed_s is not None else None}
+
+def mark_failed(name: str, error: str, elapsed_s: float = None):
+    _status[name] = {"ready": False, "error": error, "elapsed_s": round(elapsed_s, 3) if elapsed_s is not None else None}
+
+def get_status() -> Dict[str, Dict[str, Any]]:
+    return {name: dict(st) for name, st in _status.items()}
+
+def is_ready(required: Iterable[str]) -> bool: # 필수 서브시스템이 모두 준비되었는지
+    return all(_status.get(name, {}).get("ready") for name in required)
+
+def uptime_s() -> float:
+    return round(time.time() - _started_at, 3)
@@ -0,0 +1,65 @@
+# 대화 세션 상태 : 세션별로 지금까지 모인 검색 조건을 서버에 TTL로 보관
+# 클라이언트는 후속 턴에서 condition 전체 대신 session_id + text만 보내면 됨
+# session_id는 서버가 발급한 추측 불가능한 값만 사용 (userid로 찾지 않음), 발급한 userid와 다르면 조회되지 않음
+# 프로세스 메모리 저장이므로 uvicorn 워커가 여러 개면 sticky session(같은 세션 => 같은 워커)이 필요
+import time, uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from common_fastapi.shared.config import get_env_int, get_env_float
+from common_fastapi.shared.metrics import SESSION_ACTIVE, SESSION_LOOKUPS
+
+SESSION_TTL_S = get_env_float("SESSION_TTL_S", 1800)
+SESSION_MAX = get_env_int("SESSION_MAX", 50000)
+
+class SessionStore:
+
+    def __init__(self, ttl_s: float = SESSION_TTL_S, max_entries: int = SESSION_MAX):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict() # session_id => (만료시각, userid, 조건) : 오래 안 쓴 순서
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def get(self, session_id: str, userid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """없거나 만료됐거나 다른 userid가 발급받은 세션이면 None"""
+        item = self._data.get(session_id)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[session_id]
+            SESSION_LOOKUPS.labels("miss").inc()
+            return None
+        if item[1] != userid:
+            SESSION_LOOKUPS.labels("miss").inc()
+            return None
+        self._data[session_id] = (time.monotonic() + self.ttl_s, item[1], item[2]) # 사용할 때마다 만료 연장 (sliding TTL)
+        self._data.move_to_end(session_id)
+        SESSION_LOOKUPS.labels("hit").inc()
+        return dict(item[2])
+
+    def put(self, session_id: str, userid: Optional[str], condition: Dict[str, Any]):
+        compact = {k: v for k, v in (condition or {}).items() if v not in (None, "", [])} # 값 있는 항목만 저장
+        self._data[session_id] = (time.monotonic() + self.ttl_s, userid, compact)
+        self._data.move_to_end(session_id)
+        self._evict()
+
+    def delete(self, session_id: str, userid: Optional[str]) -> bool:
+        item = self._data.get(session_id)
+        if item is None or item[1] != userid:
+            return False
+        del self._data[session_id]
+        SESSION_ACTIVE.set(len(self._data))
+        return True
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._data:
+            sid, (expires, _, _) = next(iter(self._data.items()))
+            if expires < now or len(self._data) > self.max_entries:
+                del self._data[sid]
+            else:
+                break
+        SESSION_ACTIVE.set(len(self._data))
+
+sessions = SessionStore()
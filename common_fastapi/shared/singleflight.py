@@ -0,0 +1,35 @@
+# Single-flight : 같은 키로 동시에 들어온 요청은 실제 작업을 한 번만 실행하고 결과를 함께 받음
+# (인기 검색어 급증, 클라이언트 재시도 등으로 동일 요청이 몰릴 때 LLM/임베딩/DB 호출을 줄임)
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+from common_fastapi.shared.metrics import SINGLEFLIGHT_CALLS, SINGLEFLIGHT_INFLIGHT
+
+class SingleFlight:
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], timeout: float = None) -> Any:
+        """
+        key로 진행중인 작업이 있으면 그 결과를 기다리고, 없으면 fn()을 새 태스크로 실행
+        - 작업은 별도 태스크라서 처음 요청한 클라이언트가 끊겨도(취소) 나머지 대기자는 결과를 받음
+        - timeout은 키 단위 : 작업 자체에 걸리므로 뒤에 합류한 요청도 처음 시작 시점 기준으로 같이 타임아웃
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(asyncio.wait_for(fn(), timeout) if timeout else fn())
+            self._inflight[key] = task
+            SINGLEFLIGHT_INFLIGHT.labels(self.name).inc()
+            task.add_done_callback(lambda _t, k=key: self._done(k))
+            SINGLEFLIGHT_CALLS.labels(self.name, "leader").inc()
+        else:
+            SINGLEFLIGHT_CALLS.labels(self.name, "coalesced").inc()
+        return await asyncio.shield(task) # 대기자 하나가 취소돼도 작업은 계속
+
+    def _done(self, key: str):
+        self._inflight.pop(key, None)
+        SINGLEFLIGHT_INFLIGHT.labels(self.name).dec()
+
+    def inflight(self) -> int:
+        return len(self._inflight)
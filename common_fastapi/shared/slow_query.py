@@ -0,0 +1,123 @@
+# 느린 검색 쿼리 기록 : 임계값(SLOW_SEARCH_MS) 이상 걸린 검색을 샘플링하여
+# 정규화된 쿼리 형태(shape), 바인딩 파라미터, EXPLAIN (ANALYZE, BUFFERS) 결과를 링버퍼에 보관
+# /admin/slow_searches 에서 shape별로 묶어 조회 => 어떤 조건 조합이 인덱스를 못 타는지 확인용
+import re, time, random, asyncio, hashlib
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List
+from common_fastapi.shared.logger import logger
+from common_fastapi.shared.config import get_env_int, get_env_float
+from common_fastapi.shared.tracing import span
+
+SLOW_SEARCH_MS = get_env_float("SLOW_SEARCH_MS", 500)
+SLOW_SEARCH_SAMPLE_RATE = get_env_float("SLOW_SEARCH_SAMPLE_RATE", 0.01) # 0~1, 임계값을 넘은 것 중 EXPLAIN 돌릴 비율 (DB가 느릴 때 부하를 두 배로 만들지 않도록 낮게)
+SLOW_SEARCH_EXPLAIN_COOLDOWN_S = get_env_float("SLOW_SEARCH_EXPLAIN_COOLDOWN_S", 600) # 같은 shape은 이 시간에 한 번만 EXPLAIN
+SLOW_SEARCH_BUFFER = get_env_int("SLOW_SEARCH_BUFFER", 200)
+
+_records: deque = deque(maxlen=SLOW_SEARCH_BUFFER)
+_tasks: set = set() # 백그라운드 EXPLAIN 태스크 참조 유지 (GC 방지)
+_explaining: set = set() # 같은 shape에 대해 EXPLAIN이 동시에 여러 개 돌지 않도록
+_explained_at: Dict[str, float] = {} # shape_id => 마지막 EXPLAIN 시작 시각 (monotonic)
+
+
+def canonical_shape(query: str) -> str:
+    """공백 정리 + 인라인 숫자 리터럴을 ?로 치환 (바인딩 파라미터 $n은 그대로 둠)"""
+    shape = re.sub(r"\s+", " ", query).strip()
+    shape = re.sub(r"(?<![\w$])\d+(\.\d+)?\b", "?", shape)
+    return shape
+
+
+def _shape_id(shape: str) -> str:
+    return hashlib.sha1(shape.encode("utf-8")).hexdigest()[:12]
+
+
+def _summarize_param(value: Any) -> Any: # 임베딩 벡터 같은 긴 값은 앞부분만 저장
+    if isinstance(value, (list, tuple)) and len(value) > 16:
+        return {"len": len(value), "head": list(value[:4])}
+    return value
+
+
+def _record(tag: str, params: List[Any], elapsed_ms: float, shape: str, sid: str, plan: str = None):
+    _records.append({
+        "shape_id": sid,
+        "shape": shape,
+        "tag": tag,
+        "elapsed_ms": round(elapsed_ms, 1),
+        "params": [_summarize_param(p) for p in params],
+        "plan": plan, # EXPLAIN을 돌리지 않은 기록은 None
+        "at": datetime.now().isoformat(timespec="seconds"),
+    })
+
+
+async def _explain(tag: str, query: str, params: List[Any], elapsed_ms: float, shape: str, sid: str):
+    from common_fastapi.shared.db import get_db_connection, POOL_BATCH # 순환 import 방지
+    try:
+        async with get_db_connection(pool=POOL_BATCH) as conn: # 진단용 재실행은 batch 풀에서
+            rows = await conn.fetch("EXPLAIN (ANALYZE, BUFFERS) " + query, *params)
+        plan = "\n".join(r[0] for r in rows)
+    except Exception as e:
+        logger.warning(f"[slow_query] EXPLAIN 실패 ({tag}): {e}")
+        plan = f"EXPLAIN 실패: {e}"
+    finally:
+        _explaining.discard(sid)
+    _record(tag, params, elapsed_ms, shape, sid, plan)
+
+
+def _should_explain(sid: str) -> bool: # 진행 중이 아니고, cooldown이 지났고, 샘플링에 걸린 경우만
+    now = time.monotonic()
+    last = _explained_at.get(sid)
+    if sid in _explaining or (last is not None and now - last < SLOW_SEARCH_EXPLAIN_COOLDOWN_S):
+        return False
+    if random.random() >= SLOW_SEARCH_SAMPLE_RATE:
+        return False
+    _explained_at[sid] = now
+    return True
+
+
+async def fetch_recorded(conn, tag: str, query: str, params: List[Any]):
+    """
+    conn.fetch 대신 사용. 임계값 이상 걸린 검색은 모두 기록하고, 그중 일부만 백그라운드에서 별도 커넥션으로 EXPLAIN ANALYZE 수행
+    (EXPLAIN ANALYZE는 쿼리를 한 번 더 실행하므로 요청 응답은 기다리게 하지 않고, 샘플링 + shape별 cooldown으로 횟수를 제한)
+    """
+    t0 = time.perf_counter()
+    with span("db.fetch", **{"db.tag": tag, "db.params": len(params)}) as sp:
+        rows = await conn.fetch(query, *params)
+        sp.set_attribute("db.rows", len(rows))
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    if elapsed_ms >= SLOW_SEARCH_MS:
+        shape = canonical_shape(query)
+        sid = _shape_id(shape)
+        logger.warning(f"[slow_query] {tag} {elapsed_ms:.0f}ms shape={sid}")
+        if _should_explain(sid):
+            _explaining.add(sid)
+            task = asyncio.create_task(_explain(tag, query, list(params), elapsed_ms, shape, sid))
+            _tasks.add(task)
+            task.add_done_callback(_tasks.discard)
+        else:
+            _record(tag, list(params), elapsed_ms, shape, sid)
+    return rows
+
+
+def get_slow_searches() -> List[Dict[str, Any]]:
+    """shape별 그룹: 건수, 최대/평균 시간, 최근 샘플(파라미터, 실행계획 - 실행계획이 있는 것 우선). 최대 시간 내림차순"""
+    groups: Dict[str, Dict[str, Any]] = {}
+    for rec in _records:
+        g = groups.setdefault(rec["shape_id"], {
+            "shape_id": rec["shape_id"], "shape": rec["shape"], "tag": rec["tag"],
+            "count": 0, "max_ms": 0.0, "total_ms": 0.0, "samples": [],
+        })
+        g["count"] += 1
+        g["max_ms"] = max(g["max_ms"], rec["elapsed_ms"])
+        g["total_ms"] += rec["elapsed_ms"]
+        g["samples"].append({k: rec[k] for k in ("elapsed_ms", "params", "plan", "at")})
+    result = []
+    for g in groups.values():
+        g["avg_ms"] = round(g.pop("total_ms") / g["count"], 1)
+        explained = [x for x in g["samples"] if x["plan"] is not None]
+        g["samples"] = (explained or g["samples"])[-3:] # 최근 3개만
+        result.append(g)
+    return sorted(result, key=lambda g: g["max_ms"], reverse=True)
+
+
+def clear_slow_searches():
+    _records.clear()
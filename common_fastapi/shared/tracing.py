@@ -0,0 +1,177 @@
+"""
+요청 단위 트레이싱 (OpenTelemetry 형식의 trace_id/span_id, W3C traceparent 전파, 외부 수집기 없이 로컬 exporter)
+- http 요청마다 루트 span (들어온 traceparent가 있으면 그 trace를 이어감 => Next.js에서 시작한 trace에 붙음)
+- 그 아래 span : 그래프 노드(timed_node), 풀 획득(get_db_connection), 쿼리(fetch_recorded, facets), OpenAI chat/embeddings, jhgan encode
+- 부모 span은 ContextVar로 전달 => asyncio 태스크 / asyncio.to_thread / LangGraph sync 노드 스레드까지 이어짐
+- TRACE_EXPORTER : none(기본, 거의 비용 없음) | console | file (TRACE_FILE, span 하나당 JSON 한 줄)
+- 로그와 같은 큐 방식(QueueListener)으로 내보내므로 요청 처리 중에 파일 I/O 없음
+
+사용 예)
+    with span("openai.chat", model=model) as sp:
+        ...
+        sp.set_attribute("llm.tokens.prompt", n)
+"""
+import os, json, time, random, logging, atexit
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional, Tuple
+from common_fastapi.shared.config import get_env, get_env_float
+from common_fastapi.shared.logger import start_queue_logging, request_id_var
+
+TRACE_EXPORTER = get_env("TRACE_EXPORTER", "none") # none | console | file
+TRACE_FILE = get_env("TRACE_FILE", "traces.jsonl")
+TRACE_SAMPLE_RATE = get_env_float("TRACE_SAMPLE_RATE", 1.0) # 새로 시작하는 trace의 샘플링 비율 (들어온 traceparent는 sampled 플래그를 따름)
+TRACING = TRACE_EXPORTER in ("console", "file")
+
+_current: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    value = 0
+    while value == 0: # all-zero id는 W3C에서 무효
+        value = random.getrandbits(nbytes * 8)
+    return f"{value:0{nbytes * 2}x}"
+
+
+def _attr(value: Any) -> Any: # span 속성은 스칼라 또는 스칼라 리스트만
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple, set)):
+        return [v if isinstance(v, (str, bool, int, float)) else str(v) for v in value]
+    return str(value)
+
+
+class Span:
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = {k: _attr(v) for k, v in attributes.items()}
+        self.status = "OK"
+        self.status_message = None
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = _attr(value)
+
+    def set_attributes(self, **attributes):
+        for k, v in attributes.items():
+            self.set_attribute(k, v)
+
+    def record_exception(self, e: BaseException):
+        self.status = "ERROR"
+        self.status_message = f"{type(e).__name__}: {e}"
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def end(self):
+        if not self.sampled:
+            return
+        _exporter.info(json.dumps({
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "start_time": self.start_ns,
+            "duration_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+            "status": self.status,
+            "status_message": self.status_message,
+            "request_id": request_id_var.get(),
+            "attributes": self.attributes,
+        }, ensure_ascii=False))
+
+
+class _NoopSpan: # TRACING 꺼져 있을 때 (호출부 코드는 그대로)
+    sampled = False
+    def set_attribute(self, key, value): pass
+    def set_attributes(self, **attributes): pass
+    def record_exception(self, e): pass
+    def traceparent(self): return None
+
+NOOP_SPAN = _NoopSpan()
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """W3C traceparent "00-<trace_id 32hex>-<parent_id 16hex>-<flags>" => (trace_id, parent_id, sampled), 형식이 틀리면 None"""
+    if not header:
+        return None
+    parts = header.strip().lower().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff" or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16); int(parts[2], 16); flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+@contextmanager
+def _activate(s: Span):
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.record_exception(e)
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """현재 span의 자식 span (현재 span이 없으면 새 trace 시작)"""
+    if not TRACING:
+        yield NOOP_SPAN
+        return
+    parent = _current.get()
+    if parent is not None:
+        s = Span(name, parent.trace_id, parent.span_id, parent.sampled, attributes)
+    else:
+        s = Span(name, _new_id(16), None, random.random() < TRACE_SAMPLE_RATE, attributes)
+    with _activate(s):
+        yield s
+
+
+@contextmanager
+def request_span(name: str, traceparent: Optional[str] = None, **attributes):
+    """http 요청의 루트 span : 들어온 traceparent가 유효하면 그 trace의 자식으로"""
+    if not TRACING:
+        yield NOOP_SPAN
+        return
+    incoming = parse_traceparent(traceparent)
+    if incoming:
+        s = Span(name, incoming[0], incoming[1], incoming[2], attributes)
+    else:
+        s = Span(name, _new_id(16), None, random.random() < TRACE_SAMPLE_RATE, attributes)
+    with _activate(s):
+        yield s
+
+
+def current_span():
+    return _current.get() or NOOP_SPAN
+
+
+def set_attributes(**attributes): # 현재 span에 속성 추가 (예: 노드 안에서 조건 형태/결과 건수)
+    current_span().set_attributes(**attributes)
+
+
+_exporter = logging.getLogger("gigchat.trace")
+_exporter.propagate = False # 일반 로그(JSON 포맷)와 섞이지 않게
+if TRACING and not _exporter.hasHandlers():
+    _exporter.setLevel(logging.INFO)
+    if TRACE_EXPORTER == "file":
+        os.makedirs(os.path.dirname(os.path.abspath(TRACE_FILE)), exist_ok=True)
+        _handler = logging.FileHandler(TRACE_FILE, encoding="utf-8")
+    else:
+        _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _trace_listener = start_queue_logging(_exporter, [_handler])
+    atexit.register(_trace_listener.stop)
@@ -1,12 +1,20 @@
+import asyncio, inspect
 from langgraph.graph import StateGraph, END
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 
 from graph.nodes.check_search import check_search
 from graph.nodes.classify_input import classify_input
 from graph.nodes.decide_search_type import decide_search_type
 from graph.nodes.sql_search import sql_search
 from graph.nodes.hybrid_search import hybrid_search
+from graph.nodes.search_conditions import canonical_condition
+from common_fastapi.shared.metrics import timed_node
+from common_fastapi.shared.config import get_env
+
+# 실행 방식 : fast(기본) = 아래 분기를 그대로 옮긴 직접 호출(run_fast), graph = LangGraph workflow.ainvoke
+# 경로/노드/결과(dict)는 같고, fast는 노드마다의 ChatState 재검증/채널 처리 비용이 없음 (tools/bench_graph.py)
+CHAT_EXECUTOR = get_env("CHAT_EXECUTOR", "fast")
 
 DEFAULT_CONDITION = {
     "gender": None,
@@ -27,17 +35,47 @@ class ChatState(BaseModel):
     search: bool = False
     embeddingModel: Optional[str] = "jhgan"  # "jhgan" (768) or "openai" (1536)
     similarityThreshold: Optional[float] = 0.4  # 벡터 유사도 임계값
+    facets: bool = False # 검색시 facet 건수도 계산 (graph/nodes/facets.py)
     job_related: Optional[bool] = None
     result: Optional[List[Dict[str, Any]]] = []
     reply: Optional[str] = None
+    facet_counts: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    query_embedding: Optional[List[float]] = None # /chat/batch 에서 미리 한꺼번에 만든 requirements 임베딩 (embeddingModel 기준)
+    relaxation: Optional[Dict[str, Any]] = None # 조건 완화 단계로 찾았으면 {"tier", "relaxed", "description"} (graph/nodes/relax.py)
+    deadline: Optional[float] = None # 지연 예산 마감시각 (time.monotonic() 기준, common_fastapi/shared/budget.py)
+    fallbacks: List[str] = [] # 예산 때문에 택한 폴백 (예: hybrid_to_sql, embedding_openai_to_jhgan)
+
+def route_after_check(state) -> str: # check_search 다음 노드
+    return "decide_search_type" if state.search else "classify_input"
 
-graph = StateGraph(ChatState)
+def route_search_type(state) -> str: # decide_search_type 다음 노드
+    return "hybrid_search" if state.condition.get("requirements") else "sql_search"
 
-graph.add_node("check_search", check_search)
-graph.add_node("classify_input", classify_input)
-graph.add_node("decide_search_type", decide_search_type)
-graph.add_node("sql_search", sql_search)
-graph.add_node("hybrid_search", hybrid_search)
+def resolve_route(state) -> str: # 아래 분기 트리에서 최종적으로 도달하는 노드 이름 (메트릭 라벨용)
+    if route_after_check(state) == "classify_input":
+        return "classify_input"
+    return route_search_type(state)
+
+def request_key(state) -> str: # 결과가 같을 요청끼리 같은 키 (userid는 결과에 영향 없으므로 제외)
+    parts = [
+        "search" if state.search else "extract",
+        canonical_condition(state.condition),
+        state.embeddingModel or "",
+        str(state.similarityThreshold),
+        "facets" if state.facets else "",
+    ]
+    if not state.search: # 조건 추출은 입력 문장에 따라 달라짐. 검색은 text를 쓰지 않음
+        parts.append(state.text.strip())
+    return "\x1f".join(parts)
+
+# 노드별 실행 시간은 timed_node 래퍼로 수집 (노드 코드는 건드리지 않음)
+NODES: Dict[str, Callable] = {
+    "check_search": timed_node("check_search", check_search),
+    "classify_input": timed_node("classify_input", classify_input),
+    "decide_search_type": timed_node("decide_search_type", decide_search_type),
+    "sql_search": timed_node("sql_search", sql_search),
+    "hybrid_search": timed_node("hybrid_search", hybrid_search),
+}
 
 # 분기 트리 : 사용자의 선택에 따라 아래와 같이 분기처리됨
 # 1) check_search (false) > classify_input (일자리 관련이면 LLM으로 조건 추출) > END
@@ -45,20 +83,56 @@ graph.add_node("hybrid_search", hybrid_search)
 # 2) check_search (true) > decide_search_type (requirements 없으면) > sql_search > END
 #    check_search (true) > decide_search_type (requirements 있으면) > hybrid_search > END (일반sql검색+vector검색)
 
-graph.set_entry_point("check_search")
+def build_workflow(nodes: Dict[str, Callable] = NODES):
+    graph = StateGraph(ChatState)
+    for name, fn in nodes.items():
+        graph.add_node(name, fn)
+
+    graph.set_entry_point("check_search")
+
+    graph.add_conditional_edges("check_search", route_after_check,
+        {"decide_search_type": "decide_search_type", "classify_input": "classify_input"},
+    )
+
+    graph.add_conditional_edges("decide_search_type", route_search_type,
+        {"hybrid_search": "hybrid_search", "sql_search": "sql_search"},
+    )
+
+    graph.add_edge("classify_input", END) # classify_input에서 바로 END (조건 추출까지 완료)
+    graph.add_edge("hybrid_search", END)
+    graph.add_edge("sql_search", END)
+
+    return graph.compile()
+
+
+def build_dispatcher(nodes: Dict[str, Callable] = NODES):
+    """
+    위 분기 트리를 LangGraph 없이 직접 호출하는 async 함수로 (분기 함수/노드/결과 형태는 workflow와 같음)
+    - sync 노드는 LangGraph처럼 스레드에서 실행 (ContextVar 유지)
+    - 입력 state는 바꾸지 않음 (노드가 제자리 수정하는 condition/fallbacks만 복사), 결과는 ainvoke처럼 dict
+    """
+    async def call(name: str, state):
+        fn = nodes[name]
+        out = await fn(state) if inspect.iscoroutinefunction(fn) else await asyncio.to_thread(fn, state)
+        return state if out is None else out
+
+    async def run(state: ChatState) -> Dict[str, Any]:
+        state = state.model_copy(update={"condition": dict(state.condition), "fallbacks": list(state.fallbacks)})
+        state = await call("check_search", state)
+        if route_after_check(state) == "decide_search_type":
+            state = await call("decide_search_type", state)
+            state = await call(route_search_type(state), state)
+        else:
+            state = await call("classify_input", state)
+        return state.model_dump()
 
-graph.add_conditional_edges("check_search",
-    lambda s: "decide_search_type" if s.search else "classify_input",
-    {"decide_search_type": "decide_search_type", "classify_input": "classify_input"},
-)
+    return run
 
-graph.add_conditional_edges("decide_search_type",
-    lambda s: "hybrid_search" if s.condition.get("requirements") else "sql_search",
-    {"hybrid_search": "hybrid_search", "sql_search": "sql_search"},
-)
 
-graph.add_edge("classify_input", END) # classify_input에서 바로 END (조건 추출까지 완료)
-graph.add_edge("hybrid_search", END)
-graph.add_edge("sql_search", END)
+workflow = build_workflow()
+run_fast = build_dispatcher()
 
-workflow = graph.compile()
+async def run_chat(state: ChatState) -> Dict[str, Any]: # /chat, /chat/batch 에서 사용 (CHAT_EXECUTOR)
+    if CHAT_EXECUTOR == "graph":
+        return dict(await workflow.ainvoke(state))
+    return await run_fast(state)
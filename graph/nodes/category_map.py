@@ -0,0 +1,101 @@
+"""
+업종 표현 => 카테고리 이름 매핑 (classify_input 프롬프트에 카테고리 목록을 넣지 않음)
+- public.category (kind='01', depth=1)의 이름 + 동의어(synonyms, migrations/004)를 jhgan으로 임베딩해서 행렬 하나로 보관
+- LLM이 뽑은 업종 표현(예: "수영장", "프로그래밍")을 임베딩 후 행렬 곱 한 번으로 가장 가까운 항목 => 그 항목의 카테고리 이름
+  => 항상 테이블에 있는 이름만 나옴 (category = $n 이 아무것도 못 찾는 일이 없음)
+- 가장 가까운 항목의 코사인 유사도가 CATEGORY_MAP_MIN_SIMILARITY 미만이면 None ("아무거나", 잘못된 LLM 출력 등을 아무 카테고리로 묶어
+  엉뚱한 category 조건으로 결과를 0건으로 만들지 않도록 => 카테고리 조건 없이 검색)
+- 이름과 정확히 같으면 임베딩 없이 그대로
+- 목록 로딩은 기동시(main.lifespan), 임베딩 행렬은 warmup(category_map)에서. 준비 전에는 이름이 정확히 같을 때만 매핑
+- 메트릭 : gigchat_category_map_total{result="exact"|"nearest"|"unmapped"}
+"""
+import threading
+from typing import List, Optional, Tuple
+import asyncpg
+import numpy as np
+from common_fastapi.shared.config import get_env_float
+from common_fastapi.shared.logger import logger
+from common_fastapi.shared.metrics import CATEGORY_MAP
+
+CATEGORY_MAP_MIN_SIMILARITY = get_env_float("CATEGORY_MAP_MIN_SIMILARITY", 0.5)
+
+_QUERY = "SELECT nm, {synonyms} AS synonyms FROM public.category WHERE kind = '01' AND depth = 1 ORDER BY seq"
+
+_entries: List[Tuple[str, List[str]]] = [] # [(카테고리 이름, [동의어...])]
+_matrix: Optional[np.ndarray] = None # 항목별 단위 벡터 (N x 768)
+_owners: List[str] = [] # 행렬 행 => 카테고리 이름
+_lock = threading.Lock()
+
+
+def _key(text: str) -> str:
+    return "".join((text or "").split())
+
+
+async def load_categories(conn) -> List[str]:
+    """카테고리 이름 + 동의어 로딩 (synonyms 컬럼이 없으면 이름만). 이름 목록 반환"""
+    try:
+        rows = await conn.fetch(_QUERY.format(synonyms="COALESCE(synonyms, '{}')"))
+    except asyncpg.UndefinedColumnError:
+        logger.warning("[category_map] public.category.synonyms 없음 - 이름만 사용 (migrations/004_category_synonyms.sql)")
+        rows = await conn.fetch(_QUERY.format(synonyms="'{}'::text[]"))
+    set_entries([(row["nm"], [s for s in row["synonyms"] if s and s.strip()]) for row in rows])
+    return [name for name, _ in _entries]
+
+
+def set_entries(entries: List[Tuple[str, List[str]]]):
+    global _entries, _matrix, _owners
+    with _lock:
+        _entries = list(entries)
+        _matrix, _owners = None, [] # 목록이 바뀌면 다시 build
+
+
+def build_category_map(): # warmup에서 호출 (jhgan 로딩 후)
+    global _matrix, _owners
+    from common_fastapi.ai.embed_jhgan import get_embedder_768
+    with _lock:
+        if _matrix is not None or not _entries:
+            return
+        owners, texts = [], []
+        for name, synonyms in _entries:
+            for text in dict.fromkeys([name, *synonyms]):
+                owners.append(name)
+                texts.append(text)
+        embeddings = get_embedder_768().create_embeddings(texts)
+        if len(embeddings) != len(texts):
+            raise RuntimeError("카테고리 임베딩 생성 실패")
+        m = np.asarray(embeddings, dtype=np.float32)
+        _matrix = m / np.linalg.norm(m, axis=1, keepdims=True).clip(min=1e-12)
+        _owners = owners
+    logger.info(f"[category_map] 준비 완료 : 카테고리 {len(_entries)}개, 항목 {len(texts)}개")
+
+
+def map_category(phrase: Optional[str]) -> Optional[str]:
+    """업종 표현 => 카테고리 이름 (준비 전이고 이름과 정확히 같지 않으면 None)"""
+    if not phrase or not str(phrase).strip():
+        return None
+    phrase = str(phrase).strip()
+    for name, _ in _entries:
+        if _key(name) == _key(phrase):
+            CATEGORY_MAP.labels("exact").inc()
+            return name
+    matrix, owners = _matrix, _owners
+    if matrix is None:
+        CATEGORY_MAP.labels("unmapped").inc()
+        logger.warning(f"[category_map] 준비 전 - 매핑 못함: {phrase}")
+        return None
+    from common_fastapi.ai.embed_jhgan import get_embedder_768
+    embedding = get_embedder_768().create_embedding(phrase)
+    if not embedding:
+        CATEGORY_MAP.labels("unmapped").inc()
+        return None
+    sims = matrix @ np.asarray(embedding, dtype=np.float32)
+    best = int(np.argmax(sims))
+    similarity = float(sims[best]) / max(float(np.linalg.norm(embedding)), 1e-12) # 행렬은 단위 벡터, 입력은 정규화 전
+    if similarity < CATEGORY_MAP_MIN_SIMILARITY:
+        CATEGORY_MAP.labels("unmapped").inc()
+        logger.info(f"[category_map] {phrase} => 매핑 안 함 (가장 가까운 {owners[best]} {similarity:.3f} < {CATEGORY_MAP_MIN_SIMILARITY})")
+        return None
+    name = owners[best]
+    CATEGORY_MAP.labels("nearest").inc()
+    logger.info(f"[category_map] {phrase} => {name} ({similarity:.3f})")
+    return name
@@ -1,9 +1,23 @@
 import json
 from typing import Any, Dict
 from common_fastapi.ai.llm_openai import LLMClient
-# CATEGORIES는 여기 말고 함수 내에서 지연 import (순환 import 방지)
+from common_fastapi.shared.metrics import EXTRACT_PROMPTS, JOB_GATE
+from common_fastapi.shared.logger import get_logger
+from common_fastapi.shared.budget import call_timeout
+from .job_gate import get_job_gate
+from .category_map import map_category
 
-llm = LLMClient()
+log = get_logger("classify_input") # 요청마다 찍히는 hot path 로그 => LOG_SAMPLING=classify_input=0.1 처럼 샘플링 가능
+
+OFF_TOPIC_REPLY = "죄송합니다. 알바/일자리 검색과 관련된 질문만 주시면 감사하겠습니다."
+
+_llm = None
+
+def get_llm() -> LLMClient: # import 시점이 아닌 첫 사용(또는 기동 후 warmup)시 생성 => 키가 없어도 import는 죽지 않음
+    global _llm
+    if _llm is None:
+        _llm = LLMClient()
+    return _llm
 
 #####################################################
 def _safe_json_parse(text: str) -> Dict[str, Any]: # JSON 파싱 실패 시 빈 딕셔너리 반환
@@ -16,7 +30,8 @@ def _safe_json_parse(text: str) -> Dict[str, Any]: # JSON 파싱 실패 시 빈
             if start != -1 and end != -1:
                 return json.loads(text[start:end+1])
         except Exception:
-            return {}
+            pass
+    return {}
 
 def _normalize(cond: Dict[str, Any]) -> Dict[str, Any]: # 조건 정규화 - 모든 키가 존재하도록 보장
     base = {
@@ -34,14 +49,11 @@ def _normalize(cond: Dict[str, Any]) -> Dict[str, Any]: # 조건 정규화 - 모
     return base
 #####################################################
 
-def classify_input(state): # LLM 한 번 호출로 아래 2단계 작업 수행
-    
-    import main # 순환 import 방지를 위한 지연 import
-    CATEGORIES = main.CATEGORIES # print(f'===== {CATEGORIES}')
+def _has_condition(cond: Dict[str, Any]) -> bool:
+    return any(v not in (None, "", []) for v in (cond or {}).values())
 
-    print(f'state.text===== {state.text}')
-    
-    prompt = f"""
+def _full_prompt(text: str) -> str: # 첫 턴 : 규칙/예시 전체
+    return f"""
     1. 다음 작업을 수행하세요.
        사용자 입력중에 아래 2. 중요 규칙과 관련 있다면 그건 알바/일자리를 찾기 위한 내용이라고 봐야 함.
        그래서, 사용자 입력이 아르바이트/알바/일자리와 관련되어 있다면, 일자리 조건(아래 2. 중요 규칙)을 추출해야 함
@@ -75,10 +87,9 @@ def classify_input(state): # LLM 한 번 호출로 아래 2단계 작업 수행
       6) 시급(hourly_wage)은 알바 입장에서는 사실상 특정 시급 이상만 원하므로 최저 시급이며 아래와 같은 형식으로 저장
         - 숫자만 표시되도록 함
         - 숫자 다음의 화폐 단위(예: 원)는 제거하기
-      7) 희망하는 알바/일자리의 업종/카테고리(category)는 아래에서 하나만 선택
-        - {', '.join(CATEGORIES)}
-        - 예1) 수영장 : 위 카테고리중 "문화/여가/생활"를 선택
-        - 예2) 프로그래밍 : 위 카테고리중 "IT/인터넷"를 선택
+      7) 희망하는 알바/일자리의 업종/카테고리(category)는 사용자가 말한 업종/직종 표현을 짧게 그대로 (하나만)
+        - 예1) 수영장에서 일하고 싶어요 : "수영장"
+        - 예2) 프로그래밍 : "프로그래밍"
       8) 추가 조건(requirements)
         - 만일 위 항목들이 아닌 사용자가 추가로 요구하는 알바/일자리와 관련 있는 내용이거나 자격증, 기존 일자리 경험이 있으면
           아래 응답형식 json중에 requirements 값에 넣어줘 (중요함)
@@ -119,20 +130,61 @@ def classify_input(state): # LLM 한 번 호출로 아래 2단계 작업 수행
       "job_related": false,
       "condition": {{}}
     }}
-    3. 사용자 입력: "{state.text}"
+    3. 사용자 입력: "{text}"
+    """
+
+def _delta_prompt(text: str, condition: Dict[str, Any]) -> str:
+    # 후속 턴 : 규칙 요약 + 현재 조건(null 제외) + 새 발화. 바뀌거나 추가된 항목만 돌려받아 병합함
+    current = json.dumps({k: v for k, v in condition.items() if v not in (None, "", [])}, ensure_ascii=False)
+    return f"""
+    알바/일자리 검색 대화의 후속 입력입니다. 현재까지 모인 조건: {current}
+    새 입력이 일자리와 관련 없으면 {{"job_related": false, "condition": {{}}}} 로 응답.
+    관련 있으면 새 입력으로 바뀌거나 추가된 항목만 condition에 넣어 응답 (나머지는 생략).
+    형식: gender "남성"|"여성", age "30대" 형식, place 공식 행정구역명(예: "서울시 강남구"), work_days 요일 문자열(예: "월화수", 주중 "월화수목금", 주말 "토일"),
+    start_time/end_time "hh:mm"(오전 09:00-14:00, 오후 14:00-18:00, 종일 09:00-18:00), hourly_wage 숫자만,
+    category 업종/직종 표현 그대로 짧게(예: "수영장"), requirements 자격증/경험 등 그 외 요구사항
+    응답은 JSON만: {{"job_related": true | false, "condition": {{...}}}}
+    새 입력: "{text}"
     """
+
+def classify_input(state): # LLM 한 번 호출로 아래 2단계 작업 수행
+    
+    log.debug("text=%s", state.text)
+    
+    gate = get_job_gate() # 확실히 일자리 무관이면 LLM 호출 없이 바로 응답 (graph/nodes/job_gate.py)
+    if gate is not None and not _has_condition(state.condition): # 후속 턴의 짧은 답("네", "토일만요")은 LLM이 현재 조건과 함께 판단
+        if gate.is_off_topic(state.text):
+            JOB_GATE.labels("off_topic").inc()
+            state.job_related = False
+            state.reply = OFF_TOPIC_REPLY
+            log.info("job_related=False (job_gate)")
+            return state
+        JOB_GATE.labels("llm").inc()
+    
+    if _has_condition(state.condition): # 이미 모인 조건이 있으면 (두 번째 턴부터) 현재 조건 + 새 발화만 보내는 축약 프롬프트
+        prompt = _delta_prompt(state.text, state.condition)
+        EXTRACT_PROMPTS.labels("delta").inc()
+    else:
+        prompt = _full_prompt(state.text)
+        EXTRACT_PROMPTS.labels("full").inc()
     
     messages = [{"role": "user", "content": prompt}]
-    raw_response = llm.chat(messages)
-    print(f"[classify_input] LLM raw response: {raw_response}")
+    raw_response = get_llm().chat(messages, timeout=call_timeout(state.deadline, "classify_input")) # 예산이 이미 소진됐으면 BudgetExceeded
+    log.debug("LLM raw response: %s", raw_response)
+    if raw_response is None: # LLM 오류/시간 초과 : 일자리 무관으로 판단하지 않고 기존 조건 유지
+        state.job_related = None
+        state.reply = "조건을 추출하지 못했습니다. 잠시 후 다시 시도해주세요."
+        return state
     parsed = _safe_json_parse(raw_response) # JSON 파싱
     state.job_related = parsed.get("job_related", False) # 일자리 관련 여부
     if not state.job_related:
-        state.reply = "죄송합니다. 알바/일자리 검색과 관련된 질문만 주시면 감사하겠습니다."
-        print(f"[classify_input] Not job-related")
+        state.reply = OFF_TOPIC_REPLY
+        log.info("job_related=False")
         return state
     
     extracted = _normalize(parsed.get("condition", {})) # 조건 추출 및 병합
+    if extracted["category"] not in (None, "", []): # 업종 표현 => 실제 카테고리 이름 (graph/nodes/category_map.py)
+        extracted["category"] = map_category(extracted["category"])
     merged = dict(state.condition or {})
     for k, v in extracted.items():
         if v not in (None, "", []):
@@ -140,7 +192,6 @@ def classify_input(state): # LLM 한 번 호출로 아래 2단계 작업 수행
     state.condition = merged
     state.reply = "일자리 조건을 추가 또는 업데이트했습니다."
     
-    print(f"[classify_input] Job-related=True, extracted: {extracted}")
-    print(f"[classify_input] Merged condition: {merged}")
+    log.info("job_related=True extracted=%s merged=%s", extracted, merged)
     
     return state
@@ -0,0 +1,91 @@
+"""
+검색 facet 집계 : 현재 조건에서 facet 하나씩만 뺐을 때의 값별 건수
+(카테고리, 지역(시/도), 요일, 시급 구간) => 결과가 없거나 적을 때 UI가 어떤 조건을 완화할지 바로 제시할 수 있음
+GROUPING SETS + FILTER 쿼리 한 번으로 계산하고 canonical condition 단위로 캐시
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+from common_fastapi.shared.config import get_env_int, get_env_float
+from common_fastapi.shared.tracing import span
+from .search_conditions import REGION_SQL, build_condition_parts, canonical_condition
+
+FACET_CACHE_TTL_S = get_env_float("FACET_CACHE_TTL_S", 60)
+FACET_CACHE_MAX = get_env_int("FACET_CACHE_MAX", 2000)
+WAGE_BAND = 1000 # 시급 구간 단위 (원)
+
+# facet 이름 => 해당 facet을 좁히는 조건 키 (build_condition_parts 의 키)
+FACET_CONDITIONS = {"category": "category", "region": "place", "weekday": "work_days", "wage_band": "hourly_wage"}
+
+_cache: "OrderedDict[str, tuple]" = OrderedDict() # canonical condition => (만료시각, facets)
+
+
+def build_facet_query(condition: Dict[str, Any]):
+    """
+    facet마다 자기 조건만 뺀 나머지 조건으로 센다 (예: category facet은 category 조건 없이, 나머지 조건은 모두 적용)
+    facet에 해당하지 않는 조건(gender, age, time)은 base WHERE 에 넣음
+    """
+    parts, params, _ = build_condition_parts(condition)
+    base_where = "".join(f" AND {sql}" for key, sql in parts.items() if key not in FACET_CONDITIONS.values())
+    flags = ",\n               ".join(f"({parts.get(key, 'TRUE')}) AS m_{key}" for key in FACET_CONDITIONS.values())
+
+    def others(facet: str) -> str: # facet 자신을 뺀 나머지 facet 조건
+        return " AND ".join(f"m_{key}" for name, key in FACET_CONDITIONS.items() if name != facet)
+
+    query = f"""
+        WITH base AS (
+            SELECT category, split_part({REGION_SQL}, ' ', 1) AS region, work_days,
+                   (floor(hourly_wage / {WAGE_BAND}.0) * {WAGE_BAND})::int AS wage_band,
+                   {flags}
+              FROM public.jobs1
+             WHERE status = 'ACTIVE'{base_where}
+        )
+        SELECT facet, value, cnt FROM (
+            SELECT CASE WHEN GROUPING(category) = 0 THEN 'category' WHEN GROUPING(region) = 0 THEN 'region' ELSE 'wage_band' END AS facet,
+                   CASE WHEN GROUPING(category) = 0 THEN category WHEN GROUPING(region) = 0 THEN region ELSE wage_band::text END AS value,
+                   CASE WHEN GROUPING(category) = 0 THEN count(*) FILTER (WHERE {others("category")})
+                        WHEN GROUPING(region) = 0 THEN count(*) FILTER (WHERE {others("region")})
+                        ELSE count(*) FILTER (WHERE {others("wage_band")}) END AS cnt
+              FROM base
+             GROUP BY GROUPING SETS ((category), (region), (wage_band))
+            UNION ALL
+            SELECT 'weekday', d, count(*) FILTER (WHERE {others("weekday")})
+              FROM base, unnest(work_days) AS d
+             GROUP BY d
+        ) f
+         WHERE cnt > 0 AND value IS NOT NULL
+    """
+    return query, params
+
+
+def _facet_key(condition: Dict[str, Any]) -> str: # facet은 requirements(벡터 조건)를 쓰지 않음
+    return canonical_condition({k: v for k, v in (condition or {}).items() if k != "requirements"})
+
+
+async def get_facets(conn, condition: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    결과 예) {"category": [{"value": "카페", "count": 12}, ...], "region": [...], "weekday": [...], "wage_band": [...]}
+    값은 건수 내림차순. 같은 조건이면 FACET_CACHE_TTL_S 동안 캐시 사용
+    """
+    key = _facet_key(condition)
+    item = _cache.get(key)
+    if item is not None and item[0] > time.monotonic():
+        _cache.move_to_end(key)
+        return item[1]
+
+    query, params = build_facet_query(condition)
+    with span("db.fetch", **{"db.tag": "facets"}) as sp:
+        rows = await conn.fetch(query, *params)
+        sp.set_attribute("db.rows", len(rows))
+    facets: Dict[str, List[Dict[str, Any]]] = {name: [] for name in FACET_CONDITIONS}
+    for row in rows:
+        value = int(row["value"]) if row["facet"] == "wage_band" else row["value"]
+        facets[row["facet"]].append({"value": value, "count": row["cnt"]})
+    for values in facets.values():
+        values.sort(key=lambda v: v["count"], reverse=True)
+
+    _cache[key] = (time.monotonic() + FACET_CACHE_TTL_S, facets)
+    _cache.move_to_end(key)
+    while len(_cache) > FACET_CACHE_MAX:
+        _cache.popitem(last=False)
+    return facets
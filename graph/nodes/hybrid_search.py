@@ -1,20 +1,84 @@
+import asyncio, threading
+from collections import OrderedDict
+import numpy as np
+from common_fastapi.shared.config import get_env_int
 from common_fastapi.shared.db import get_db_connection
 from common_fastapi.shared.logger import logger
-from common_fastapi.ai.embed_jhgan import EmbedderKo
-from common_fastapi.ai.embed_openai import _client_embed
-from .search_conditions import validate_time_conditions, build_where_conditions
+from common_fastapi.shared.metrics import EMBED_CACHE
+from common_fastapi.shared.slow_query import fetch_recorded
+from common_fastapi.shared.tracing import set_attributes
+from common_fastapi.shared.budget import within, remaining, add_fallback, BudgetExceeded, BUDGET_EMBED_FALLBACK_S, BUDGET_SQL_RESERVE_S
+from common_fastapi.ai.embed_jhgan import get_embedder_768
+from common_fastapi.ai.embed_openai import get_client_embed, get_embedding, get_embeddings
+from .search_conditions import validate_time_conditions, condition_shape
+from .relax import build_tiers, build_ladder_query, relaxation_info
+from .facets import get_facets
+from .sql_search import sql_search
 
-# 768차원 임베딩 모델 (jhgan/ko-sroberta-multitask)
-embedder_768 = None
-# 1536차원 임베딩 모델 (OpenAI text-embedding-3-small)
-# _client_embed는 common_fastapi에서 가져옴
+# 768차원 임베딩 모델 (jhgan/ko-sroberta-multitask) : get_embedder_768() 싱글톤
+# 1536차원 임베딩 모델 (OpenAI text-embedding-3-small) : get_client_embed()
 
-def get_embedder_768():
-    """768차원 임베딩 모델 싱글톤"""
-    global embedder_768
-    if embedder_768 is None:
-        embedder_768 = EmbedderKo()
-    return embedder_768
+def _create_embedding(embedding_model: str, text: str) -> list:
+    if embedding_model == "jhgan":
+        embedding = get_embedder_768().create_embedding(text)
+    elif embedding_model == "openai":
+        if not get_client_embed():
+            raise Exception("OpenAI API Key가 설정되지 않았습니다")
+        embedding = get_embedding(text)
+    else:
+        raise Exception(f"지원하지 않는 임베딩 모델: {embedding_model}")
+    if not embedding:
+        raise Exception("임베딩 생성 실패") # 실패는 캐시에 저장하지 않음
+    return embedding
+
+
+# 같은 requirements 문구가 반복 검색되면 임베딩을 다시 만들지 않음
+# float32 배열로 보관 (1536차원 1건 약 6KB => 파이썬 float tuple의 1/8 수준)
+EMBED_CACHE_MAX = get_env_int("EMBED_CACHE_MAX", 1024)
+_embed_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict() # (모델, 문구) => 임베딩 : 오래 안 쓴 순서
+_embed_cache_lock = threading.Lock() # 노드가 스레드에서 동시에 실행됨
+
+
+def get_query_embedding(embedding_model: str, text: str) -> list:
+    """requirements 임베딩 (캐시 hit/miss는 조회 시점에 직접 판정해서 메트릭으로 집계)"""
+    key = (embedding_model, text)
+    with _embed_cache_lock:
+        cached = _embed_cache.get(key)
+        if cached is not None:
+            _embed_cache.move_to_end(key)
+    if cached is not None:
+        EMBED_CACHE.labels(embedding_model, "hit").inc()
+        return cached.tolist()
+    EMBED_CACHE.labels(embedding_model, "miss").inc()
+    embedding = np.asarray(_create_embedding(embedding_model, text), dtype=np.float32)
+    with _embed_cache_lock:
+        _embed_cache[key] = embedding
+        _embed_cache.move_to_end(key)
+        while len(_embed_cache) > EMBED_CACHE_MAX:
+            _embed_cache.popitem(last=False)
+    return embedding.tolist()
+
+
+def get_query_embeddings(embedding_model: str, texts: list) -> dict:
+    """여러 requirements 문구를 encode/API 호출 한 번으로 임베딩 (/chat/batch 용). 결과 : {문구: 임베딩}"""
+    texts = list(dict.fromkeys(t for t in texts if t and t.strip()))
+    if not texts:
+        return {}
+    if embedding_model == "jhgan":
+        embeddings = get_embedder_768().create_embeddings(texts)
+    elif embedding_model == "openai":
+        embeddings = get_embeddings(texts)
+    else:
+        raise Exception(f"지원하지 않는 임베딩 모델: {embedding_model}")
+    if len(embeddings) != len(texts):
+        raise Exception("임베딩 생성 실패")
+    return {t: list(e) for t, e in zip(texts, embeddings)}
+
+
+async def _fallback_to_sql(state):
+    """지연 예산이 부족하면 벡터 조건(requirements)을 빼고 일반 SQL 검색 결과로 응답"""
+    add_fallback(state.fallbacks, "hybrid_to_sql")
+    return await sql_search(state)
 
 
 async def hybrid_search(state):
@@ -45,33 +109,26 @@ async def hybrid_search(state):
     
     # 임베딩 모델 선택
     embedding_model = state.embeddingModel or "jhgan"
+    left = remaining(state.deadline)
+    if embedding_model == "openai" and not state.query_embedding and left is not None and left < BUDGET_EMBED_FALLBACK_S: # 남은 예산이 적으면 외부 호출 대신 로컬 모델
+        embedding_model = "jhgan"
+        add_fallback(state.fallbacks, "embedding_openai_to_jhgan")
     similarity_threshold = state.similarityThreshold or 0.4
     
     logger.info(f"[hybrid_search] embedding_model: {embedding_model}, threshold: {similarity_threshold}")
     
-    # requirements 임베딩 생성
+    # requirements 임베딩 생성 (sql_search 폴백 시간은 남겨둠). 배치 처리에서 미리 만든 임베딩이 있으면 그대로 사용
     try:
-        if embedding_model == "jhgan":
-            embedder = get_embedder_768()
-            requirements_embedding = embedder.create_embedding(requirements)
-            embedding_field = "embedding768"
-            logger.info(f"[hybrid_search] 768차원 임베딩 생성 완료")
-        elif embedding_model == "openai":
-            if not _client_embed:
-                raise Exception("OpenAI API Key가 설정되지 않았습니다")
-            response = _client_embed.embeddings.create(
-                model="text-embedding-3-small",
-                input=requirements
-            )
-            requirements_embedding = response.data[0].embedding
-            embedding_field = "embedding1536"
-            logger.info(f"[hybrid_search] 1536차원 임베딩 생성 완료")
+        if state.query_embedding and embedding_model == state.embeddingModel:
+            requirements_embedding = state.query_embedding
         else:
-            raise Exception(f"지원하지 않는 임베딩 모델: {embedding_model}")
-        
-        if not requirements_embedding:
-            raise Exception("임베딩 생성 실패")
+            requirements_embedding = await within(state.deadline, "embedding", asyncio.to_thread(get_query_embedding, embedding_model, requirements), reserve=BUDGET_SQL_RESERVE_S)
+        embedding_field = "embedding768" if embedding_model == "jhgan" else "embedding1536"
+        logger.info(f"[hybrid_search] {len(requirements_embedding)}차원 임베딩 생성 완료")
     
+    except BudgetExceeded:
+        logger.warning("[hybrid_search] 임베딩 지연 예산 초과 - sql_search로 대체")
+        return await _fallback_to_sql(state)
     except Exception as e:
         logger.exception(f"[hybrid_search] 임베딩 생성 오류: {e}")
         state.result = []
@@ -81,64 +138,72 @@ async def hybrid_search(state):
     # SQL 쿼리 기본 구조
     query = """
         SELECT id, company, title, location, hourly_wage, work_days, start_time, end_time,
-               category, gender, age, description, deadline, status,
+               category, gender, age, description, deadline, status, created_at,
                1 - ({embedding_field} <=> $1::vector) AS similarity
           FROM public.jobs1
          WHERE status = 'ACTIVE'
     """.replace("{embedding_field}", embedding_field)
     
-    # 첫 번째 파라미터는 임베딩 벡터
-    # 공통 WHERE 조건 생성 (초기 param_count는 1, 임베딩 벡터가 $1이므로)
-    where_clause, condition_params, param_count = build_where_conditions(condition, initial_param_count=1)
-    query += where_clause
-    
-    # 파라미터 리스트: 임베딩 벡터 + 조건 파라미터
-    params = [requirements_embedding] + condition_params
+    # 첫 번째 파라미터는 임베딩 벡터 ($1), 공통 WHERE 조건은 $2부터
+    # 9. 벡터 유사도 조건 (임계값) : 조건 완화 단계에서는 임계값도 낮춤
+    # 유사도 높은 순, 최신 등록순 정렬, 단계별 최대 50개 (결과 없으면 다음 완화 단계, 모두 쿼리 한 번)
+    tiers = build_tiers(condition, similarity_threshold)
+    query, params = build_ladder_query(
+        query, "similarity DESC, created_at DESC", tiers, [requirements_embedding],
+        similarity_sql=f"(1 - ({embedding_field} <=> $1::vector)) >= {{threshold}}"
+    )
     
-    # 9. 벡터 유사도 조건 (임계값)
-    query += f" AND (1 - ({embedding_field} <=> $1::vector)) >= {similarity_threshold}"
-    
-    # 유사도 높은 순, 최신 등록순 정렬, 최대 50개 제한
-    query += " ORDER BY similarity DESC, created_at DESC LIMIT 50"
+    async def _query():
+        async with get_db_connection(readonly=True) as conn: # 읽기 전용 => 복제본 우선
+            rows = await fetch_recorded(conn, "hybrid_search", query, params)
+            if state.facets: # 같은 커넥션에서 facet 집계 (조건별 캐시) : 실제로 결과를 돌려준 완화 단계의 조건 기준
+                state.facet_counts = await get_facets(conn, tiers[rows[0]["tier"] if rows else 0]["condition"])
+            return rows
     
     try:
-        async with get_db_connection() as conn:
-            rows = await conn.fetch(query, *params)
-            
-            # 결과를 딕셔너리 리스트로 변환
-            results = []
-            for row in rows:
-                results.append({
-                    "id": row["id"],
-                    "company": row["company"],
-                    "title": row["title"],
-                    "location": row["location"],
-                    "hourly_wage": row["hourly_wage"],
-                    "work_days": row["work_days"],
-                    "start_time": row["start_time"],
-                    "end_time": row["end_time"],
-                    "category": row["category"],
-                    "gender": row["gender"],
-                    "age": row["age"],
-                    "description": row["description"],
-                    "deadline": row["deadline"].isoformat() if row["deadline"] else None,
-                    "status": row["status"],
-                    "similarity": float(row["similarity"])
-                })
-            
-            logger.info(f"[hybrid_search] 검색 완료 - {len(results)}개 결과")
-            
-            # 상태 업데이트
-            state.result = results
-            
-            # 응답 메시지 생성
-            if len(results) > 0:
-                state.reply = f"하이브리드 검색 결과: {len(results)}개의 일자리를 찾았습니다."
-            else:
-                state.reply = "조건에 맞는 일자리를 찾지 못했습니다. 조건을 완화해보시겠어요?"
-            
-            return state
-            
+        rows = await within(state.deadline, "hybrid_search", _query(), reserve=BUDGET_SQL_RESERVE_S)
+        
+        # 결과를 딕셔너리 리스트로 변환
+        results = []
+        for row in rows:
+            results.append({
+                "id": row["id"],
+                "company": row["company"],
+                "title": row["title"],
+                "location": row["location"],
+                "hourly_wage": row["hourly_wage"],
+                "work_days": row["work_days"],
+                "start_time": row["start_time"],
+                "end_time": row["end_time"],
+                "category": row["category"],
+                "gender": row["gender"],
+                "age": row["age"],
+                "description": row["description"],
+                "deadline": row["deadline"].isoformat() if row["deadline"] else None,
+                "status": row["status"],
+                "similarity": float(row["similarity"])
+            })
+        
+        state.relaxation = relaxation_info(tiers, rows[0]["tier"] if rows else 0)
+        logger.info(f"[hybrid_search] 검색 완료 - {len(results)}개 결과 (완화: {state.relaxation})")
+        set_attributes(**{"search.condition": condition_shape(condition), "search.rows": len(results), "search.tier": state.relaxation["tier"] if state.relaxation else 0})
+        
+        # 상태 업데이트
+        state.result = results
+        
+        # 응답 메시지 생성
+        if state.relaxation:
+            state.reply = f"조건을 완화한 하이브리드 검색 결과({state.relaxation['description']}): {len(results)}개의 일자리를 찾았습니다."
+        elif len(results) > 0:
+            state.reply = f"하이브리드 검색 결과: {len(results)}개의 일자리를 찾았습니다."
+        else:
+            state.reply = "조건에 맞는 일자리를 찾지 못했습니다. 조건을 완화해보시겠어요?"
+        
+        return state
+        
+    except BudgetExceeded:
+        logger.warning("[hybrid_search] 검색 지연 예산 초과 - sql_search로 대체")
+        return await _fallback_to_sql(state)
     except Exception as e:
         logger.exception(f"[hybrid_search] 오류 발생: {e}")
         state.result = []
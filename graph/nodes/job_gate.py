@@ -0,0 +1,90 @@
+"""
+일자리 무관 입력 사전 판정 (classify_input의 LLM 호출 전)
+- 이미 로딩된 jhgan 모델로 입력 문장을 임베딩해서 "일자리" / "무관" 예시 문장(job_gate_seeds.json)의 중심(centroid)과 비교
+  score = cos(입력, 일자리 중심) - cos(입력, 무관 중심)
+- score < off_threshold 이면 확실히 무관 => LLM 없이 바로 안내 응답 (수 ms)
+  그 외는 기존처럼 LLM (일자리 관련이면 어차피 조건 추출에 LLM이 필요하므로 무관 쪽만 로컬에서 끝냄)
+- off_threshold : tools/calibrate_job_gate.py가 실제 입력(예시 문장 제외) 라벨 데이터로 정한 값(JOB_GATE_CALIBRATION 파일)
+  보정 파일이 없으면 JOB_GATE=1 이어도 켜지 않음 (보정 안 된 임계값으로 일자리 입력을 막지 않도록). 기본은 꺼짐
+- 후속 턴(이미 모인 조건이 있음)에는 사용하지 않음 : "네", "토일만요" 같은 짧은 답은 중심 비교로 판단할 수 없음 (classify_input)
+- 중심 계산은 기동 warmup(WARMUP에 job_gate)에서만. 준비 전이거나 jhgan 미로딩이면 gate 없이 LLM으로 (요청 경로에서 모델을 로딩하지 않음)
+- 메트릭 : gigchat_job_gate_total{decision="off_topic"|"llm"} => off_topic 비율 = 줄인 LLM 호출 비율
+"""
+import os, json, threading
+from typing import Dict, List, Optional
+import numpy as np
+from common_fastapi.shared.config import get_env, get_env_float
+from common_fastapi.shared.logger import logger
+
+JOB_GATE = get_env("JOB_GATE", "0") == "1"
+JOB_GATE_OFF_THRESHOLD = get_env_float("JOB_GATE_OFF_THRESHOLD", -0.1) # 보정 도구가 비교용으로 출력하는 기준값 (서버는 보정 파일 값만 사용)
+JOB_GATE_SEEDS = os.path.join(os.path.dirname(__file__), "job_gate_seeds.json")
+JOB_GATE_CALIBRATION = get_env("JOB_GATE_CALIBRATION", os.path.join(os.path.dirname(__file__), "job_gate_calibration.json"))
+
+
+def _unit(v: np.ndarray) -> np.ndarray:
+    n = np.linalg.norm(v, axis=-1, keepdims=True)
+    return v / np.where(n == 0, 1, n)
+
+
+def load_seeds(path: str = JOB_GATE_SEEDS) -> Dict[str, List[str]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_off_threshold(path: str = JOB_GATE_CALIBRATION) -> Optional[float]: # 보정 파일이 없거나 읽을 수 없으면 None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return float(json.load(f)["off_threshold"])
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"[job_gate] 보정 파일 읽기 실패 ({path}): {e}")
+        return None
+
+
+class JobGate:
+
+    def __init__(self, embedder, seeds: Dict[str, List[str]], off_threshold: float):
+        self.embedder = embedder
+        self.off_threshold = off_threshold
+        job = _unit(np.asarray(embedder.create_embeddings(seeds["job"]), dtype=np.float32))
+        off = _unit(np.asarray(embedder.create_embeddings(seeds["off"]), dtype=np.float32))
+        self.centroids = _unit(np.stack([job.mean(axis=0), off.mean(axis=0)])) # [일자리, 무관]
+
+    def scores(self, texts: List[str]) -> np.ndarray: # 보정 도구용 (배치)
+        sims = _unit(np.asarray(self.embedder.create_embeddings(texts), dtype=np.float32)) @ self.centroids.T
+        return sims[:, 0] - sims[:, 1]
+
+    def score(self, text: str) -> Optional[float]:
+        embedding = self.embedder.create_embedding(text)
+        if not embedding:
+            return None
+        sims = self.centroids @ _unit(np.asarray(embedding, dtype=np.float32))
+        return float(sims[0] - sims[1])
+
+    def is_off_topic(self, text: str) -> bool:
+        score = self.score(text)
+        return score is not None and score < self.off_threshold
+
+
+_gate: Optional[JobGate] = None
+_gate_lock = threading.Lock()
+
+def build_job_gate() -> Optional[JobGate]: # warmup에서 호출 (jhgan 로딩 후)
+    global _gate
+    if not JOB_GATE:
+        return None
+    with _gate_lock:
+        if _gate is None:
+            off_threshold = load_off_threshold()
+            if off_threshold is None:
+                logger.warning(f"[job_gate] 보정 파일 없음 ({JOB_GATE_CALIBRATION}) - 사용 안 함 (tools/calibrate_job_gate.py)")
+                return None
+            from common_fastapi.ai.embed_jhgan import get_embedder_768
+            _gate = JobGate(get_embedder_768(), load_seeds(), off_threshold)
+            logger.info(f"[job_gate] 준비 완료 (off_threshold={_gate.off_threshold})")
+    return _gate
+
+def get_job_gate() -> Optional[JobGate]: # 요청 경로 : 준비된 경우에만
+    return _gate
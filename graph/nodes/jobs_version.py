@@ -0,0 +1,28 @@
+"""
+jobs1 변경 버전 (migrations/002_jobs1_version.sql) : 검색 응답 ETag용
+요청마다 DB를 읽지 않도록 JOBS_VERSION_TTL_S 동안 프로세스 안에서 재사용 (그 사이 변경은 TTL 만큼 늦게 반영)
+"""
+import time
+from typing import Optional
+from common_fastapi.shared.db import get_db_connection
+from common_fastapi.shared.config import get_env_float
+from common_fastapi.shared.logger import logger
+
+JOBS_VERSION_TTL_S = get_env_float("JOBS_VERSION_TTL_S", 2.0)
+
+_cached = {"version": None, "expires": 0.0}
+
+
+async def get_jobs_version() -> Optional[int]:
+    """현재 jobs1 버전. 버전 테이블이 없거나 조회 실패면 None (=> ETag 사용 안 함)"""
+    now = time.monotonic()
+    if now < _cached["expires"]:
+        return _cached["version"]
+    try:
+        async with get_db_connection(readonly=True) as conn: # 검색과 같은 곳(복제본)에서 읽어야 결과와 버전이 맞음
+            version = await conn.fetchval("SELECT sum(version)::bigint FROM public.jobs1_version") # 슬롯 행 합계
+    except Exception as e:
+        logger.warning(f"[jobs_version] 조회 실패 - ETag 사용 안 함: {e}")
+        version = None
+    _cached.update(version=version, expires=now + (JOBS_VERSION_TTL_S if version is not None else 60)) # 실패시 1분간 재시도 안함
+    return version
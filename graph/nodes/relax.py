@@ -0,0 +1,84 @@
+"""
+검색 조건 완화 단계(relaxation ladder)
+엄격한 조건(0단계)으로 결과가 없으면 SEARCH_RELAX_LADDER 순서대로 조건을 하나씩 더 완화한 단계를 시도
+모든 단계를 쿼리 한 번(CTE + UNION ALL, tier 라벨)으로 보내고, 앞 단계에 결과가 있으면 뒤 단계는 실행되지 않음
+(각 단계에 NOT EXISTS (앞 단계) 조건 => PostgreSQL이 one-time filter로 처리해서 스캔 자체를 건너뜀)
+지역 완화는 시/군 -> 시/도 : place 조건이 원래 시/군 단위로만 매칭하므로(region_pattern, 구는 매칭에 안 씀) 구 -> 시 단계는 없음
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from common_fastapi.shared.config import get_env, get_env_int, get_env_float
+from .search_conditions import build_condition_parts, region_pattern
+
+# 완화 순서 (누적 적용). 비우면 완화 없이 엄격한 조건만
+SEARCH_RELAX_LADDER = [s.strip() for s in get_env("SEARCH_RELAX_LADDER", "time_window,work_days,region,similarity").split(",") if s.strip()]
+SEARCH_RELAX_TIME_WINDOW_MIN = get_env_int("SEARCH_RELAX_TIME_WINDOW_MIN", 120) # 근무시각 허용 범위 (기본 ±1시간 => ±2시간)
+SEARCH_RELAX_SIMILARITY_STEP = get_env_float("SEARCH_RELAX_SIMILARITY_STEP", 0.1) # 하이브리드 유사도 임계값 낮추는 폭
+SEARCH_LIMIT = 50
+
+
+def widen_region(place: str) -> Optional[str]:
+    """지역을 한 단계 넓힘 (예: 경기도 수원시 팔달구 -> 경기도, 매칭 단위가 시/군이라서). 이미 시/도 단위면 None"""
+    tokens = region_pattern(place).split()
+    return tokens[0] if len(tokens) > 1 else None
+
+
+def build_tiers(condition: Dict[str, Any], similarity_threshold: float = None) -> List[Dict[str, Any]]:
+    """
+    0단계(엄격) + 적용 가능한 완화 단계 목록. 조건에 해당 항목이 없어서 바뀌는 게 없는 단계는 건너뜀
+    각 단계 : {"tier", "relaxed": [완화 항목], "descriptions": [설명], "condition", "time_window_min", "similarity_threshold"}
+    """
+    tier = {"tier": 0, "relaxed": [], "descriptions": [], "condition": dict(condition), "time_window_min": 60, "similarity_threshold": similarity_threshold}
+    tiers = [tier]
+    for step in SEARCH_RELAX_LADDER:
+        nxt = {**tier, "relaxed": list(tier["relaxed"]), "descriptions": list(tier["descriptions"]), "condition": dict(tier["condition"])}
+        cond = nxt["condition"]
+        if step == "time_window" and cond.get("start_time") and cond.get("end_time"):
+            nxt["time_window_min"] = SEARCH_RELAX_TIME_WINDOW_MIN
+            desc = f"근무시간 범위를 ±{SEARCH_RELAX_TIME_WINDOW_MIN // 60}시간으로 넓힘"
+        elif step == "work_days" and cond.get("work_days"):
+            cond["work_days"] = None
+            desc = "근무요일 조건 제외"
+        elif step == "region" and cond.get("place") and widen_region(cond["place"]):
+            cond["place"] = widen_region(cond["place"])
+            desc = f"지역을 {cond['place']} 전체로 넓힘"
+        elif step == "similarity" and similarity_threshold:
+            nxt["similarity_threshold"] = round(max(0.0, similarity_threshold - SEARCH_RELAX_SIMILARITY_STEP), 3)
+            desc = f"유사도 기준을 {nxt['similarity_threshold']}로 낮춤"
+        else:
+            continue
+        nxt["tier"] = len(tiers)
+        nxt["relaxed"].append(step)
+        nxt["descriptions"].append(desc)
+        tiers.append(nxt)
+        tier = nxt
+    return tiers
+
+
+def build_ladder_query(select_sql: str, order_by: str, tiers: List[Dict[str, Any]], params: List[Any],
+                       similarity_sql: str = None) -> Tuple[str, List[Any]]:
+    """
+    select_sql : "SELECT ... FROM public.jobs1 WHERE status = 'ACTIVE'" (params에 이미 들어있는 $n 사용 가능 : 예) 임베딩 $1)
+    order_by : 단계 안 정렬 (예: "created_at DESC") - 바깥 UNION ALL 에서도 쓰므로 select_sql 의 출력 컬럼 이름만 사용
+    similarity_sql : 하이브리드 검색의 유사도 조건 (임계값 자리는 {threshold})
+    결과 행에는 tier 컬럼이 붙음 (결과가 있는 첫 단계의 행만, ORDER BY tier, order_by 순서로 돌아옴)
+    """
+    params = list(params)
+    ctes, selects = [], []
+    for t in tiers:
+        parts, tier_params, _ = build_condition_parts(t["condition"], len(params), t["time_window_min"])
+        params.extend(tier_params)
+        where = "".join(f" AND {part}" for part in parts.values())
+        if similarity_sql and t["similarity_threshold"] is not None:
+            where += " AND " + similarity_sql.format(threshold=float(t["similarity_threshold"]))
+        where += "".join(f" AND NOT EXISTS (SELECT 1 FROM t{prev['tier']})" for prev in tiers[:t["tier"]])
+        ctes.append(f"t{t['tier']} AS ({select_sql}{where} ORDER BY {order_by} LIMIT {SEARCH_LIMIT})")
+        selects.append(f"SELECT {t['tier']} AS tier, * FROM t{t['tier']}")
+    query = "WITH " + ",\n".join(ctes) + "\n" + "\nUNION ALL\n".join(selects) + f"\nORDER BY tier, {order_by}" # UNION ALL 은 순서 보장 없음
+    return query, params
+
+
+def relaxation_info(tiers: List[Dict[str, Any]], tier: int) -> Optional[Dict[str, Any]]: # 응답용 (0단계면 None)
+    if tier <= 0:
+        return None
+    t = tiers[tier]
+    return {"tier": tier, "relaxed": t["relaxed"], "description": ", ".join(t["descriptions"])}
@@ -2,7 +2,7 @@
 공통 검색 조건 처리 모듈
 sql_search와 hybrid_search에서 공통으로 사용하는 WHERE 조건 생성 로직
 """
-import re
+import re, json
 from typing import Dict, List, Tuple, Any
 
 def normalize_region(region_name: str) -> str:
@@ -18,6 +18,26 @@ def normalize_region(region_name: str) -> str:
     return region_name
 
 
+def canonical_condition(condition: Dict[str, Any]) -> str:
+    """
+    조건 딕셔너리를 비교/캐시 키용 문자열로 정규화
+    빈 값(None, "", [])은 제거하고 문자열은 앞뒤 공백 제거, 키 정렬
+    """
+    cleaned = {}
+    for k, v in (condition or {}).items():
+        if isinstance(v, str):
+            v = v.strip()
+        if v in (None, "", []):
+            continue
+        cleaned[k] = v
+    return json.dumps(cleaned, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def condition_shape(condition: Dict[str, Any]) -> str:
+    """값이 있는 조건 항목 이름만 (예: "category,place,work_days") => 트레이스 속성/로그용 (값은 제외)"""
+    return ",".join(json.loads(canonical_condition(condition)).keys())
+
+
 def validate_time_conditions(condition: Dict[str, Any]) -> Tuple[bool, str]:
     """
     start_time과 end_time 검증
@@ -29,35 +49,72 @@ def validate_time_conditions(condition: Dict[str, Any]) -> Tuple[bool, str]:
     if has_start != has_end:  # XOR: 둘 중 하나만 있으면
         return False, "근무 시작시각과 종료시각은 둘 다 입력하거나 둘 다 비워야 합니다."
     
+    if has_start:
+        try:
+            time_to_minutes(condition["start_time"])
+            time_to_minutes(condition["end_time"])
+        except ValueError:
+            return False, "근무 시각은 HH:MM 형식이어야 합니다."
+    
     return True, ""
 
 
-def build_where_conditions(
+def time_to_minutes(value: Any) -> int:
+    """
+    "HH:MM" / "HH:MM:SS" => 하루 중 분 (jobs1.start_min/end_min 과 같은 단위)
+    예) "09:30" -> 570, "24:00" -> 1440
+    """
+    parts = str(value).strip().split(":")
+    hour, minute = int(parts[0]), int(parts[1]) if len(parts) > 1 else 0
+    if not (0 <= hour <= 24 and 0 <= minute < 60):
+        raise ValueError(f"잘못된 시각: {value}")
+    return hour * 60 + minute
+
+
+# jobs1.location 의 시/도 명칭을 normalize_region과 같은 규칙으로 정규화하는 SQL 식 (place 조건, facet에서 공통 사용)
+REGION_SQL = """REGEXP_REPLACE(
+                REGEXP_REPLACE(
+                    REGEXP_REPLACE(
+                        REGEXP_REPLACE(location, '특별자치도', '도', 'g'),
+                        '특별자치시', '시', 'g'),
+                    '특별시', '시', 'g'),
+                '광역시', '시', 'g'
+            )"""
+
+
+def region_pattern(place: str) -> str:
+    """
+    place 조건의 매칭 접두어 : 시/군까지만 (제주도는 제주도까지만)
+    예) 서울특별시 강남구 -> 서울시, 경기도 수원시 팔달구 -> 경기도 수원시
+    """
+    place = normalize_region(place)
+    if place.startswith("제주"):
+        return "제주"
+    match = re.match(r'^(.+[시군도])(?:\s|$)', place)
+    if match:
+        return match.group(1)
+    return place
+
+
+def build_condition_parts(
     condition: Dict[str, Any],
-    initial_param_count: int = 0
-) -> Tuple[str, List[Any], int]:
+    initial_param_count: int = 0,
+    time_window_min: int = 60
+) -> Tuple[Dict[str, str], List[Any], int]:
     """
-    검색 조건에 따라 WHERE 절과 파라미터를 생성
+    검색 조건별 SQL 조건식(앞에 AND 없음)과 파라미터를 생성
+    키 : gender, age, place, work_days, time, hourly_wage, category (값이 있는 조건만)
     requirements 조건은 제외 (벡터 검색용)
-    
-    Args:
-        condition: 검색 조건 딕셔너리
-        initial_param_count: 시작 파라미터 번호 (기본값 0)
-    
-    Returns:
-        (where_clause, params, param_count)
-        - where_clause: SQL WHERE 절 문자열
-        - params: 바인딩할 파라미터 리스트
-        - param_count: 최종 파라미터 개수
+    time_window_min : 근무 시작/종료시각 허용 범위 (기본 전후 1시간, 조건 완화시 넓힘)
     """
-    where_parts = []
+    parts: Dict[str, str] = {}
     params = []
     param_count = initial_param_count
     
     # 1. gender 조건: 남성인 경우 gender in ('무관', '남성')
     if condition.get("gender"):
         param_count += 1
-        where_parts.append(f" AND gender IN ('무관', ${param_count})")
+        parts["gender"] = f"gender IN ('무관', ${param_count})"
         params.append(condition["gender"])
     
     # 2. age 조건: varchar 배열 필드에서 '20대' 같은 값 찾기
@@ -73,35 +130,14 @@ def build_where_conditions(
             age_range = str(age_value)
         
         param_count += 1
-        where_parts.append(f" AND ${param_count}::varchar = ANY(age)")
+        parts["age"] = f"age @> ARRAY[${param_count}::varchar]" # GIN(age) 사용
         params.append(age_range)
     
     # 3. place 조건: 시/군까지만 매칭 (제주도는 제주도까지만)
     if condition.get("place"):
-        place = condition["place"]
-        place = normalize_region(place)
-        
-        if place.startswith("제주"):
-            region_pattern = "제주"
-        else:
-            match = re.match(r'^(.+[시군도])(?:\s|$)', place)
-            if match:
-                region_pattern = match.group(1)
-            else:
-                region_pattern = place
-        
         param_count += 1
-        where_parts.append(f"""
-            AND REGEXP_REPLACE(
-                REGEXP_REPLACE(
-                    REGEXP_REPLACE(
-                        REGEXP_REPLACE(location, '특별자치도', '도', 'g'),
-                        '특별자치시', '시', 'g'),
-                    '특별시', '시', 'g'),
-                '광역시', '시', 'g'
-            ) LIKE ${param_count} || '%'
-        """)
-        params.append(region_pattern)
+        parts["place"] = f"{REGION_SQL} LIKE ${param_count} || '%'"
+        params.append(region_pattern(condition["place"]))
     
     # 4. work_days 조건: DB에 저장된 모든 요일이 검색 조건에 포함되어야 함
     # 예) DB에 "월화수" 저장 시, 검색 조건이 "월"만 있으면 X, "월화수" 또는 "월화수목"이면 O
@@ -114,30 +150,24 @@ def build_where_conditions(
                 days_list = [work_days[i:i+1] for i in range(0, len(work_days), 1)]
             
             param_count += 1
-            where_parts.append(f" AND ${param_count}::varchar[] @> work_days")
+            parts["work_days"] = f"work_days <@ ${param_count}::varchar[]" # GIN(work_days) 사용
             params.append(days_list)
     
-    # 5-6. start_time, end_time 조건: 전후 1시간 범위
+    # 5-6. start_time, end_time 조건: 전후 1시간 범위 (time_window_min)
+    # 분 단위 정수 컬럼(start_min, end_min : migrations/001_jobs1_search_schema.sql)으로 비교 => 행마다 캐스팅 없이 인덱스 범위 검색
+    # 범위는 0:00 ~ 24:00 안으로 자름 (예: 00:30 => 0:00 ~ 1:30)
     has_start = condition.get("start_time") not in (None, "")
     has_end = condition.get("end_time") not in (None, "")
     
     if has_start and has_end:
-        start_time = condition["start_time"]
-        end_time = condition["end_time"]
+        start_min = time_to_minutes(condition["start_time"])
+        end_min = time_to_minutes(condition["end_time"])
         
-        param_count += 1
-        start_param = param_count
-        param_count += 1
-        end_param = param_count
-        
-        where_parts.append(f"""
-            AND start_time::time BETWEEN (${start_param}::text::time - interval '1 hour')
-                                     AND (${start_param}::text::time + interval '1 hour')
-            AND end_time::time BETWEEN (${end_param}::text::time - interval '1 hour')
-                                   AND (${end_param}::text::time + interval '1 hour')
-        """)
-        params.append(start_time)
-        params.append(end_time)
+        parts["time"] = f"""start_min BETWEEN ${param_count + 1} AND ${param_count + 2}
+            AND end_min BETWEEN ${param_count + 3} AND ${param_count + 4}"""
+        param_count += 4
+        w = time_window_min
+        params.extend([max(0, start_min - w), min(1440, start_min + w), max(0, end_min - w), min(1440, end_min + w)])
     
     # 7. hourly_wage 조건: 최소 시급 이상
     if condition.get("hourly_wage"):
@@ -146,14 +176,36 @@ def build_where_conditions(
             wage = int(''.join(filter(str.isdigit, wage)))
         
         param_count += 1
-        where_parts.append(f" AND hourly_wage >= ${param_count}")
+        parts["hourly_wage"] = f"hourly_wage >= ${param_count}"
         params.append(int(wage))
     
     # 8. category 조건
     if condition.get("category"):
         param_count += 1
-        where_parts.append(f" AND category = ${param_count}")
+        parts["category"] = f"category = ${param_count}"
         params.append(condition["category"])
     
-    where_clause = ''.join(where_parts)
+    return parts, params, param_count
+
+
+def build_where_conditions(
+    condition: Dict[str, Any],
+    initial_param_count: int = 0
+) -> Tuple[str, List[Any], int]:
+    """
+    검색 조건에 따라 WHERE 절과 파라미터를 생성
+    requirements 조건은 제외 (벡터 검색용)
+    
+    Args:
+        condition: 검색 조건 딕셔너리
+        initial_param_count: 시작 파라미터 번호 (기본값 0)
+    
+    Returns:
+        (where_clause, params, param_count)
+        - where_clause: SQL WHERE 절 문자열
+        - params: 바인딩할 파라미터 리스트
+        - param_count: 최종 파라미터 개수
+    """
+    parts, params, param_count = build_condition_parts(condition, initial_param_count)
+    where_clause = ''.join(f" AND {part}" for part in parts.values())
     return where_clause, params, param_count
@@ -1,6 +1,11 @@
 from common_fastapi.shared.db import get_db_connection
 from common_fastapi.shared.logger import logger
-from .search_conditions import validate_time_conditions, build_where_conditions
+from common_fastapi.shared.slow_query import fetch_recorded
+from common_fastapi.shared.tracing import set_attributes
+from common_fastapi.shared.budget import within, BudgetExceeded
+from .search_conditions import validate_time_conditions, condition_shape
+from .relax import build_tiers, build_ladder_query, relaxation_info
+from .facets import get_facets
 
 async def sql_search(state):
     """
@@ -22,59 +27,67 @@ async def sql_search(state):
     # SQL 쿼리 기본 구조
     query = """
         SELECT id, company, title, location, hourly_wage, work_days, start_time, end_time,
-               category, gender, age, description, deadline, status
+               category, gender, age, description, deadline, status, created_at
           FROM public.jobs1
          WHERE status = 'ACTIVE'
     """
     
-    # 공통 WHERE 조건 생성
-    where_clause, params, param_count = build_where_conditions(condition, initial_param_count=0)
-    query += where_clause
+    # 공통 WHERE 조건 + 조건 완화 단계 (결과 없으면 다음 단계, 모두 쿼리 한 번), 최신 등록순 정렬, 단계별 최대 50개
+    tiers = build_tiers(condition)
+    query, params = build_ladder_query(query, "created_at DESC", tiers, [])
     
-    # 공통 WHERE 조건 생성
-    where_clause, params, param_count = build_where_conditions(condition, initial_param_count=0)
-    query += where_clause
-    
-    # 최신 등록순 정렬, 최대 50개 제한
-    query += " ORDER BY created_at DESC LIMIT 50"
+    async def _query():
+        async with get_db_connection(readonly=True) as conn: # 읽기 전용 => 복제본 우선
+            rows = await fetch_recorded(conn, "sql_search", query, params)
+            if state.facets: # 같은 커넥션에서 facet 집계 (조건별 캐시) : 실제로 결과를 돌려준 완화 단계의 조건 기준
+                state.facet_counts = await get_facets(conn, tiers[rows[0]["tier"] if rows else 0]["condition"])
+            return rows
     
     try:
-        async with get_db_connection() as conn:
-            rows = await conn.fetch(query, *params)
-            
-            # 결과를 딕셔너리 리스트로 변환
-            results = []
-            for row in rows:
-                results.append({
-                    "id": row["id"],
-                    "company": row["company"],
-                    "title": row["title"],
-                    "location": row["location"],
-                    "hourly_wage": row["hourly_wage"],
-                    "work_days": row["work_days"],
-                    "start_time": row["start_time"],
-                    "end_time": row["end_time"],
-                    "category": row["category"],
-                    "gender": row["gender"],
-                    "age": row["age"],
-                    "description": row["description"],
-                    "deadline": row["deadline"].isoformat() if row["deadline"] else None,
-                    "status": row["status"]
-                })
-            
-            logger.info(f"[sql_search] 검색 완료 - {len(results)}개 결과")
-            
-            # 상태 업데이트
-            state.result = results
-            
-            # 응답 메시지 생성
-            if len(results) > 0:
-                state.reply = f"조건에 맞는 일자리 {len(results)}개를 찾았습니다."
-            else:
-                state.reply = "조건에 맞는 일자리를 찾지 못했습니다. 조건을 완화해보시겠어요?"
-            
-            return state
-            
+        rows = await within(state.deadline, "sql_search", _query()) # 커넥션 대기 + 쿼리를 남은 예산 안에서만 (초과시 취소)
+        
+        # 결과를 딕셔너리 리스트로 변환
+        results = []
+        for row in rows:
+            results.append({
+                "id": row["id"],
+                "company": row["company"],
+                "title": row["title"],
+                "location": row["location"],
+                "hourly_wage": row["hourly_wage"],
+                "work_days": row["work_days"],
+                "start_time": row["start_time"],
+                "end_time": row["end_time"],
+                "category": row["category"],
+                "gender": row["gender"],
+                "age": row["age"],
+                "description": row["description"],
+                "deadline": row["deadline"].isoformat() if row["deadline"] else None,
+                "status": row["status"]
+            })
+        
+        state.relaxation = relaxation_info(tiers, rows[0]["tier"] if rows else 0)
+        logger.info(f"[sql_search] 검색 완료 - {len(results)}개 결과 (완화: {state.relaxation})")
+        set_attributes(**{"search.condition": condition_shape(condition), "search.rows": len(results), "search.tier": state.relaxation["tier"] if state.relaxation else 0})
+        
+        # 상태 업데이트
+        state.result = results
+        
+        # 응답 메시지 생성
+        if state.relaxation:
+            state.reply = f"조건을 완화해서({state.relaxation['description']}) 일자리 {len(results)}개를 찾았습니다."
+        elif len(results) > 0:
+            state.reply = f"조건에 맞는 일자리 {len(results)}개를 찾았습니다."
+        else:
+            state.reply = "조건에 맞는 일자리를 찾지 못했습니다. 조건을 완화해보시겠어요?"
+        
+        return state
+        
+    except BudgetExceeded:
+        logger.warning("[sql_search] 지연 예산 초과 - 검색 취소")
+        state.result = []
+        state.reply = "검색 시간이 초과되었습니다. 잠시 후 다시 시도해주세요."
+        return state
     except Exception as e:
         logger.exception(f"[sql_search] 오류 발생: {e}")
         state.result = []
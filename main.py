@@ -2,16 +2,27 @@ from fastapi import FastAPI, status # https://fastapi.tiangolo.com/reference/sta
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.requests import Request
-import sys
+from fastapi.responses import Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST # /metrics
+import sys, time, asyncio, uuid
 from dotenv import load_dotenv  # 프로젝트별 .env 로드용
 from contextlib import asynccontextmanager
-from common_fastapi.shared.logger import logger
+from common_fastapi.shared.logger import logger, request_id_var
 from common_fastapi.shared.constant import Const
-from common_fastapi.shared.db import init_db_pool, close_db_pool, get_db_connection  # 공통 DB 모듈
-from common_fastapi.shared.config import validate_env  # 공통 환경 변수 검증
+from common_fastapi.shared.db import init_db_pools, close_db_pool, get_pool, get_db_connection  # 공통 DB 모듈
+from common_fastapi.shared.config import validate_env, get_env, get_env_float  # 공통 환경 변수 검증
+from common_fastapi.shared import readiness
+from common_fastapi.shared.compression import CompressionMiddleware
+from common_fastapi.shared.profiler import Sampler, ProfilerBusy, save_profile
+from common_fastapi.shared.tracing import request_span
+from common_fastapi.shared.util import get_server_keys, chk_server_Key
+from common_fastapi.restful.resp import rsError
 
 from route.chat import router as chat_router
-from route.admin import router as admin_router
+from route.admin import router as admin_router, expire_jobs
+from route.health import router as health_router
+from worker.embed_worker import embed_worker
+from graph.nodes.category_map import load_categories
 
 origins = ["http://localhost:3000", "https://albahero.com:544"] # from gigchat_nextjs
 
@@ -20,39 +31,149 @@ load_dotenv() # 프로젝트별 환경 변수 로드 (LOG_PATH 등)
 
 pool = None  # 하위 호환을 위한 module-level 변수
 CATEGORIES = []  # DB에서 로드할 카테고리 목록 (kind='01', depth=1)
+WARMUP = [s.strip() for s in get_env("WARMUP", "llm,embedder_768,category_map").split(",") if s.strip()] # 기동 후 백그라운드로 미리 로딩할 모델
+
+def _load_llm():
+    from graph.nodes.classify_input import get_llm
+    get_llm()
+
+def _load_embedder_768():
+    from common_fastapi.ai.embed_jhgan import get_embedder_768 # torch 로딩이 가장 오래 걸림
+    get_embedder_768()
+
+def _load_job_gate(): # embedder_768 다음에 (예시 문장 중심 계산)
+    from graph.nodes.job_gate import build_job_gate
+    build_job_gate()
+
+def _load_category_map(): # embedder_768 다음에 (카테고리 이름 + 동의어 임베딩 행렬)
+    from graph.nodes.category_map import build_category_map
+    build_category_map()
+
+_WARMUP_LOADERS = {"llm": _load_llm, "embedder_768": _load_embedder_768, "job_gate": _load_job_gate, "category_map": _load_category_map}
+JOBS_EXPIRE_INTERVAL_S = get_env_float("JOBS_EXPIRE_INTERVAL_S", 0) # 마감 지난 공고 만료 주기 (0이면 /admin/expire_jobs 수동 실행만)
+
+async def expire_jobs_loop():
+    while True:
+        try:
+            expired = await expire_jobs()
+            if expired:
+                logger.info(f"[expire_jobs] {expired}개 만료 처리")
+        except Exception as e:
+            logger.warning(f"[expire_jobs] 실패: {e}")
+        await asyncio.sleep(JOBS_EXPIRE_INTERVAL_S)
+
+async def warmup(): # 서버가 요청을 받기 시작한 뒤 무거운 모델을 스레드에서 로딩 (로딩 전 요청은 첫 사용시 로딩)
+    for name in WARMUP:
+        loader = _WARMUP_LOADERS.get(name)
+        if loader is None:
+            continue
+        t0 = time.perf_counter()
+        try:
+            await asyncio.to_thread(loader)
+            readiness.mark_ready(name, time.perf_counter() - t0)
+        except Exception as e:
+            logger.exception(f"❌ warmup 실패 ({name}): {e}")
+            readiness.mark_failed(name, str(e), time.perf_counter() - t0)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI): # Application lifespan: 생성시 DB풀 만들고 종료시 닫음
     global pool, CATEGORIES
-    validate_env() # 공통 환경 변수 검증 (API_KEY, DB_URL)
-    pool = await init_db_pool() # common_fastapi의 DB 풀 초기화
-    app.state.pool = pool
+    for name in ["env", "db_pool", "categories"] + WARMUP:
+        readiness.mark_pending(name)
+    try:
+        validate_env() # 공통 환경 변수 검증 (API_KEY, DB_URL)
+        readiness.mark_ready("env")
+    except ValueError as e: # 프로세스는 띄워 두고 /health/ready 로 원인을 보여줌
+        logger.error(str(e))
+        readiness.mark_failed("env", str(e))
+
+    t0 = time.perf_counter()
+    try:
+        await init_db_pools() # common_fastapi의 DB 풀 초기화 (interactive + batch)
+        pool = get_pool()
+        app.state.pool = pool
+        readiness.mark_ready("db_pool", time.perf_counter() - t0)
+    except Exception as e:
+        logger.exception(f"❌ DB 풀 초기화 실패: {e}")
+        readiness.mark_failed("db_pool", str(e), time.perf_counter() - t0)
     
+    t0 = time.perf_counter()
     try: # 카테고리 목록 로드
-        async with get_db_connection() as conn:
-            rows = await conn.fetch(
-                "SELECT nm FROM public.category WHERE kind = '01' AND depth = 1 ORDER BY seq"
-            )
-            CATEGORIES = [row['nm'] for row in rows] # logger.info(f"✅ 카테고리 로드 완료: {len(CATEGORIES)}개")
+        async with get_db_connection(readonly=True) as conn: # 읽기 전용 => 복제본 우선
+            CATEGORIES = await load_categories(conn) # 이름 + 동의어 (임베딩 행렬은 warmup의 category_map)
+        readiness.mark_ready("categories", time.perf_counter() - t0)
     except Exception as e:
         logger.exception(f"❌ 카테고리 로드 실패: {e}")
         CATEGORIES = []  # 실패 시 빈 배열
+        readiness.mark_failed("categories", str(e), time.perf_counter() - t0)
     
+    warmup_task = asyncio.create_task(warmup()) # yield 이후 서버가 listen 하는 동안 진행됨
+    expire_task = asyncio.create_task(expire_jobs_loop()) if JOBS_EXPIRE_INTERVAL_S > 0 else None
+    if embed_worker: # jobs1 변경분 증분 임베딩 (worker/embed_worker.py)
+        embed_worker.start()
     try:
         yield # 애플리케이션 실행
     finally:
+        warmup_task.cancel()
+        if expire_task:
+            expire_task.cancel()
+        if embed_worker:
+            await embed_worker.stop()
         try:
             await close_db_pool()  # common_fastapi의 close 함수 사용
         except Exception:
             logger.exception("Error closing DB pool on shutdown")
 
 app = FastAPI(lifespan=lifespan)
-app.add_middleware(CORSMiddleware, allow_origins=origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(CORSMiddleware, allow_origins=origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"], expose_headers=["ETag", "X-Request-ID", "X-Profile", "traceparent"])
+app.add_middleware(CompressionMiddleware, paths=("/chat",)) # 검색 결과(최대 50건 description 포함) 압축
+
+@app.middleware("http") # 요청 단위 프로파일링 : X-Profile 헤더 + server_key(server.acl)인 요청만 샘플링 (request_id_middleware 안쪽에서 실행)
+async def profile_middleware(request: Request, call_next):
+    if not request.headers.get("x-profile") or not request.url.path.startswith("/chat"):
+        return await call_next(request)
+    err = chk_server_Key(get_server_keys(), request)
+    if err:
+        return rsError(Const.CODE_NOT_OK, err, status_code=status.HTTP_403_FORBIDDEN)
+    try:
+        sampler = Sampler().start()
+    except ProfilerBusy: # 다른 프로파일링 중이면 그냥 처리
+        response = await call_next(request)
+        response.headers["X-Profile"] = "busy"
+        return response
+    try:
+        response = await call_next(request) # 스트리밍 응답(/chat/batch)은 헤더를 보낼 때까지만 포함됨
+    finally:
+        sampler.stop()
+    filename = await asyncio.to_thread(save_profile, sampler, request_id_var.get() or uuid.uuid4().hex)
+    response.headers["X-Profile"] = filename # GET /admin/profiles/{filename}
+    return response
+
+@app.middleware("http") # 요청 id : 들어온 X-Request-ID를 그대로 쓰거나 새로 만들어 로그(request_id)와 응답 헤더에 붙임
+async def request_id_middleware(request: Request, call_next): # + 루트 span (traceparent 이어받음, TRACE_EXPORTER 설정시)
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        with request_span(f"{request.method} {request.url.path}", request.headers.get("traceparent"), **{"http.method": request.method, "http.route": request.url.path}) as sp:
+            response = await call_next(request) # 스트리밍 응답(/chat/batch)은 헤더를 보낼 때까지만 포함됨
+            sp.set_attribute("http.status_code", response.status_code)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    if sp.traceparent():
+        response.headers["traceparent"] = sp.traceparent()
+    return response
 
 print(f"sys.executable={sys.executable}")
 print(f"sys.version={sys.version.splitlines()[0]}")
 
 app.include_router(chat_router, prefix="/chat")
 app.include_router(admin_router, prefix="/admin")
+app.include_router(health_router, prefix="/health")
+
+@app.get("/metrics") # Prometheus scrape 대상 (common_fastapi/shared/metrics.py)
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 # 예를 들어, localhost:8000/gigwork/doc_query/docid 라우팅인데 localhost:8000/gigwork/doc_query 만으로 요청시
 # fastapi가 { "detail": "Not Found" }으로 응답하는데 아래 @app.exception_handler(Exception)로 걸리지 않고 있음
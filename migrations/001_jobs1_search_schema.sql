@@ -0,0 +1,48 @@
+-- jobs1 검색용 스키마 (graph/nodes/search_conditions.py 의 build_where_conditions 와 짝)
+-- 1) start_time/end_time => 하루 중 분(minutes-of-day) 정수 컬럼 start_min/end_min (행마다 ::time 캐스팅 없이 btree 범위 검색)
+-- 2) age, work_days 배열 => GIN 인덱스 (쿼리는 age @> ARRAY[..], work_days <@ ARRAY[..] 형태로 변경)
+-- 3) status = 'ACTIVE' 부분 인덱스 (created_at DESC 정렬 포함)
+-- 4) 마감(deadline) 지난 행은 /admin/expire_jobs (또는 JOBS_EXPIRE_INTERVAL_S 주기 작업)가 EXPIRED로 바꿔 부분 인덱스를 작게 유지
+--
+-- 실행 : psql "$DB_URL" -f migrations/001_jobs1_search_schema.sql
+-- 운영 DB에서 쓰기 잠금을 피하려면 CREATE INDEX 문을 트랜잭션 밖에서 CONCURRENTLY 로 따로 실행
+
+BEGIN;
+
+ALTER TABLE public.jobs1 ADD COLUMN IF NOT EXISTS start_min smallint;
+ALTER TABLE public.jobs1 ADD COLUMN IF NOT EXISTS end_min smallint;
+
+CREATE OR REPLACE FUNCTION public.jobs1_set_minutes() RETURNS trigger AS $$
+BEGIN
+    NEW.start_min := CASE WHEN NULLIF(NEW.start_time::text, '') IS NULL THEN NULL
+                          ELSE EXTRACT(HOUR FROM NEW.start_time::text::time) * 60 + EXTRACT(MINUTE FROM NEW.start_time::text::time) END;
+    NEW.end_min := CASE WHEN NULLIF(NEW.end_time::text, '') IS NULL THEN NULL
+                        ELSE EXTRACT(HOUR FROM NEW.end_time::text::time) * 60 + EXTRACT(MINUTE FROM NEW.end_time::text::time) END;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS jobs1_set_minutes ON public.jobs1;
+CREATE TRIGGER jobs1_set_minutes
+    BEFORE INSERT OR UPDATE OF start_time, end_time ON public.jobs1
+    FOR EACH ROW EXECUTE FUNCTION public.jobs1_set_minutes();
+
+UPDATE public.jobs1 SET start_time = start_time WHERE start_min IS NULL OR end_min IS NULL; -- 기존 행 채우기 (트리거 실행)
+
+COMMIT;
+
+-- 시간 범위 (start_min BETWEEN .. AND end_min BETWEEN ..)
+CREATE INDEX IF NOT EXISTS jobs1_active_minutes_idx ON public.jobs1 (start_min, end_min) WHERE status = 'ACTIVE';
+
+-- 배열 포함 검색
+CREATE INDEX IF NOT EXISTS jobs1_age_gin_idx ON public.jobs1 USING gin (age);
+CREATE INDEX IF NOT EXISTS jobs1_work_days_gin_idx ON public.jobs1 USING gin (work_days);
+
+-- 최신순 (ORDER BY created_at DESC LIMIT 50) : ACTIVE 행만
+CREATE INDEX IF NOT EXISTS jobs1_active_created_idx ON public.jobs1 (created_at DESC) WHERE status = 'ACTIVE';
+CREATE INDEX IF NOT EXISTS jobs1_active_category_created_idx ON public.jobs1 (category, created_at DESC) WHERE status = 'ACTIVE';
+
+-- 만료 작업용 (ACTIVE 중 마감 지난 행 찾기)
+CREATE INDEX IF NOT EXISTS jobs1_active_deadline_idx ON public.jobs1 (deadline) WHERE status = 'ACTIVE';
+
+ANALYZE public.jobs1;
@@ -0,0 +1,35 @@
+-- jobs1 변경 버전 : 검색 결과에 보이는 컬럼이 바뀌는 쓰기(INSERT/DELETE/TRUNCATE, 검색 컬럼 UPDATE)가 있을 때마다 문장 단위로 증가
+-- /chat 검색 응답의 ETag 재료 (graph/nodes/jobs_version.py). 버전이 그대로면 같은 조건의 검색 결과도 그대로
+-- - 임베딩만 쓰는 UPDATE(embedding768/embedding1536/embed_pending_at : 임베딩 워커, 관리자 backfill)는 버전을 올리지 않음
+--   (텍스트가 바뀐 시점에 이미 올라감)
+-- - 행 하나를 모든 쓰기 트랜잭션이 잠그면 jobs1 쓰기가 전부 직렬화되므로 JOBS1_VERSION_SLOTS(16)개 행으로 나누고
+--   트랜잭션 id로 행을 골라 올림 (트랜잭션당 한 행만 잠금 => 교착 없음). 버전 = 전체 합 (커밋된 변경마다 단조 증가)
+--
+-- 실행 : psql "$DB_URL" -f migrations/002_jobs1_version.sql (다시 실행해도 됨, 예전 단일 행 버전에서 그대로 이어짐)
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS public.jobs1_version (
+    id         smallint PRIMARY KEY,
+    version    bigint NOT NULL DEFAULT 0,
+    changed_at timestamptz NOT NULL DEFAULT now()
+);
+ALTER TABLE public.jobs1_version DROP CONSTRAINT IF EXISTS jobs1_version_id_check; -- 예전 단일 행 제약 (id = 1)
+INSERT INTO public.jobs1_version (id) SELECT generate_series(0, 15) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION public.jobs1_bump_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE public.jobs1_version SET version = version + 1, changed_at = now() WHERE id = (txid_current() % 16)::smallint;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS jobs1_bump_version ON public.jobs1;
+CREATE TRIGGER jobs1_bump_version
+    AFTER INSERT OR DELETE OR TRUNCATE
+       OR UPDATE OF company, title, location, hourly_wage, work_days, start_time, end_time, start_min, end_min,
+                    category, gender, age, description, deadline, status, created_at
+    ON public.jobs1
+    FOR EACH STATEMENT EXECUTE FUNCTION public.jobs1_bump_version();
+
+COMMIT;
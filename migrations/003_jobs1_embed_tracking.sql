@@ -0,0 +1,65 @@
+-- jobs1 임베딩 변경 추적 : 텍스트(company, title, description, qualifications)가 새로 들어오거나 바뀌면
+-- embed_pending_at 에 시각을 기록하고 'jobs1_embed' 채널로 NOTIFY => worker/embed_worker.py 가 바로 임베딩
+-- 임베딩을 다시 쓰면 embed_pending_at = NULL (그 사이 또 바뀌었으면 시각이 달라서 덮어쓰지 않음)
+-- 워커 여러 개(uvicorn 워커마다 하나)가 같은 행을 중복 임베딩하지 않도록 embed_claimed_until 로 행을 선점 (FOR UPDATE SKIP LOCKED)
+-- 계속 실패하는 행은 embed_attempts 가 EMBED_WORKER_MAX_ATTEMPTS 이상이면 건너뜀 (텍스트가 다시 바뀌면 0으로)
+--
+-- 실행 : psql "$DB_URL" -f migrations/003_jobs1_embed_tracking.sql (PostgreSQL 11 이상 : 백필 DO 블록 안에서 COMMIT)
+-- embed_pending_at 은 기본값 없이 추가 (clock_timestamp() 같은 volatile 기본값은 ACCESS EXCLUSIVE 잠금으로 테이블 전체를 다시 씀)
+-- => 임베딩이 없는 기존 행은 트랜잭션 밖에서 id 구간별로 나눠 커밋하며 채움
+
+BEGIN;
+
+ALTER TABLE public.jobs1 ADD COLUMN IF NOT EXISTS embed_pending_at timestamptz;
+ALTER TABLE public.jobs1 ADD COLUMN IF NOT EXISTS embed_attempts smallint NOT NULL DEFAULT 0; -- 상수 기본값은 카탈로그만 바뀜 (다시 쓰지 않음)
+ALTER TABLE public.jobs1 ADD COLUMN IF NOT EXISTS embed_claimed_until timestamptz;
+
+CREATE OR REPLACE FUNCTION public.jobs1_mark_embed_pending() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT'
+       OR (NEW.company, NEW.title, NEW.description, NEW.qualifications)
+          IS DISTINCT FROM (OLD.company, OLD.title, OLD.description, OLD.qualifications) THEN
+        NEW.embed_pending_at := clock_timestamp();
+        NEW.embed_attempts := 0;
+        NEW.embed_claimed_until := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS jobs1_mark_embed_pending ON public.jobs1;
+CREATE TRIGGER jobs1_mark_embed_pending
+    BEFORE INSERT OR UPDATE OF company, title, description, qualifications ON public.jobs1
+    FOR EACH ROW EXECUTE FUNCTION public.jobs1_mark_embed_pending();
+
+CREATE OR REPLACE FUNCTION public.jobs1_notify_embed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('jobs1_embed', ''); -- 같은 트랜잭션의 같은 알림은 한 번만 전달됨
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS jobs1_notify_embed ON public.jobs1;
+CREATE TRIGGER jobs1_notify_embed
+    AFTER INSERT OR UPDATE OF company, title, description, qualifications ON public.jobs1
+    FOR EACH STATEMENT EXECUTE FUNCTION public.jobs1_notify_embed();
+
+COMMIT;
+
+-- 기존 행 백필 : 임베딩이 하나라도 없는 행만 대기 표시, 5000건 id 구간마다 커밋 (행 잠금을 짧게, 트리거 설치 후라 그 사이 바뀐 행은 이미 표시됨)
+DO $$
+DECLARE
+    last_id bigint := 0;
+    max_id bigint;
+BEGIN
+    SELECT max(id) INTO max_id FROM public.jobs1;
+    WHILE last_id < coalesce(max_id, 0) LOOP
+        UPDATE public.jobs1 SET embed_pending_at = clock_timestamp()
+         WHERE id > last_id AND id <= last_id + 5000
+           AND embed_pending_at IS NULL AND (embedding768 IS NULL OR embedding1536 IS NULL);
+        last_id := last_id + 5000;
+        COMMIT;
+    END LOOP;
+END $$;
+
+CREATE INDEX IF NOT EXISTS jobs1_embed_pending_idx ON public.jobs1 (embed_pending_at) WHERE embed_pending_at IS NOT NULL;
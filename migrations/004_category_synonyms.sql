@@ -0,0 +1,16 @@
+-- 카테고리 동의어 : graph/nodes/category_map.py 가 이름 + 동의어를 임베딩해서 업종 표현을 카테고리 이름으로 매핑
+-- classify_input 프롬프트에서 카테고리 목록을 뺐으므로, 자주 쓰는 표현은 여기 동의어로 넣어두면 매핑이 정확해짐 (서버 재시작시 반영)
+--
+-- 실행 : psql "$DB_URL" -f migrations/004_category_synonyms.sql
+
+BEGIN;
+
+ALTER TABLE public.category ADD COLUMN IF NOT EXISTS synonyms text[] NOT NULL DEFAULT '{}';
+
+-- 기존 프롬프트의 예시 (수영장 => 문화/여가/생활, 프로그래밍 => IT/인터넷). 이미 동의어가 있는 행은 건드리지 않음
+UPDATE public.category SET synonyms = ARRAY['수영장', '헬스장', '볼링장', 'PC방', '영화관']
+ WHERE kind = '01' AND depth = 1 AND nm = '문화/여가/생활' AND synonyms = '{}';
+UPDATE public.category SET synonyms = ARRAY['프로그래밍', '개발', '웹디자인', '코딩']
+ WHERE kind = '01' AND depth = 1 AND nm = 'IT/인터넷' AND synonyms = '{}';
+
+COMMIT;
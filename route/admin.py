@@ -1,25 +1,110 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any
-from common_fastapi.shared.db import get_db_connection
+from common_fastapi.shared.db import get_db_connection, get_pool_stats, POOL_BATCH
 from common_fastapi.shared.logger import logger
-from common_fastapi.ai.embed_jhgan import EmbedderKo
-from common_fastapi.ai.embed_openai import _client_embed
-import time
+from common_fastapi.shared.slow_query import get_slow_searches, clear_slow_searches, SLOW_SEARCH_MS
+from common_fastapi.ai.embed_jhgan import get_embedder_768
+from common_fastapi.ai.embed_openai import get_client_embed, get_embedding
+from common_fastapi.shared.config import get_env, get_env_int
+from common_fastapi.shared.profiler import sample_process, list_profiles, read_profile, ProfilerBusy
+from common_fastapi.shared.util import get_server_keys, chk_server_Key
+import time, asyncio
 
 router = APIRouter()
 
-# 768차원 임베딩 모델 (jhgan/ko-sroberta-multitask)
-embedder_768 = None
+JOBS_EXPIRE_BATCH = get_env_int("JOBS_EXPIRE_BATCH", 1000) # 한 번에 만료 처리할 행 수 (잠금 시간을 짧게)
+JOBS_EXPIRED_STATUS = get_env("JOBS_EXPIRED_STATUS", "EXPIRED")
 
-# 1536차원 임베딩 모델 (OpenAI text-embedding-3-small)
-# _client_embed는 common_fastapi에서 가져옴
+# 768차원 임베딩 모델 (jhgan/ko-sroberta-multitask) : get_embedder_768() 싱글톤 (hybrid_search와 공유)
+# 1536차원 임베딩 모델 (OpenAI text-embedding-3-small) : get_client_embed()
 
-def get_embedder_768():
-    """768차원 임베딩 모델 싱글톤"""
-    global embedder_768
-    if embedder_768 is None:
-        embedder_768 = EmbedderKo()
-    return embedder_768
+
+def _check_server_key(request: Request): # 프로파일/쿼리 파라미터/복제본 오류에는 코드 구조와 사용자 입력이 드러나므로 server.acl 의 키가 있어야 함
+    err = chk_server_Key(get_server_keys(), request)
+    if err:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=err)
+
+
+@router.get("/pool_stats")
+async def pool_stats(request: Request) -> Dict[str, Any]:
+    """풀별(interactive/batch) 크기/사용중/한도/획득 대기시간 (tools/loadtest.py가 전후 값을 비교)"""
+    _check_server_key(request)
+    return get_pool_stats()
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile_process(request: Request, seconds: float = 10) -> str:
+    """프로세스 전체를 seconds초(최대 PROFILE_MAX_S) 샘플링 => collapsed stack (flamegraph.pl / speedscope 입력)"""
+    _check_server_key(request)
+    try:
+        sampler = await asyncio.to_thread(sample_process, seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return sampler.collapsed()
+
+
+@router.get("/profiles")
+async def profiles(request: Request) -> Dict[str, Any]:
+    """요청 단위 프로파일 목록 (X-Profile 헤더로 실행된 /chat 요청, 최신순)"""
+    _check_server_key(request)
+    return {"profiles": list_profiles()}
+
+
+@router.get("/profiles/{filename}", response_class=PlainTextResponse)
+async def profile_file(request: Request, filename: str) -> str:
+    _check_server_key(request)
+    text = read_profile(filename)
+    if text is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=filename)
+    return text
+
+
+@router.get("/slow_searches")
+async def slow_searches(request: Request) -> Dict[str, Any]:
+    """느린 검색 (SLOW_SEARCH_MS 이상) 쿼리 형태별 묶음 + EXPLAIN (ANALYZE, BUFFERS) 결과 (바인딩 파라미터 포함)"""
+    _check_server_key(request)
+    return {"threshold_ms": SLOW_SEARCH_MS, "groups": get_slow_searches()}
+
+
+@router.delete("/slow_searches")
+async def reset_slow_searches(request: Request) -> Dict[str, Any]:
+    _check_server_key(request)
+    clear_slow_searches()
+    return {"success": True}
+
+
+async def expire_jobs(batch_size: int = JOBS_EXPIRE_BATCH) -> int:
+    """
+    마감(deadline)이 지난 ACTIVE 행을 EXPIRED로 변경 => status='ACTIVE' 부분 인덱스를 작게 유지
+    batch_size 단위로 나눠서 커밋 (다른 쓰기와 잠금 충돌시 SKIP LOCKED로 다음 회차에 처리)
+    """
+    expired = 0
+    while True:
+        async with get_db_connection(pool=POOL_BATCH) as conn: # 배치마다 커넥션 반납 => 검색 요청과 나눠 씀
+            result = await conn.execute("""
+                UPDATE public.jobs1 SET status = $1
+                 WHERE id IN (SELECT id FROM public.jobs1
+                               WHERE status = 'ACTIVE' AND deadline < CURRENT_DATE
+                               LIMIT $2 FOR UPDATE SKIP LOCKED)
+            """, JOBS_EXPIRED_STATUS, batch_size)
+        count = int(result.split()[-1]) # "UPDATE n"
+        expired += count
+        if count < batch_size:
+            return expired
+
+
+@router.post("/expire_jobs")
+async def expire_jobs_endpoint() -> Dict[str, Any]:
+    """마감 지난 공고 만료 처리 (main.py에서 JOBS_EXPIRE_INTERVAL_S 주기로도 실행)"""
+    try:
+        start_time = time.time()
+        expired = await expire_jobs()
+        logger.info(f"[expire_jobs] {expired}개 만료 처리")
+        return {"success": True, "expired": expired, "duration": time.time() - start_time}
+    except Exception as e:
+        logger.exception(f"[expire_jobs] 오류: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
 @router.post("/update_embeddings768")
@@ -38,7 +123,7 @@ async def update_embeddings768() -> Dict[str, Any]:
         failed = 0
         failed_ids = []
         
-        async with get_db_connection() as conn:
+        async with get_db_connection(pool=POOL_BATCH) as conn: # 장시간 작업은 batch 풀 사용
             # embedding768이 NULL인 레코드 조회 : WHERE embedding768 IS NULL 일단 빼고 전체 업데이트
             rows = await conn.fetch("""
                 SELECT id, company, title, description, qualifications
@@ -126,7 +211,7 @@ async def update_embeddings1536() -> Dict[str, Any]:
     - OpenAI text-embedding-3-small 모델 사용 (1536차원)
     """
     try:
-        if not _client_embed:
+        if not get_client_embed():
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="OpenAI API Key가 설정되지 않았습니다"
@@ -139,7 +224,7 @@ async def update_embeddings1536() -> Dict[str, Any]:
         failed = 0
         failed_ids = []
         
-        async with get_db_connection() as conn:
+        async with get_db_connection(pool=POOL_BATCH) as conn: # 장시간 작업은 batch 풀 사용
             # embedding1536이 NULL인 레코드 조회 : WHERE embedding1536 IS NULL 일단 빼고 전체 업데이트
             rows = await conn.fetch("""
                 SELECT id, company, title, description, qualifications
@@ -173,12 +258,7 @@ async def update_embeddings1536() -> Dict[str, Any]:
                         continue
                     
                     # OpenAI 임베딩 생성
-                    response = _client_embed.embeddings.create(
-                        model="text-embedding-3-small",
-                        input=text
-                    )
-                    
-                    embedding = response.data[0].embedding
+                    embedding = get_embedding(text)
                     
                     if not embedding:
                         logger.error(f"[1536 Embeddings] Job ID {row['id']}: 임베딩 생성 실패")
@@ -1,36 +1,212 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import Union
-from graph.chat_graph import workflow, ChatState
-from common_fastapi.restful.rqst import ChatRequest
+import time, asyncio, math, json, hashlib
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from typing import Union, Dict, List, Optional
+from graph.chat_graph import run_chat, ChatState, resolve_route, request_key
+from common_fastapi.restful.rqst import ChatRequest, ChatBatchRequest
 from common_fastapi.restful.resp import CodeMsgBase, Common, rsObj, rsError
 from common_fastapi.shared.logger import logger
 from common_fastapi.shared.constant import Const
+from common_fastapi.shared.config import get_env, get_env_int, get_env_float
+from common_fastapi.shared.metrics import ROUTE_LATENCY
+from common_fastapi.shared.singleflight import SingleFlight
+from common_fastapi.shared.admission import admit, AdmissionRejected
+from common_fastapi.shared.session import sessions
+from common_fastapi.shared.budget import new_deadline
+from graph.nodes.hybrid_search import get_query_embeddings
+from graph.nodes.jobs_version import get_jobs_version
+from graph.nodes.search_conditions import condition_shape
+from common_fastapi.shared.tracing import set_attributes
 
 router = APIRouter()
 
+# 동일 요청 합치기 (single-flight) : 같은 조건/검색여부/모델/임계값으로 동시에 들어온 요청은 workflow를 한 번만 실행
+CHAT_COALESCE = get_env("CHAT_COALESCE", "1") == "1"
+CHAT_COALESCE_TIMEOUT_S = get_env_float("CHAT_COALESCE_TIMEOUT_S", 60)
+_flight = SingleFlight("chat")
+
+# 검색 응답 ETag : 같은 조건 + 같은 jobs1 버전이면 If-None-Match 로 304 (쿼리 실행 안 함)
+CHAT_ETAG = get_env("CHAT_ETAG", "1") == "1"
+
+def _etag(state: ChatState, session_id: str, version: int) -> str: # 응답 본문을 결정하는 값(요청 키, session_id, jobs1 버전)의 해시
+    raw = "\x1f".join([request_key(state), session_id, str(version)])
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in tags # "*" 는 POST에서 의미가 없으므로 (리소스 존재 여부가 아님) 특정 ETag만 비교
+
+# 배치 : 요청 수 상한, 프로세스 전체 동시 실행 수 (interactive 요청 몫을 남겨두도록 작게), 그룹별 지연 예산
+CHAT_BATCH_MAX = get_env_int("CHAT_BATCH_MAX", 1000)
+CHAT_BATCH_CONCURRENCY = get_env_int("CHAT_BATCH_CONCURRENCY", 4)
+CHAT_BATCH_BUDGET_S = get_env_float("CHAT_BATCH_BUDGET_S", 60)
+_batch_sem = asyncio.Semaphore(max(1, CHAT_BATCH_CONCURRENCY)) # 동시에 들어온 배치 요청 전체가 공유 (요청마다 따로 두면 K개 배치 => K배)
+
+def _rejected_body(e: AdmissionRejected) -> dict:
+    if e.reason == "rate_limited":
+        return {"code": Const.CODE_RATE_LIMITED, "msg": Const.MSG_RATE_LIMITED, "retry_after": round(e.retry_after, 1)}
+    return {"code": Const.CODE_BUSY, "msg": Const.MSG_BUSY, "retry_after": round(e.retry_after, 1)}
+
+def _new_state(payload: ChatRequest, condition: dict, deadline: float = None) -> ChatState:
+    return ChatState(
+        userid=payload.userid,
+        text=payload.text,
+        condition=condition,
+        search=payload.search,
+        embeddingModel=payload.embeddingModel,
+        similarityThreshold=payload.similarityThreshold,
+        facets=payload.facets,
+        deadline=deadline
+    )
+
+def _session(payload: ChatRequest):
+    """
+    (session_id, 보관된 조건) : 서버가 발급했고 같은 userid의 세션만 이어받음 (userid로 세션을 찾지 않음)
+    새 세션은 userid가 있는 조건 추출 요청에서만 발급 (검색 전용/익명 요청은 세션 없이)
+    """
+    if payload.session_id:
+        stored = sessions.get(payload.session_id, payload.userid)
+        if stored is not None:
+            return payload.session_id, stored
+    if payload.userid and not payload.search:
+        return sessions.new_id(), None
+    return None, None
+
+def _result_obj(result_state: dict) -> dict:
+    return {
+        "job_related": result_state.get("job_related"),
+        "condition": result_state.get("condition"),
+        "result": result_state.get("result"),
+        "reply": result_state.get("reply"),
+        "fallbacks": result_state.get("fallbacks") or [],
+        "facets": result_state.get("facet_counts"),
+        "relaxation": result_state.get("relaxation")
+    }
+
 @router.post("", response_model=Union[Common, CodeMsgBase])
-async def chat_endpoint(payload: ChatRequest):
+async def chat_endpoint(payload: ChatRequest, request: Request, response: Response):
     try:
-        state = ChatState(
-            userid=payload.userid,
-            text=payload.text,
-            condition=payload.condition or {},
-            search=payload.search,
-            embeddingModel=payload.embeddingModel,
-            similarityThreshold=payload.similarityThreshold
-        )
-        result_state = await workflow.ainvoke(state)
+        deadline = new_deadline() # 지연 예산 : admission 대기부터 모든 노드의 LLM/임베딩/DB 호출까지 이 시각 안에
+        # 세션 : condition을 생략(None)했을 때만 서버에 보관된 조건을 이어받음. {}를 보내면 빈 조건으로 새로 시작
+        session_id, stored = _session(payload)
+        condition = payload.condition if payload.condition is not None else (stored or {})
+        state = _new_state(payload, condition, deadline)
+        route = resolve_route(state)
+        set_attributes(**{"chat.route": route, "chat.condition": condition_shape(condition)}) # 요청 루트 span
+        etag = None
+        if CHAT_ETAG and state.search: # 검색만 (조건 추출은 LLM 응답이라 같은 입력이라도 달라질 수 있음)
+            version = await get_jobs_version()
+            if version is not None:
+                etag = _etag(state, session_id or "", version)
+                if _etag_matches(request.headers.get("if-none-match"), etag):
+                    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        t0 = time.perf_counter()
+        async def admitted_run(): # 경로별 동시 처리 한도 / 사용자별 요청 빈도 제한 (합쳐진 요청은 실행하는 쪽 한 번만 admission)
+            async with admit(route, payload.userid):
+                return await run_chat(state)
+        if CHAT_COALESCE: # 같은 키로 진행중인 작업에 합류하는 요청은 슬롯/대기열/토큰을 쓰지 않음 (거절되면 함께 거절)
+            result_state = dict(await _flight.do(request_key(state), admitted_run, CHAT_COALESCE_TIMEOUT_S))
+        else:
+            result_state = await admitted_run()
+        ROUTE_LATENCY.labels(route).observe(time.perf_counter() - t0)
+        
+        if session_id and result_state.get("job_related") is not False: # 일자리와 무관한 입력이면 기존 조건 유지
+            sessions.put(session_id, payload.userid, result_state.get("condition"))
         
         # 검색 결과 개수만 로그 출력
         result_count = len(result_state.get("result", []))
         logger.info(f"[chat_endpoint] 검색 완료 - {result_count}개 결과")
         
-        return rsObj({
-            "job_related": result_state.get("job_related"),
-            "condition": result_state.get("condition"),
-            "result": result_state.get("result"),
-            "reply": result_state.get("reply")
-        })
+        if etag and not result_state.get("fallbacks"): # 폴백(예산 초과 등)으로 만든 결과는 재사용 대상이 아님
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = "private, no-cache" # 항상 재검증
+        return rsObj({**_result_obj(result_state), "session_id": session_id})
+    except AdmissionRejected as e: # 오래 기다리게 하지 않고 바로 거절
+        headers = {"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        if e.reason == "rate_limited":
+            return rsError(Const.CODE_RATE_LIMITED, Const.MSG_RATE_LIMITED, status_code=status.HTTP_429_TOO_MANY_REQUESTS, headers=headers)
+        return rsError(Const.CODE_BUSY, Const.MSG_BUSY, status_code=status.HTTP_503_SERVICE_UNAVAILABLE, headers=headers)
+    except asyncio.TimeoutError:
+        logger.error("chat_endpoint_timeout")
+        return rsError(Const.CODE_NOT_OK, "요청 처리 시간이 초과되었습니다.", True)
     except Exception as e: # 예) raise Exception("Error")을 통해 여기로 전달됨
         logger.exception("chat_endpoint_error : %s", e)
         return rsError(Const.CODE_NOT_OK, str(e), True)
+
+@router.delete("/session/{session_id}")
+async def reset_session(session_id: str, userid: Optional[str] = None):
+    """대화 조건 초기화 (세션을 발급받은 userid와 같아야 삭제됨)"""
+    if not sessions.delete(session_id, userid):
+        return rsError(Const.CODE_NOT_FOUND, Const.MSG_NOT_FOUND)
+    return rsObj({"session_id": session_id})
+
+async def _prime_embeddings(states: List[ChatState], groups: Dict[str, List[int]]):
+    """hybrid_search로 갈 그룹의 requirements를 모델별로 모아 encode/API 호출 한 번으로 임베딩"""
+    by_model: Dict[str, List[ChatState]] = {}
+    for indexes in groups.values():
+        state = states[indexes[0]]
+        if resolve_route(state) == "hybrid_search":
+            by_model.setdefault(state.embeddingModel or "jhgan", []).append(state)
+    for model, targets in by_model.items():
+        embeddings = await asyncio.to_thread(get_query_embeddings, model, [s.condition["requirements"] for s in targets])
+        for s in targets:
+            s.query_embedding = embeddings.get(s.condition["requirements"])
+
+@router.post("/batch")
+async def chat_batch_endpoint(payload: ChatBatchRequest):
+    """
+    ChatRequest 여러 건을 그래프로 처리하고 끝나는 순서대로 NDJSON 한 줄씩 응답 ({"index": 요청 순번, "code", "msg", "rs"})
+    - 결과가 같을 요청(request_key 동일 : 같은 검색 조건 등)은 묶어서 한 번만 실행 => 같은 조건은 SQL 한 번
+    - hybrid_search 임베딩은 모델별로 한꺼번에 생성
+    - 세션은 사용하지 않음 (각 항목의 condition 그대로)
+    - 그룹마다 admission("batch" 경로 한도, interactive용 userid별 빈도 제한은 적용 안 함)을 거치고,
+      동시 실행 수는 모든 배치 요청 합계로 CHAT_BATCH_CONCURRENCY. 거절된 그룹은 {"code": CODE_BUSY, "retry_after"} 줄로 응답
+    """
+    if not payload.items:
+        return rsError(Const.CODE_BLANK_DATA, Const.MSG_BLANK_DATA)
+    if len(payload.items) > CHAT_BATCH_MAX:
+        return rsError(Const.CODE_NOT_OK, f"한 번에 최대 {CHAT_BATCH_MAX}건까지 처리할 수 있습니다.")
+
+    states = [_new_state(item, item.condition or {}) for item in payload.items]
+    groups: Dict[str, List[int]] = {}
+    for i, state in enumerate(states):
+        groups.setdefault(request_key(state), []).append(i)
+    try:
+        async with _batch_sem: # 일괄 임베딩도 배치 동시 실행 수에 포함
+            await _prime_embeddings(states, groups)
+    except Exception as e: # 실패하면 hybrid_search가 항목별로 임베딩
+        logger.warning(f"[chat_batch] 임베딩 일괄 생성 실패: {e}")
+
+    sem = asyncio.Semaphore(max(1, min(payload.concurrency or CHAT_BATCH_CONCURRENCY, CHAT_BATCH_CONCURRENCY))) # 이 요청 안에서의 상한
+
+    async def run(indexes: List[int]):
+        async with sem, _batch_sem:
+            state = states[indexes[0]].model_copy(update={"deadline": new_deadline(CHAT_BATCH_BUDGET_S)}) # 예산은 실행 시작부터
+            t0 = time.perf_counter()
+            try:
+                async with admit("batch", state.userid, per_user=False): # 처리량은 batch 한도 + 전체 동시 실행 수로 제한
+                    result_state = await run_chat(state)
+                ROUTE_LATENCY.labels(resolve_route(state)).observe(time.perf_counter() - t0)
+                return indexes, {"code": Const.CODE_OK, "msg": "", "rs": _result_obj(result_state)}
+            except AdmissionRejected as e:
+                return indexes, _rejected_body(e)
+            except Exception as e:
+                logger.exception("chat_batch_error : %s", e)
+                return indexes, {"code": Const.CODE_NOT_OK, "msg": str(e)}
+
+    async def stream():
+        tasks = [asyncio.create_task(run(indexes)) for indexes in groups.values()]
+        try:
+            for done in asyncio.as_completed(tasks):
+                indexes, body = await done
+                body = jsonable_encoder(body)
+                yield "".join(json.dumps({"index": i, **body}, ensure_ascii=False) + "\n" for i in indexes)
+        finally: # 클라이언트가 끊으면 남은 작업 취소
+            for task in tasks:
+                task.cancel()
+
+    logger.info(f"[chat_batch] {len(states)}건, 그룹 {len(groups)}개")
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
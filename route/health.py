@@ -0,0 +1,24 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from common_fastapi.shared.config import get_env
+from common_fastapi.shared.readiness import get_status, is_ready, uptime_s
+
+router = APIRouter()
+
+# 트래픽을 받기 위해 반드시 준비되어야 하는 서브시스템 (모델은 첫 요청시 로딩해도 되므로 기본은 제외)
+# 예) HEALTH_REQUIRED=db_pool,categories,llm,embedder_768
+REQUIRED = [s.strip() for s in get_env("HEALTH_REQUIRED", "db_pool,categories").split(",") if s.strip()]
+
+@router.get("/live")
+async def live():
+    """프로세스가 살아 있고 이벤트 루프가 응답하는지만 확인 (liveness probe)"""
+    return {"status": "ok", "uptime_s": uptime_s()}
+
+@router.get("/ready")
+async def ready():
+    """서브시스템별 준비 상태 (readiness probe). 필수 항목이 안 되었으면 503"""
+    ok = is_ready(REQUIRED)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ok else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"ready": ok, "required": REQUIRED, "uptime_s": uptime_s(), "subsystems": get_status()}
+    )
@@ -0,0 +1,22 @@
+"""
+/admin 조회 엔드포인트 : server_key 없으면 403 (쿼리 파라미터/복제본 오류 노출 방지)
+실행 : python -m pytest -q tests
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import route.admin as admin
+
+
+def _client(monkeypatch) -> TestClient:
+    monkeypatch.setattr(admin, "get_server_keys", lambda: ["test-key"])
+    monkeypatch.setattr(admin, "get_pool_stats", lambda: {})
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/admin")
+    return TestClient(app)
+
+
+def test_admin_stats_require_server_key(monkeypatch):
+    client = _client(monkeypatch)
+    for method, path in [("get", "/admin/pool_stats"), ("get", "/admin/slow_searches"), ("delete", "/admin/slow_searches")]:
+        assert getattr(client, method)(path).status_code == 403
+        assert getattr(client, method)(path, headers={"server_key": "test-key"}).status_code == 200
@@ -0,0 +1,47 @@
+"""
+/chat admission + single-flight : 같은 요청이 동시에 몰리면 실행(run_chat)과 admission 모두 한 번만
+실행 : python -m pytest -q tests
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Response
+import route.chat as chat
+from common_fastapi.restful.rqst import ChatRequest
+
+
+def test_coalesced_requests_are_admitted_once(monkeypatch):
+    calls = {"admit": 0, "run": 0}
+
+    @asynccontextmanager
+    async def fake_admit(route, userid=None):
+        calls["admit"] += 1
+        yield
+
+    async def fake_run_chat(state):
+        calls["run"] += 1
+        await asyncio.sleep(0.05) # 나머지 요청이 합류할 시간
+        return {"job_related": True, "condition": state.condition, "result": [], "reply": "ok"}
+
+    monkeypatch.setattr(chat, "admit", fake_admit)
+    monkeypatch.setattr(chat, "run_chat", fake_run_chat)
+    monkeypatch.setattr(chat, "CHAT_COALESCE", True)
+
+    async def run():
+        payload = ChatRequest(text="마포구 카페 알바")
+        return await asyncio.gather(*(chat.chat_endpoint(payload, None, Response()) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert all(r["rs"]["reply"] == "ok" for r in results)
+    assert calls == {"admit": 1, "run": 1}
+
+
+def test_batch_admission_skips_user_bucket():
+    from common_fastapi.shared import admission
+
+    async def run():
+        for _ in range(admission.ADMISSION_USER_BURST * 2): # 같은 userid로 burst 이상 연속 (batch 그룹)
+            async with admission.admit("batch", "bulk-user", per_user=False):
+                pass
+
+    asyncio.run(run())
+    assert "bulk-user" not in admission._buckets
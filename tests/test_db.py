@@ -0,0 +1,96 @@
+"""
+get_db_connection : 실제 DB 없이 가짜 풀로 획득 경로(한도, 통계, span, 복제본 대체)를 실행
+실행 : python -m pytest -q tests
+"""
+import asyncio
+from contextlib import asynccontextmanager
+import asyncpg
+import pytest
+from common_fastapi.shared import db
+
+
+class FakePool:
+
+    def __init__(self, fail: bool = False, max_size: int = 2):
+        self.fail = fail
+        self.max_size = max_size
+        self.in_use = 0
+        self.conn = object()
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self.fail:
+            raise asyncpg.InterfaceError("연결 안 됨")
+        self.in_use += 1
+        try:
+            yield self.conn
+        finally:
+            self.in_use -= 1
+
+    def get_size(self):
+        return self.max_size
+
+    def get_idle_size(self):
+        return self.max_size - self.in_use
+
+    def get_max_size(self):
+        return self.max_size
+
+
+def _install(name: str, pool: FakePool, limit: int = 2):
+    db._pools[name] = pool
+    db._limiters[name] = db._Limiter(limit)
+    db._pool_stats[name] = db._new_stats()
+
+
+@pytest.fixture(autouse=True)
+def clean_pools():
+    yield
+    db._pools.clear()
+    db._limiters.clear()
+    db._pool_stats.clear()
+    db._replicas.clear()
+    db._replica_health.clear()
+
+
+def test_get_db_connection_acquires_and_releases():
+    primary = FakePool()
+    _install(db.POOL_INTERACTIVE, primary)
+
+    async def run():
+        async with db.get_db_connection() as conn:
+            assert conn is primary.conn
+            assert db._limiters[db.POOL_INTERACTIVE].in_use == 1
+        assert db._limiters[db.POOL_INTERACTIVE].in_use == 0
+
+    asyncio.run(run())
+    stats = db.get_pool_stats(db.POOL_INTERACTIVE)
+    assert stats["acquired"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_get_db_connection_batch_falls_back_to_interactive():
+    primary = FakePool()
+    _install(db.POOL_INTERACTIVE, primary)
+
+    async def run():
+        async with db.get_db_connection(pool=db.POOL_BATCH) as conn: # batch 풀이 없으면 interactive
+            assert conn is primary.conn
+
+    asyncio.run(run())
+
+
+def test_get_db_connection_readonly_falls_back_to_primary():
+    primary = FakePool()
+    _install(db.POOL_INTERACTIVE, primary)
+    _install("replica1", FakePool(fail=True))
+    db._replicas.append("replica1")
+    db._replica_health["replica1"] = {"healthy": True, "lag_s": 0.0, "error": ""}
+
+    async def run():
+        async with db.get_db_connection(readonly=True) as conn:
+            assert conn is primary.conn
+
+    asyncio.run(run())
+    assert db._replica_health["replica1"]["healthy"] is False
+    assert db._limiters["replica1"].in_use == 0
@@ -0,0 +1,69 @@
+"""
+임베딩 사이드카 클라이언트 : 한 연결로 여러 요청을 동시에 보내고(id별 응답), 타임아웃 뒤에도 같은 연결을 계속 사용
+모델 대신 텍스트 길이로 벡터를 만드는 가짜 encoder로 실제 Unix socket + shared memory 경로를 실행
+실행 : python -m pytest -q tests
+"""
+import asyncio, os, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from common_fastapi.ai import embed_server
+from common_fastapi.ai.embed_server import EmbedServer, EmbedServerClient, EMBED_DIM
+
+
+class FakeModel:
+
+    def encode(self, texts, convert_to_numpy=True, batch_size=None):
+        time.sleep(max((0.5 if t.startswith("slow") else 0.05) for t in texts))
+        return np.array([[float(len(t))] * EMBED_DIM for t in texts])
+
+
+@pytest.fixture
+def socket_path(monkeypatch):
+    from multiprocessing import shared_memory
+    monkeypatch.setattr(embed_server, "_attach_shm", lambda name: shared_memory.SharedMemory(name=name)) # 같은 프로세스라 resource_tracker 해제 안 함
+    path = os.path.join(tempfile.mkdtemp(), "embed.sock")
+    server = EmbedServer.__new__(EmbedServer)
+    server.model = FakeModel()
+    started, stop = threading.Event(), threading.Event()
+
+    async def run():
+        server.queue = asyncio.Queue()
+        batcher = asyncio.create_task(server.batcher())
+        srv = await asyncio.start_unix_server(server.handle, path=path)
+        started.set()
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        srv.close()
+        await srv.wait_closed()
+        batcher.cancel()
+
+    thread = threading.Thread(target=lambda: asyncio.run(run()), daemon=True)
+    thread.start()
+    started.wait(5)
+    yield path
+    stop.set()
+    thread.join(5)
+
+
+def test_requests_from_threads_are_pipelined(socket_path):
+    client = EmbedServerClient(socket_path, timeout=5)
+    texts = ["가" * n for n in range(1, 9)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(len(texts)) as pool:
+        results = list(pool.map(lambda t: client.encode([t]), texts))
+    elapsed = time.perf_counter() - t0
+    client.close()
+    assert [r[0][0] for r in results] == [float(len(t)) for t in texts] # 각 요청은 자기 결과를 받음
+    assert elapsed < 0.05 * len(texts) # 한 요청씩 기다렸다면 encode 시간 x 요청 수
+
+
+def test_timeout_does_not_resend_or_mix_results(socket_path):
+    client = EmbedServerClient(socket_path, timeout=0.2)
+    with pytest.raises(TimeoutError):
+        client.encode(["slow"])
+    client.timeout = 5
+    conn = client._conn
+    assert client.encode(["abc"])[0][0] == 3.0 # 늦게 도착한 slow 응답과 섞이지 않음
+    time.sleep(0.6)
+    assert client._conn is conn and conn.free.qsize() == embed_server.EMBED_CLIENT_SLOTS # 늦은 응답이 오면 슬롯 반납
+    client.close()
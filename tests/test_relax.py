@@ -0,0 +1,20 @@
+"""
+조건 완화 단계 : 단계 구성과 UNION ALL 쿼리 모양 (DB 없이 SQL 문자열만 확인)
+실행 : python -m pytest -q tests
+"""
+from graph.nodes.relax import build_tiers, build_ladder_query, widen_region
+
+
+def test_widen_region_goes_to_province():
+    assert widen_region("경기도 수원시 팔달구") == "경기도"
+    assert widen_region("경기도") is None
+
+
+def test_ladder_query_orders_by_tier_then_within_tier():
+    tiers = build_tiers({"place": "경기도 수원시", "work_days": ["월"]})
+    assert [t["relaxed"] for t in tiers] == [[], ["work_days"], ["work_days", "region"]]
+    query, params = build_ladder_query("SELECT id, created_at FROM public.jobs1 WHERE status = 'ACTIVE'", "created_at DESC", tiers, [])
+    assert query.count("UNION ALL") == len(tiers) - 1
+    assert query.rstrip().endswith("ORDER BY tier, created_at DESC")
+    assert "NOT EXISTS (SELECT 1 FROM t0)" in query and "NOT EXISTS (SELECT 1 FROM t1)" in query
+    assert "경기도" in params
@@ -0,0 +1,124 @@
+"""
+jhgan 임베딩 백엔드 비교 : torch(SentenceTransformer float32) vs onnx(int8 동적 양자화, common_fastapi/ai/embed_onnx.py)
+- 백엔드마다 별도 프로세스에서 EmbedderKo를 띄워서 (RSS가 서로 섞이지 않게) 측정
+  로딩 시간, 로딩 후 RSS, 단건 create_embedding 지연 p50/p99, create_embeddings 배치 처리량(문장/초), 측정 후 최대 RSS
+- 같은 문장들의 임베딩을 torch 결과와 비교한 코사인 일치(min/mean)도 출력
+- 문장 : graph/nodes/job_gate_seeds.json + tools/loadtest_corpus.jsonl + 공고 형태 문장 (CHECK_TEXTS)
+
+실행 예)
+    python -m common_fastapi.ai.embed_onnx --export   # 최초 1회 (onnx 모델 생성)
+    python -m tools.bench_embed
+    python -m tools.bench_embed --backends torch,onnx --single 200 --batch-size 32 --rounds 5 --json bench_embed.json
+    EMBED_ONNX_DIR=/tmp/m-onnx python -m tools.bench_embed --model /path/to/local-model   # HF 이름 대신 로컬 모델 경로
+"""
+import argparse, json, os, resource, statistics, subprocess, sys, time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+
+def corpus() -> List[str]:
+    from common_fastapi.ai.embed_onnx import CHECK_TEXTS
+    seeds = json.loads((ROOT / "graph" / "nodes" / "job_gate_seeds.json").read_text(encoding="utf-8"))
+    lines = (ROOT / "tools" / "loadtest_corpus.jsonl").read_text(encoding="utf-8").splitlines()
+    texts = seeds["job"] + seeds["off"] + [json.loads(ln)["text"] for ln in lines if ln.strip()] + CHECK_TEXTS
+    return list(dict.fromkeys(t for t in texts if t.strip()))
+
+def rss_mb() -> float: # 현재 RSS (linux /proc), 없으면 최대 RSS
+    try:
+        for ln in Path("/proc/self/status").read_text().splitlines():
+            if ln.startswith("VmRSS:"):
+                return int(ln.split()[1]) / 1024
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # macOS는 바이트, linux는 KB
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+def run_backend(args) -> Dict[str, Any]: # 자식 프로세스 : EMBED_BACKEND는 환경 변수로 받음
+    texts = corpus()
+    base_rss = rss_mb()
+    t0 = time.perf_counter()
+    from common_fastapi.ai.embed_jhgan import EmbedderKo, EMBED_BACKEND
+    embedder = EmbedderKo(args.model)
+    load_s = time.perf_counter() - t0
+    loaded_rss = rss_mb()
+
+    embedder.create_embeddings(texts[:args.batch_size]) # 워밍업
+    single = []
+    for i in range(args.single):
+        t0 = time.perf_counter()
+        embedder.create_embedding(texts[i % len(texts)])
+        single.append((time.perf_counter() - t0) * 1000)
+
+    batch = (texts * (args.batch_size // len(texts) + 1))[:args.batch_size]
+    rates = []
+    for _ in range(args.rounds):
+        t0 = time.perf_counter()
+        embedder.create_embeddings(batch)
+        rates.append(len(batch) / (time.perf_counter() - t0))
+
+    return {
+        "backend": EMBED_BACKEND,
+        "load_s": round(load_s, 2),
+        "rss_base_mb": round(base_rss, 1),
+        "rss_loaded_mb": round(loaded_rss, 1),
+        "rss_peak_mb": round(peak_rss_mb(), 1),
+        "single_p50_ms": round(statistics.median(single), 2),
+        "single_p99_ms": round(percentile(single, 99), 2),
+        "batch_size": args.batch_size,
+        "throughput_per_s": round(statistics.median(rates), 1),
+        "embeddings": embedder.create_embeddings(texts), # 코사인 비교용 (부모가 제거)
+    }
+
+def main(args):
+    import numpy as np
+    from common_fastapi.ai.embed_onnx import cosine_agreement
+    results = []
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        env = {**os.environ, "EMBED_BACKEND": backend}
+        env.pop("EMBED_SERVER_SOCKET", None) # 로컬 모드로만 비교
+        cmd = [sys.executable, "-m", "tools.bench_embed", "--child", "--model", args.model,
+               "--single", str(args.single), "--batch-size", str(args.batch_size), "--rounds", str(args.rounds)]
+        proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stderr[-2000:], file=sys.stderr)
+            raise SystemExit(f"{backend} 측정 실패 (exit {proc.returncode})")
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    embeddings = [np.asarray(r.pop("embeddings"), dtype=np.float32) for r in results]
+    reference = next((e for r, e in zip(results, embeddings) if r["backend"] == "torch"), None)
+    for r, emb in zip(results, embeddings):
+        if reference is not None and r["backend"] != "torch":
+            cos = cosine_agreement(reference, emb)
+            r["cosine_vs_torch_min"] = round(float(cos.min()), 5)
+            r["cosine_vs_torch_mean"] = round(float(cos.mean()), 5)
+
+    print(f"{'backend':<9}{'load s':>8}{'RSS MB':>9}{'peak MB':>9}{'p50 ms':>9}{'p99 ms':>9}{'texts/s':>10}{'cos min':>9}{'cos mean':>10}")
+    for r in results:
+        print(f"{r['backend']:<9}{r['load_s']:>8.2f}{r['rss_loaded_mb']:>9.1f}{r['rss_peak_mb']:>9.1f}{r['single_p50_ms']:>9.2f}{r['single_p99_ms']:>9.2f}"
+              f"{r['throughput_per_s']:>10.1f}{r.get('cosine_vs_torch_min', '-'):>9}{r.get('cosine_vs_torch_mean', '-'):>10}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="jhgan 임베딩 백엔드(torch / onnx int8) 지연/처리량/RSS 비교")
+    parser.add_argument("--backends", default="torch,onnx")
+    parser.add_argument("--model", default="jhgan/ko-sroberta-multitask", help="HF 모델 이름 또는 로컬 경로 (onnx는 EMBED_ONNX_DIR에 변환본)")
+    parser.add_argument("--single", type=int, default=200, help="단건 create_embedding 측정 횟수")
+    parser.add_argument("--batch-size", type=int, default=32, help="create_embeddings 배치 크기 (처리량 측정)")
+    parser.add_argument("--rounds", type=int, default=5, help="배치 측정 반복 수")
+    parser.add_argument("--json", help="결과 JSON 파일")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS) # 내부용 : 백엔드 하나 측정 후 JSON 한 줄 출력
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(run_backend(args), ensure_ascii=False))
+    else:
+        main(args)
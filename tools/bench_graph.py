@@ -0,0 +1,89 @@
+"""
+그래프 실행 오버헤드 벤치마크 : LangGraph workflow.ainvoke vs 직접 호출(run_fast, CHAT_EXECUTOR=fast)
+- 분기/노드 래퍼(timed_node)는 실제 것을 쓰고 말단 노드(classify_input, sql_search, hybrid_search)만 DB/LLM 없이
+  고정 결과를 돌려주는 stub으로 바꿔서 => 남는 차이가 실행 방식의 요청당 오버헤드
+- 경로별로 두 방식의 결과 dict가 같은지도 확인
+
+실행 예)
+    python -m tools.bench_graph
+    python -m tools.bench_graph --iterations 5000 --rows 50 --json bench_graph.json
+"""
+import argparse, asyncio, json, statistics, time
+from typing import Any, Callable, Dict, List
+from graph.chat_graph import NODES, ChatState, DEFAULT_CONDITION, build_workflow, build_dispatcher
+from common_fastapi.shared.metrics import timed_node
+
+def stub_nodes(rows: int) -> Dict[str, Callable]:
+    result = [{"id": i, "company": "회사", "title": "주말 카페 알바", "location": "서울시 마포구", "hourly_wage": 10030,
+               "work_days": ["토", "일"], "start_time": "09:00", "end_time": "18:00", "category": "외식·음료",
+               "gender": None, "age": None, "description": "설명 " * 40, "deadline": None, "status": "ACTIVE"} for i in range(rows)]
+
+    def classify_input(state): # LangGraph처럼 스레드에서 실행되는 sync 노드
+        state.job_related = True
+        state.condition = {**state.condition, "place": "서울시 마포구", "category": "외식·음료"}
+        state.reply = "조건을 추출했습니다."
+        return state
+
+    async def search(state):
+        state.result = list(result)
+        state.reply = f"조건에 맞는 일자리 {len(result)}개를 찾았습니다."
+        return state
+
+    return {**NODES,
+            "classify_input": timed_node("classify_input", classify_input),
+            "sql_search": timed_node("sql_search", search),
+            "hybrid_search": timed_node("hybrid_search", search)}
+
+def sample_states() -> Dict[str, ChatState]:
+    cond = {**DEFAULT_CONDITION, "place": "서울시 마포구", "work_days": ["토", "일"], "start_time": "09:00", "end_time": "18:00"}
+    return {
+        "classify_input": ChatState(text="마포구 주말 카페 알바 찾아줘"),
+        "sql_search": ChatState(text="", search=True, condition=cond),
+        "hybrid_search": ChatState(text="", search=True, condition={**cond, "requirements": "커피 좋아하는 분"}),
+    }
+
+def normalize(result: Dict[str, Any]) -> Dict[str, Any]: # ainvoke 결과에 값이 없는 필드가 빠져 있을 수 있어서 필드 기준으로 비교
+    return {k: result.get(k, ChatState.model_fields[k].default) for k in ChatState.model_fields}
+
+async def measure(run: Callable, state: ChatState, iterations: int) -> List[float]:
+    for _ in range(min(100, iterations)): # 워밍업
+        await run(state)
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await run(state)
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    q = statistics.quantiles(samples, n=100)
+    return {"mean_us": round(statistics.fmean(samples), 1), "p50_us": round(q[49], 1), "p99_us": round(q[98], 1)}
+
+async def main(args):
+    nodes = stub_nodes(args.rows)
+    workflow = build_workflow(nodes)
+    run_fast = build_dispatcher(nodes)
+    async def run_graph(state):
+        return dict(await workflow.ainvoke(state))
+
+    report = {}
+    for route, state in sample_states().items():
+        same = normalize(await run_graph(state)) == normalize(await run_fast(state))
+        graph = summarize(await measure(run_graph, state, args.iterations))
+        fast = summarize(await measure(run_fast, state, args.iterations))
+        report[route] = {"graph": graph, "fast": fast, "saved_us": round(graph["mean_us"] - fast["mean_us"], 1), "same_result": same}
+
+    print(f"{'route':<16}{'graph mean':>12}{'graph p99':>12}{'fast mean':>12}{'fast p99':>12}{'saved':>10}  same")
+    for route, r in report.items():
+        print(f"{route:<16}{r['graph']['mean_us']:>10.1f}us{r['graph']['p99_us']:>10.1f}us"
+              f"{r['fast']['mean_us']:>10.1f}us{r['fast']['p99_us']:>10.1f}us{r['saved_us']:>8.1f}us  {r['same_result']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"iterations": args.iterations, "rows": args.rows, "routes": report}, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="workflow.ainvoke vs run_fast 요청당 오버헤드")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=50, help="stub 검색 결과 행 수 (state 복사/검증 비용에 영향)")
+    parser.add_argument("--json", help="결과 JSON 파일")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,120 @@
+"""
+로깅 방식별 이벤트 루프 지연(event-loop lag) 비교
+- sync  : 핸들러(파일 + 콘솔)를 로거에 직접 붙임 => 요청 코루틴이 디스크/stdout 쓰기를 직접 기다림 (기존 방식)
+- queue : common_fastapi/shared/logger.py 와 같은 QueueHandler + QueueListener (쓰기는 백그라운드 스레드)
+코루틴 여러 개가 초당 --rate 줄씩 로그를 남기는 동안 5ms 간격 probe가 얼마나 늦게 깨어나는지 측정
+--io-delay-ms 로 느린 디스크/파이프(예: 컨테이너 stdout)를 흉내낼 수 있음
+
+실행 예)
+    python -m tools.bench_logging
+    python -m tools.bench_logging --seconds 5 --workers 50 --rate 2000 --io-delay-ms 0.2 --json bench_logging.json
+"""
+import argparse, asyncio, json, logging, os, statistics, tempfile, time
+from typing import Any, Dict, List
+from common_fastapi.shared.logger import build_handlers, build_formatter, start_queue_logging, request_id_var
+
+PROBE_INTERVAL_S = 0.005
+
+class _SlowHandler(logging.Handler): # 실제 핸들러 앞에서 emit마다 지정 시간만큼 블로킹
+    def __init__(self, inner: logging.Handler, delay_s: float):
+        super().__init__()
+        self.inner = inner
+        self.delay_s = delay_s
+
+    def emit(self, record: logging.LogRecord):
+        time.sleep(self.delay_s)
+        self.inner.handle(record)
+
+    def close(self):
+        self.inner.close()
+        super().close()
+
+def _handlers(log_dir: str, console: bool, io_delay_s: float) -> List[logging.Handler]:
+    handlers = build_handlers(log_dir, build_formatter("json"))
+    if not console: # 터미널을 로그로 덮지 않도록 콘솔 핸들러는 /dev/null 로
+        handlers[-1].setStream(open(os.devnull, "w", encoding="utf-8"))
+    if io_delay_s > 0:
+        handlers = [_SlowHandler(h, io_delay_s) for h in handlers]
+    return handlers
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+async def _run(log: logging.Logger, seconds: float, workers: int, rate: float) -> Dict[str, Any]:
+    lags: List[float] = []
+    lines = 0
+    stop = time.perf_counter() + seconds
+
+    async def probe():
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL_S)
+            lags.append((time.perf_counter() - t0 - PROBE_INTERVAL_S) * 1000)
+
+    async def worker(i: int):
+        nonlocal lines
+        request_id_var.set(f"bench-{i}")
+        interval = workers / rate
+        while time.perf_counter() < stop:
+            log.info("search done route=%s rows=%d condition=%s", "sql_search", i, {"place": "서울시 강남구", "age": "20대"})
+            lines += 1
+            await asyncio.sleep(interval)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(probe(), *(worker(i) for i in range(workers)))
+    elapsed = time.perf_counter() - t0
+    return {
+        "lines": lines,
+        "lines_per_s": round(lines / elapsed, 1),
+        "lag_p50_ms": round(_percentile(lags, 0.50), 3),
+        "lag_p99_ms": round(_percentile(lags, 0.99), 3),
+        "lag_max_ms": round(max(lags) if lags else 0.0, 3),
+        "lag_mean_ms": round(statistics.fmean(lags) if lags else 0.0, 3),
+    }
+
+def bench(mode: str, args) -> Dict[str, Any]:
+    log = logging.getLogger(f"bench_logging.{mode}")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    with tempfile.TemporaryDirectory() as log_dir:
+        handlers = _handlers(log_dir, args.console, args.io_delay_ms / 1000)
+        listener = None
+        if mode == "queue":
+            listener = start_queue_logging(log, handlers)
+        else:
+            for h in handlers:
+                log.addHandler(h)
+        try:
+            result = asyncio.run(_run(log, args.seconds, args.workers, args.rate))
+        finally:
+            if listener is not None:
+                listener.stop() # 큐에 남은 레코드까지 기록
+            for h in list(log.handlers):
+                log.removeHandler(h)
+            for h in handlers:
+                h.close()
+    return {"mode": mode, **result}
+
+def main():
+    parser = argparse.ArgumentParser(description="로깅 방식별 이벤트 루프 지연 비교")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, default=20, help="로그를 남기는 동시 코루틴 수")
+    parser.add_argument("--rate", type=float, default=1000.0, help="전체 초당 로그 줄 수 (목표)")
+    parser.add_argument("--io-delay-ms", type=float, default=0.0, help="emit마다 추가로 블로킹할 시간 (느린 I/O 흉내)")
+    parser.add_argument("--console", action="store_true", help="콘솔 핸들러를 실제 stderr로 출력")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    results = [bench("sync", args), bench("queue", args)]
+    print(f"{'mode':<6} {'lines/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for r in results:
+        print(f"{r['mode']:<6} {r['lines_per_s']:>9} {r['lag_p50_ms']:>8} {r['lag_p99_ms']:>8} {r['lag_max_ms']:>8}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
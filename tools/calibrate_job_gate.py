@@ -0,0 +1,82 @@
+"""
+job_gate 임계값 보정 : 라벨 데이터({"text", "job_related"} jsonl)로 score를 계산해서
+"무관으로 판정한 것 중 실제 무관 비율(precision)"이 --target 이상인 가장 큰 임계값을 고르고 JOB_GATE_CALIBRATION 파일로 저장
+=> 일자리 관련 입력을 잘못 막는 비율을 (1 - target) 이하로 두면서 LLM 호출을 최대한 줄임
+
+- 예시 문장(job_gate_seeds.json)과 겹치지 않는 실제 입력(로그 등)으로 라벨 데이터를 만들 것 (많을수록 정확)
+  예시 문장과 같은 문장은 자동으로 제외, 라벨이 MIN_LABELED건 미만이면 --force 없이는 저장하지 않음
+- 출력 : 임계값, precision, 줄어드는 LLM 호출 비율(avoided_rate), 무관 입력 중 로컬 처리 비율(off_recall), 잘못 막은 건수
+
+실행 예)
+    python -m tools.calibrate_job_gate tools/job_gate_labeled.jsonl
+    python -m tools.calibrate_job_gate labeled.jsonl --target 0.995 --out graph/nodes/job_gate_calibration.json
+"""
+import argparse, json, sys
+from pathlib import Path
+from typing import Any, Dict, List
+from graph.nodes.job_gate import JobGate, load_seeds, JOB_GATE_CALIBRATION, JOB_GATE_OFF_THRESHOLD
+from common_fastapi.ai.embed_jhgan import get_embedder_768
+
+MIN_LABELED = 200
+
+def load_labeled(path: str) -> List[Dict[str, Any]]:
+    rows = [json.loads(ln) for ln in Path(path).read_text(encoding="utf-8").splitlines() if ln.strip()]
+    return [r for r in rows if (r.get("text") or "").strip() and isinstance(r.get("job_related"), bool)]
+
+def evaluate(scores: List[float], labels: List[bool], threshold: float) -> Dict[str, Any]:
+    decided = [job for s, job in zip(scores, labels) if s < threshold] # 로컬에서 무관으로 끝낸 것
+    off_total = sum(1 for job in labels if not job)
+    false_rejects = sum(1 for job in decided if job)
+    return {
+        "off_threshold": round(threshold, 4),
+        "precision": round((len(decided) - false_rejects) / len(decided), 4) if decided else None,
+        "avoided_rate": round(len(decided) / len(labels), 4),
+        "off_recall": round((len(decided) - false_rejects) / off_total, 4) if off_total else None,
+        "false_rejects": false_rejects,
+    }
+
+def calibrate(scores: List[float], labels: List[bool], target: float) -> Dict[str, Any]:
+    ordered = sorted(scores)
+    candidates = [(a + b) / 2 for a, b in zip(ordered, ordered[1:])] + [ordered[0] - 1e-6]
+    best = None
+    for t in sorted(candidates, reverse=True): # 큰 임계값(더 많이 로컬 처리)부터
+        result = evaluate(scores, labels, t)
+        if result["precision"] is not None and result["precision"] >= target:
+            best = result
+            break
+    return best or evaluate(scores, labels, ordered[0] - 1e-6) # 만족하는 값이 없으면 아무것도 로컬 처리 안 함
+
+def main(args):
+    seeds = load_seeds()
+    seed_texts = {" ".join(t.split()) for t in seeds["job"] + seeds["off"]}
+    loaded = load_labeled(args.labeled)
+    rows = [r for r in loaded if " ".join(r["text"].split()) not in seed_texts] # 예시 문장으로 보정하면 점수가 실제보다 좋게 나옴
+    if len(rows) < len(loaded):
+        print(f"예시 문장과 같은 {len(loaded) - len(rows)}건 제외", file=sys.stderr)
+    if len(rows) < 2:
+        raise SystemExit(f"라벨 데이터가 부족합니다: {args.labeled}")
+    gate = JobGate(get_embedder_768(), seeds, JOB_GATE_OFF_THRESHOLD)
+    scores = [float(s) for s in gate.scores([r["text"] for r in rows])]
+    labels = [r["job_related"] for r in rows]
+
+    current = evaluate(scores, labels, JOB_GATE_OFF_THRESHOLD)
+    result = {**calibrate(scores, labels, args.target), "target_precision": args.target, "n": len(rows), "source": Path(args.labeled).name}
+    print(f"기준 임계값 {JOB_GATE_OFF_THRESHOLD}: {current}", file=sys.stderr)
+    print(f"보정 결과: {result}", file=sys.stderr)
+    if args.verbose:
+        for r, s in sorted(zip(rows, scores), key=lambda x: x[1]):
+            print(f"{s:+.4f}  {'일자리' if r['job_related'] else '무관  '}  {r['text']}", file=sys.stderr)
+    if len(rows) < MIN_LABELED and not args.force:
+        raise SystemExit(f"라벨 {len(rows)}건은 보정에 적음 ({MIN_LABELED}건 이상 필요) - 저장 안 함 (--force 로 저장)")
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"{args.out} 저장 (서버 재시작시 적용)", file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="job_gate 무관 판정 임계값 보정")
+    parser.add_argument("labeled", help='라벨 데이터 jsonl ({"text", "job_related"})')
+    parser.add_argument("--target", type=float, default=0.99, help="무관 판정 precision 목표")
+    parser.add_argument("--out", default=JOB_GATE_CALIBRATION, help="보정 결과 파일 (JOB_GATE_CALIBRATION)")
+    parser.add_argument("--verbose", action="store_true", help="문장별 score 출력")
+    parser.add_argument("--force", action="store_true", help=f"라벨이 {MIN_LABELED}건 미만이어도 저장")
+    main(parser.parse_args())
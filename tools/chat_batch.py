@@ -0,0 +1,58 @@
+"""
+/chat/batch CLI : 저장된 ChatRequest(jsonl, 한 줄에 하나)를 --batch-size 건씩 /chat/batch 로 보내고
+스트리밍 NDJSON 결과를 받는 대로 출력 (index는 입력 파일 기준 줄 번호로 다시 매김)
+
+실행 예)
+    python -m tools.chat_batch utterances.jsonl --url http://127.0.0.1:8000 --out results.ndjson
+    python -m tools.chat_batch profiles.jsonl --batch-size 500 --concurrency 4
+"""
+import argparse, asyncio, json, sys, time
+from pathlib import Path
+from typing import Any, Dict, List
+import httpx
+
+def load_items(path: str) -> List[Dict[str, Any]]:
+    return [json.loads(ln) for ln in Path(path).read_text(encoding="utf-8").splitlines() if ln.strip()]
+
+async def run_batch(client: httpx.AsyncClient, url: str, items: List[Dict[str, Any]], offset: int, concurrency: int, out) -> Dict[str, int]:
+    counts = {"ok": 0, "error": 0}
+    async with client.stream("POST", url, json={"items": items, "concurrency": concurrency}) as resp:
+        if resp.status_code != 200 or "ndjson" not in resp.headers.get("content-type", ""):
+            body = (await resp.aread()).decode("utf-8", "replace")
+            raise RuntimeError(f"/chat/batch 실패 (HTTP {resp.status_code}): {body[:500]}")
+        async for line in resp.aiter_lines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            row["index"] += offset
+            counts["ok" if row.get("code") == "0" else "error"] += 1
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return counts
+
+async def main(args):
+    items = load_items(args.input)
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    url = args.url.rstrip("/") + "/chat/batch"
+    total = {"ok": 0, "error": 0}
+    t0 = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(args.timeout, read=None)) as client: # 스트림은 끝날 때까지 읽기 타임아웃 없음
+            for start in range(0, len(items), args.batch_size):
+                counts = await run_batch(client, url, items[start:start + args.batch_size], start, args.concurrency, out)
+                for k, v in counts.items():
+                    total[k] += v
+                print(f"{min(start + args.batch_size, len(items))}/{len(items)} 완료", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"총 {len(items)}건 : 성공 {total['ok']}, 실패 {total['error']}, {time.perf_counter() - t0:.1f}초", file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/chat/batch 일괄 처리")
+    parser.add_argument("input", help="ChatRequest payload jsonl")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="앱 base url")
+    parser.add_argument("--out", help="결과 NDJSON 파일 (없으면 stdout)")
+    parser.add_argument("--batch-size", type=int, default=500, help="요청 한 번에 보낼 건수 (서버 CHAT_BATCH_MAX 이하)")
+    parser.add_argument("--concurrency", type=int, default=None, help="서버측 동시 실행 수 (CHAT_BATCH_CONCURRENCY 이하)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="연결 타임아웃 (초)")
+    asyncio.run(main(parser.parse_args()))
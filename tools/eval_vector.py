@@ -0,0 +1,182 @@
+"""
+벡터 검색 품질/지연 평가 : 라벨이 달린 질의 세트(jsonl)를 여러 설정으로 실행해서
+정확(exact) 결과 대비 recall@k, 라벨 기준 recall@k, p50/p99 지연을 표 + JSON으로 출력
+
+- 필터/정렬은 hybrid_search와 같음 (build_condition_parts, status='ACTIVE', 코사인 거리 순) => 설정만 바꿔서 비교
+- 설정 (--configs, 콤마 구분)
+    exact:<model>            순차 스캔 (인덱스 끔) => 같은 모델의 기준 결과
+    hnsw:<model>:<ef>        HNSW 인덱스 + SET LOCAL hnsw.ef_search = ef
+    halfvec:<model>[:<ef>]   반정밀도(halfvec) 양자화 거리 (아래 halfvec 표현식 인덱스가 있으면 ANN, 없으면 순차 스캔)
+    dims:<model>:<d>         앞 d차원만 사용 (text-embedding-3-small은 앞부분만 잘라도 동작) - 순차 스캔
+  model : jhgan (embedding768) | openai (embedding1536)
+- 유사도 임계값(--thresholds)별로 exact 결과의 라벨 precision/recall도 출력 => similarityThreshold 선택 근거
+- 질의 세트 한 줄 : {"requirements": "...", "condition": {...}, "relevant": [jobs1.id, ...]} (relevant 없으면 라벨 지표 생략)
+- 결과 표의 index 열 : 해당 설정에서 실제로 인덱스 스캔을 탔는지 (첫 질의 EXPLAIN 기준)
+
+ANN 설정을 평가하려면 인덱스가 있어야 함 (예, 운영 적용 전 복제본/스테이징에서)
+    CREATE INDEX CONCURRENTLY jobs1_embedding768_hnsw ON public.jobs1 USING hnsw (embedding768 vector_cosine_ops);
+    CREATE INDEX CONCURRENTLY jobs1_embedding768_half_hnsw ON public.jobs1 USING hnsw ((embedding768::halfvec(768)) halfvec_cosine_ops);
+
+실행 예)
+    python -m tools.eval_vector tools/vector_eval_queries.jsonl
+    python -m tools.eval_vector queries.jsonl --k 10 --configs exact:jhgan,hnsw:jhgan:40,hnsw:jhgan:100,halfvec:jhgan:40,exact:openai,dims:openai:512 --json eval.json
+"""
+import argparse, asyncio, json, statistics, time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from common_fastapi.shared.db import init_db_pool, close_db_pool, get_db_connection
+from graph.nodes.search_conditions import build_condition_parts
+from graph.nodes.hybrid_search import get_query_embeddings
+
+FIELDS = {"jhgan": ("embedding768", 768), "openai": ("embedding1536", 1536)}
+DEFAULT_CONFIGS = "exact:jhgan,hnsw:jhgan:40,hnsw:jhgan:100,halfvec:jhgan,exact:openai,hnsw:openai:40,dims:openai:512,dims:openai:256"
+
+def load_queries(path: str) -> List[Dict[str, Any]]:
+    rows = [json.loads(ln) for ln in Path(path).read_text(encoding="utf-8").splitlines() if ln.strip()]
+    rows = [r for r in rows if (r.get("requirements") or "").strip()]
+    if not rows:
+        raise ValueError(f"requirements가 있는 질의가 없습니다: {path}")
+    return rows
+
+def parse_config(text: str) -> Dict[str, Any]:
+    parts = text.strip().split(":")
+    kind, model = parts[0], parts[1] if len(parts) > 1 else "jhgan"
+    if kind not in ("exact", "hnsw", "halfvec", "dims") or model not in FIELDS:
+        raise ValueError(f"잘못된 설정: {text}")
+    arg = int(parts[2]) if len(parts) > 2 else None
+    if kind == "dims" and not arg:
+        raise ValueError(f"dims는 차원 수가 필요합니다: {text}")
+    return {"name": text.strip(), "kind": kind, "model": model, "arg": arg}
+
+def distance_sql(cfg: Dict[str, Any]) -> str: # ORDER BY에 그대로 써야 인덱스를 탐
+    field, dim = FIELDS[cfg["model"]]
+    if cfg["kind"] == "halfvec":
+        return f"({field}::halfvec({dim}) <=> $1::vector::halfvec({dim}))"
+    if cfg["kind"] == "dims":
+        return f"(subvector({field}, 1, {cfg['arg']}) <=> subvector($1::vector, 1, {cfg['arg']}))"
+    return f"({field} <=> $1::vector)"
+
+def settings_sql(cfg: Dict[str, Any]) -> List[str]:
+    if cfg["kind"] in ("exact", "dims"):
+        return ["SET LOCAL enable_indexscan = off", "SET LOCAL enable_bitmapscan = off"]
+    if cfg["arg"]: # hnsw / halfvec
+        return [f"SET LOCAL hnsw.ef_search = {int(cfg['arg'])}"]
+    return []
+
+def build_query(cfg: Dict[str, Any], condition: Dict[str, Any], k: int):
+    field, _ = FIELDS[cfg["model"]]
+    parts, params, _ = build_condition_parts(condition or {}, 1) # $1 = 임베딩
+    where = "".join(f" AND {p}" for p in parts.values())
+    dist = distance_sql(cfg)
+    query = f"""
+        SELECT id, 1 - {dist} AS similarity
+          FROM public.jobs1
+         WHERE status = 'ACTIVE' AND {field} IS NOT NULL{where}
+         ORDER BY {dist}
+         LIMIT {int(k)}
+    """
+    return query, params
+
+async def run_config(cfg: Dict[str, Any], queries: List[Dict[str, Any]], embeddings: Dict[str, Dict[str, list]],
+                     k: int, repeat: int) -> Dict[str, Any]:
+    results, latencies, uses_index = [], [], None
+    async with get_db_connection() as conn:
+        for i, q in enumerate(queries):
+            query, params = build_query(cfg, q.get("condition"), k)
+            params = [embeddings[cfg["model"]][q["requirements"]], *params]
+            rows = None
+            for r in range(repeat + 1): # 첫 실행은 워밍업 (측정 제외)
+                async with conn.transaction():
+                    for s in settings_sql(cfg):
+                        await conn.execute(s)
+                    if i == 0 and r == 0:
+                        plan = "\n".join(row[0] for row in await conn.fetch("EXPLAIN " + query, *params))
+                        uses_index = "Index Scan" in plan
+                    t0 = time.perf_counter()
+                    rows = await conn.fetch(query, *params)
+                    if r > 0:
+                        latencies.append((time.perf_counter() - t0) * 1000)
+            results.append([(row["id"], float(row["similarity"])) for row in rows])
+    return {"results": results, "latencies": latencies, "index": uses_index}
+
+def recall(found: List[Any], relevant: List[Any]) -> Optional[float]:
+    if not relevant:
+        return None
+    return len(set(found) & set(relevant)) / len(set(relevant))
+
+def mean(values: List[Optional[float]]) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return round(statistics.fmean(values), 4) if values else None
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))], 2) if ordered else 0.0
+
+def threshold_table(exact: Dict[str, Any], queries: List[Dict[str, Any]], thresholds: List[float]) -> List[Dict[str, Any]]:
+    rows = []
+    for t in thresholds:
+        precisions, recalls, counts = [], [], []
+        for q, found in zip(queries, exact["results"]):
+            kept = [i for i, sim in found if sim >= t]
+            counts.append(len(kept))
+            relevant = q.get("relevant") or []
+            if relevant:
+                recalls.append(recall(kept, relevant))
+                if kept:
+                    precisions.append(len(set(kept) & set(relevant)) / len(kept))
+        rows.append({"threshold": t, "avg_results": round(statistics.fmean(counts), 2), "precision": mean(precisions), "recall": mean(recalls)})
+    return rows
+
+def fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.3f}"
+
+async def main(args):
+    queries = load_queries(args.queries)
+    configs = [parse_config(c) for c in args.configs.split(",") if c.strip()]
+    models = list(dict.fromkeys(cfg["model"] for cfg in configs))
+    texts = [q["requirements"] for q in queries]
+    embeddings = {m: await asyncio.to_thread(get_query_embeddings, m, texts) for m in models} # 모델별 한 번에 (지연 측정에서 제외)
+
+    await init_db_pool(max_size=2)
+    try:
+        exact = {m: await run_config(parse_config(f"exact:{m}"), queries, embeddings, args.k, args.repeat) for m in models}
+        report = []
+        for cfg in configs:
+            run = exact[cfg["model"]] if cfg["kind"] == "exact" else await run_config(cfg, queries, embeddings, args.k, args.repeat)
+            base = exact[cfg["model"]]["results"]
+            report.append({
+                "config": cfg["name"],
+                "index": run["index"],
+                "recall_vs_exact": mean([recall([i for i, _ in found], [i for i, _ in truth]) for found, truth in zip(run["results"], base)]),
+                "label_recall": mean([recall([i for i, _ in found], q.get("relevant") or []) for found, q in zip(run["results"], queries)]),
+                "p50_ms": percentile(run["latencies"], 50),
+                "p99_ms": percentile(run["latencies"], 99),
+            })
+        thresholds = [float(t) for t in args.thresholds.split(",") if t.strip()]
+        threshold_report = {m: threshold_table(exact[m], queries, thresholds) for m in models}
+    finally:
+        await close_db_pool()
+
+    print(f"질의 {len(queries)}개, k={args.k}, 반복 {args.repeat}회")
+    print(f"{'config':<22}{'index':>7}{'recall@k(exact)':>17}{'recall@k(label)':>17}{'p50 ms':>10}{'p99 ms':>10}")
+    for r in report:
+        print(f"{r['config']:<22}{str(r['index']):>7}{fmt(r['recall_vs_exact']):>17}{fmt(r['label_recall']):>17}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+    for m, rows in threshold_report.items():
+        print(f"\n[{m}] 유사도 임계값별 (exact, top {args.k} 중)")
+        print(f"{'threshold':>10}{'avg results':>13}{'precision':>11}{'recall':>9}")
+        for r in rows:
+            print(f"{r['threshold']:>10.2f}{r['avg_results']:>13.2f}{fmt(r['precision']):>11}{fmt(r['recall']):>9}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"queries": len(queries), "k": args.k, "repeat": args.repeat, "configs": report, "thresholds": threshold_report},
+                      f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벡터 검색 설정별 recall@k / 지연 비교")
+    parser.add_argument("queries", help="질의 세트 jsonl ({requirements, condition, relevant})")
+    parser.add_argument("--configs", default=DEFAULT_CONFIGS, help="콤마 구분 설정 (exact:jhgan, hnsw:jhgan:40, halfvec:jhgan, dims:openai:512 ...)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5, help="질의별 측정 반복 수 (워밍업 1회 별도)")
+    parser.add_argument("--thresholds", default="0.3,0.35,0.4,0.45,0.5", help="라벨 precision/recall을 볼 유사도 임계값")
+    parser.add_argument("--json", help="결과 JSON 파일")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,57 @@
+"""
+import 시간 프로파일 : `python -X importtime -c "import main"`을 별도 프로세스로 실행해서
+누적(cumulative) 시간 기준 상위 모듈과 최상위 패키지별 합계를 출력 => 기동 비용 추적용
+
+실행 예)
+    python -m tools.import_profile
+    python -m tools.import_profile --target route.chat --top 30 --json import_profile.json
+"""
+import argparse, json, re, subprocess, sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def profile(target: str) -> List[Dict[str, Any]]:
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"], cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for ln in proc.stderr.splitlines():
+        m = _LINE.match(ln)
+        if m:
+            rows.append({"module": m.group(4), "self_us": int(m.group(1)), "cumulative_us": int(m.group(2)), "depth": len(m.group(3)) // 2})
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:], file=sys.stderr)
+        raise SystemExit(f"import {target} 실패 (exit {proc.returncode})")
+    return rows
+
+def summarize(rows: List[Dict[str, Any]], top: int) -> Dict[str, Any]:
+    by_package: Dict[str, int] = {}
+    for r in rows: # self 시간을 최상위 패키지별로 합산 (중복 없이 전체 합 = 총 import 시간)
+        pkg = r["module"].split(".")[0]
+        by_package[pkg] = by_package.get(pkg, 0) + r["self_us"]
+    total_us = sum(r["self_us"] for r in rows)
+    return {
+        "total_ms": total_us / 1000,
+        "modules": len(rows),
+        "top_cumulative": [{"module": r["module"], "cumulative_ms": r["cumulative_us"] / 1000}
+                           for r in sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)[:top]],
+        "by_package": [{"package": p, "self_ms": us / 1000} for p, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="import 시간 프로파일")
+    parser.add_argument("--target", default="main", help="import할 모듈 (기본 main)")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장 (이전 결과와 비교용)")
+    args = parser.parse_args()
+    report = summarize(profile(args.target), args.top)
+    print(f"import {args.target}: 총 {report['total_ms']:.0f}ms, 모듈 {report['modules']}개")
+    print(f"\n{'cumulative(ms)':>15}  module")
+    for r in report["top_cumulative"]:
+        print(f"{r['cumulative_ms']:>15.1f}  {r['module']}")
+    print(f"\n{'self(ms)':>15}  package")
+    for r in report["by_package"]:
+        print(f"{r['self_ms']:>15.1f}  {r['package']}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -0,0 +1,173 @@
+"""
+/chat 부하 테스트 도구
+- 기록된 ChatRequest payload(jsonl)를 순환 재생하여 목표 RPS(open loop) 또는 동시성(closed loop)으로 부하를 줌
+- 그래프 경로(classify_input / sql_search / hybrid_search:jhgan / hybrid_search:openai)별 p50/p95/p99, 처리량, 오류율 리포트
+- /admin/pool_stats 전후 값으로 DB 커넥션 획득 대기시간도 함께 보고 (server.acl 의 키 필요 : --server-key 또는 SERVER_KEY)
+
+실행 예)
+    python -m tools.stub_openai --port 8100 &
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=stub uvicorn main:app --port 8000 &
+    python -m tools.loadtest --url http://127.0.0.1:8000 --rps 20 --duration 60
+    python -m tools.loadtest --url http://127.0.0.1:8000 --concurrency 16 --duration 60 --json out.json
+"""
+import argparse, asyncio, itertools, json, math, os, time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import httpx
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "loadtest_corpus.jsonl"
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    rows = []
+    for ln in Path(path).read_text(encoding="utf-8").splitlines():
+        if ln.strip():
+            rows.append(json.loads(ln))
+    if not rows:
+        raise ValueError(f"corpus가 비어 있습니다: {path}")
+    return rows
+
+def route_of(payload: Dict[str, Any]) -> str: # chat_graph의 분기 규칙과 동일하게 경로 라벨을 붙임
+    if not payload.get("search"):
+        return "classify_input"
+    if (payload.get("condition") or {}).get("requirements"):
+        return f"hybrid_search:{payload.get('embeddingModel') or 'jhgan'}"
+    return "sql_search"
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1)) # nearest-rank
+    return ordered[idx]
+
+class Recorder:
+
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, route: str, elapsed: float, ok: bool):
+        self.latency.setdefault(route, []).append(elapsed)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+async def _send(client: httpx.AsyncClient, url: str, payload: Dict[str, Any], rec: Recorder):
+    route = route_of(payload)
+    t0 = time.perf_counter()
+    ok = False
+    try:
+        resp = await client.post(url, json=payload)
+        ok = resp.status_code == 200 and "rs" in resp.json() # rsError는 rs 없이 code/msg만 내려옴
+    except Exception:
+        ok = False
+    rec.add(route, time.perf_counter() - t0, ok)
+
+async def run_rps(client, url, corpus, rps: float, duration: float, rec: Recorder):
+    # open loop : 응답을 기다리지 않고 일정 간격으로 요청 발사 (서버가 밀리면 지연이 그대로 드러남)
+    tasks = []
+    interval = 1.0 / rps
+    start = time.perf_counter()
+    for i, payload in enumerate(itertools.cycle(corpus)):
+        due = start + i * interval
+        if due - start >= duration:
+            break
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(_send(client, url, payload, rec)))
+    await asyncio.gather(*tasks)
+
+async def run_concurrency(client, url, corpus, concurrency: int, duration: float, rec: Recorder):
+    # closed loop : 워커 N개가 응답을 받으면 바로 다음 요청을 보냄
+    source = itertools.cycle(corpus)
+    deadline = time.perf_counter() + duration
+    async def worker():
+        while time.perf_counter() < deadline:
+            await _send(client, url, next(source), rec)
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+async def _pool_stats(client: httpx.AsyncClient, base: str, server_key: str = None) -> Optional[Dict[str, Any]]:
+    try:
+        resp = await client.get(f"{base}/admin/pool_stats", headers={"server_key": server_key} if server_key else None)
+        return resp.json().get("interactive") if resp.status_code == 200 else None # /chat 검색은 interactive 풀 사용
+    except Exception:
+        return None
+
+def build_report(rec: Recorder, elapsed: float, before, after) -> Dict[str, Any]:
+    routes = {}
+    total = 0
+    total_err = 0
+    for route, values in sorted(rec.latency.items()):
+        err = rec.errors.get(route, 0)
+        total += len(values)
+        total_err += err
+        routes[route] = {
+            "count": len(values),
+            "rps": len(values) / elapsed if elapsed else 0.0,
+            "error_rate": err / len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+    report: Dict[str, Any] = {
+        "elapsed_s": elapsed,
+        "requests": total,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "error_rate": total_err / total if total else 0.0,
+        "routes": routes,
+    }
+    if before and after:
+        acquired = after["acquired"] - before["acquired"]
+        wait = after["wait_total"] - before["wait_total"]
+        report["pool"] = {
+            "acquired": acquired,
+            "wait_avg_ms": wait / acquired * 1000 if acquired else 0.0,
+            "wait_max_ms": after["wait_max"] * 1000, # 프로세스 시작 이후 최대값
+            "size": after.get("size"),
+            "max_size": after.get("max_size"),
+            "limit": after.get("limit"),
+        }
+    return report
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n요청 {report['requests']}건 / {report['elapsed_s']:.1f}초 => {report['throughput_rps']:.1f} rps, 오류율 {report['error_rate']:.2%}")
+    print(f"{'route':<24}{'count':>8}{'rps':>8}{'err%':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for route, r in report["routes"].items():
+        print(f"{route:<24}{r['count']:>8}{r['rps']:>8.1f}{r['error_rate'] * 100:>8.1f}{r['p50_ms']:>10.0f}{r['p95_ms']:>10.0f}{r['p99_ms']:>10.0f}")
+    pool = report.get("pool")
+    if pool:
+        print(f"DB pool : 획득 {pool['acquired']}회, 평균 대기 {pool['wait_avg_ms']:.1f}ms, 최대 대기 {pool['wait_max_ms']:.1f}ms, size {pool['size']}/{pool['max_size']}")
+    else:
+        print("DB pool : /admin/pool_stats 조회 실패 (--server-key 확인)")
+
+async def main(args):
+    corpus = load_corpus(args.corpus)
+    base = args.url.rstrip("/")
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=args.concurrency or 100)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        before = await _pool_stats(client, base, args.server_key)
+        rec = Recorder()
+        t0 = time.perf_counter()
+        if args.rps:
+            await run_rps(client, f"{base}/chat", corpus, args.rps, args.duration, rec)
+        else:
+            await run_concurrency(client, f"{base}/chat", corpus, args.concurrency, args.duration, rec)
+        elapsed = time.perf_counter() - t0
+        after = await _pool_stats(client, base, args.server_key)
+    report = build_report(rec, elapsed, before, after)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/chat 부하 테스트")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="앱 base url")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="ChatRequest payload jsonl")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--rps", type=float, help="목표 초당 요청수 (open loop)")
+    mode.add_argument("--concurrency", type=int, default=8, help="동시 요청수 (closed loop, 기본 8)")
+    parser.add_argument("--duration", type=float, default=30.0, help="실행 시간 (초)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="요청별 타임아웃 (초)")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--server-key", default=os.environ.get("SERVER_KEY"), help="/admin/pool_stats 조회용 server_key (server.acl)")
+    asyncio.run(main(parser.parse_args()))
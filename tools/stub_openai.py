@@ -0,0 +1,104 @@
+"""
+부하 테스트용 로컬 OpenAI stub 서버
+- /v1/chat/completions, /v1/embeddings 두 가지만 흉내냄 (실제 과금/rate limit 없이 /chat 부하를 줄 수 있음)
+- 응답 지연은 --chat-latency, --embed-latency (초)로 조절 (+ --jitter 비율만큼 랜덤 가감)
+
+실행 예)
+    python -m tools.stub_openai --port 8100 --chat-latency 0.8 --embed-latency 0.15
+    앱은 OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=stub 으로 띄움
+"""
+import argparse, asyncio, hashlib, json, random, re, struct, time
+from typing import Any, Dict, List
+from fastapi import FastAPI, Request
+
+app = FastAPI()
+LATENCY = {"chat": 0.5, "embed": 0.1, "jitter": 0.2}
+
+# classify_input 프롬프트 끝의 '사용자 입력: "..."' 부분만 보고 대충 그럴듯한 조건을 돌려줌
+_OFF_TOPIC = ("날씨", "점심", "영화", "농담")
+
+def _extract(prompt: str) -> Dict[str, Any]:
+    m = re.search(r'(?:사용자 입력|새 입력):\s*"(.*)"', prompt, re.S)
+    text = m.group(1) if m else prompt
+    if any(w in text for w in _OFF_TOPIC):
+        return {"job_related": False, "condition": {}}
+    cond: Dict[str, Any] = {}
+    if "남" in text:
+        cond["gender"] = "남성"
+    elif "여" in text:
+        cond["gender"] = "여성"
+    age = re.search(r"(\d)\d\s*(세|살|대)", text)
+    if age:
+        cond["age"] = f"{age.group(1)}0대"
+    if "강남" in text:
+        cond["place"] = "서울시 강남구"
+    if "주말" in text:
+        cond["work_days"] = "토일"
+    if "오전" in text:
+        cond["start_time"], cond["end_time"] = "09:00", "14:00"
+    wage = re.search(r"(\d{4,6})\s*원", text)
+    if wage:
+        cond["hourly_wage"] = int(wage.group(1))
+    if "자격증" in text or "경험" in text:
+        cond["requirements"] = text
+    return {"job_related": True, "condition": cond}
+
+def _vector(text: str, dims: int) -> List[float]: # 같은 텍스트면 같은 벡터 (numpy 없이 sha256으로 결정적 생성)
+    out: List[float] = []
+    seed = text.encode("utf-8")
+    counter = 0
+    while len(out) < dims:
+        block = hashlib.sha256(seed + counter.to_bytes(4, "little")).digest()
+        out.extend((v / 2**31) - 1.0 for v in struct.unpack("<8I", block))
+        counter += 1
+    norm = sum(v * v for v in out[:dims]) ** 0.5 or 1.0
+    return [v / norm for v in out[:dims]]
+
+async def _sleep(kind: str):
+    base = LATENCY[kind]
+    jitter = base * LATENCY["jitter"]
+    await asyncio.sleep(max(0.0, base + random.uniform(-jitter, jitter)))
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await _sleep("chat")
+    prompt = "".join(m.get("content") or "" for m in body.get("messages", []))
+    content = json.dumps(_extract(prompt), ensure_ascii=False)
+    prompt_tokens = len(prompt) // 2
+    completion_tokens = len(content) // 2
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    await _sleep("embed")
+    inputs = body.get("input")
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    dims = int(body.get("dimensions") or 1536)
+    return {
+        "object": "list",
+        "model": body.get("model", "text-embedding-3-small"),
+        "data": [{"object": "embedding", "index": i, "embedding": _vector(str(t), dims)} for i, t in enumerate(inputs)],
+        "usage": {"prompt_tokens": sum(len(str(t)) // 2 for t in inputs), "total_tokens": sum(len(str(t)) // 2 for t in inputs)},
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="로컬 OpenAI stub 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--chat-latency", type=float, default=LATENCY["chat"], help="chat completion 응답 지연 (초)")
+    parser.add_argument("--embed-latency", type=float, default=LATENCY["embed"], help="embedding 응답 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=LATENCY["jitter"], help="지연 랜덤 가감 비율 (0.2 = ±20%%)")
+    args = parser.parse_args()
+    LATENCY.update(chat=args.chat_latency, embed=args.embed_latency, jitter=args.jitter)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,229 @@
+"""
+jobs1 증분 임베딩 워커 (main.lifespan에서 시작)
+- migrations/003_jobs1_embed_tracking.sql 의 트리거가 텍스트 변경 행에 embed_pending_at 을 찍고 'jobs1_embed' 로 NOTIFY
+- 워커는 LISTEN 으로 깨어나고(연결 실패/알림 유실 대비해서 EMBED_WORKER_POLL_S 주기로도 확인)
+  대기 행을 EMBED_WORKER_BATCH 건씩 모아 설정된 모델별로 한 번에 임베딩 후 한 트랜잭션으로 저장
+- 배압(backpressure) : interactive 풀이 바쁘면 배치 사이에 쉼, 배치는 batch 풀 사용 / 임베딩 중에는 커넥션을 잡지 않음
+- 프로세스(uvicorn 워커)마다 하나씩 떠도 같은 행을 중복 임베딩하지 않음 : 대기 행을 FOR UPDATE SKIP LOCKED로 골라
+  embed_claimed_until(EMBED_WORKER_CLAIM_S 뒤)까지 선점한 뒤 처리. 프로세스가 죽으면 선점 시각이 지나서 다른 워커가 가져감
+- 배치 임베딩이 실패하면 행 단위로 다시 시도해서 실패한 행만 embed_attempts + 1 (선점은 유지 => EMBED_WORKER_CLAIM_S 뒤 재시도)
+  EMBED_WORKER_MAX_ATTEMPTS 이상 실패한 행은 건너뜀 (격리, 텍스트가 다시 바뀌거나 embed_attempts = 0 으로 되돌리면 재개)
+  모든 행이 실패하면(OpenAI 장애 등) 행 탓으로 세지 않고 지수 백오프로 재시도
+- 메트릭 : gigchat_embed_worker_pending / quarantined / lag_seconds / rows_total / batch_seconds / retries_total
+"""
+import time, asyncio
+from typing import Any, Dict, List, Optional
+import asyncpg
+from common_fastapi.shared.config import DB_URL, get_env, get_env_int, get_env_float
+from common_fastapi.shared.db import get_db_connection, get_pool_stats, POOL_BATCH, POOL_INTERACTIVE
+from common_fastapi.shared.logger import logger
+from common_fastapi.shared.metrics import EMBED_WORKER_PENDING, EMBED_WORKER_QUARANTINED, EMBED_WORKER_LAG, EMBED_WORKER_ROWS, EMBED_WORKER_BATCH_SECONDS, EMBED_WORKER_RETRIES
+from common_fastapi.ai.embed_openai import get_client_embed
+
+EMBED_WORKER = get_env("EMBED_WORKER", "1") == "1"
+EMBED_WORKER_MODELS = [m.strip() for m in get_env("EMBED_WORKER_MODELS", "jhgan,openai").split(",") if m.strip()]
+EMBED_WORKER_BATCH = get_env_int("EMBED_WORKER_BATCH", 32)
+EMBED_WORKER_POLL_S = get_env_float("EMBED_WORKER_POLL_S", 30) # 알림이 없어도 이 주기로 확인
+EMBED_WORKER_DEBOUNCE_S = get_env_float("EMBED_WORKER_DEBOUNCE_S", 0.5) # 알림 직후 조금 모았다가 처리 (연속 저장을 한 배치로)
+EMBED_WORKER_BUSY_RATIO = get_env_float("EMBED_WORKER_BUSY_RATIO", 0.8) # interactive 풀 사용률이 이 이상이면 배치 사이에 쉼
+EMBED_WORKER_BUSY_SLEEP_S = get_env_float("EMBED_WORKER_BUSY_SLEEP_S", 1.0)
+EMBED_WORKER_RETRY_MAX_S = get_env_float("EMBED_WORKER_RETRY_MAX_S", 300)
+EMBED_WORKER_CLAIM_S = get_env_float("EMBED_WORKER_CLAIM_S", 300) # 선점 유지 시간 (배치 하나 처리 시간보다 길게)
+EMBED_WORKER_MAX_ATTEMPTS = get_env_int("EMBED_WORKER_MAX_ATTEMPTS", 5) # 행별 실패 허용 횟수
+
+CHANNEL = "jobs1_embed"
+FIELDS = {"jhgan": "embedding768", "openai": "embedding1536"}
+
+
+def embedding_text(row) -> str: # /admin/update_embeddings* 와 같은 규칙 : company + title + description + qualifications
+    return " ".join(row[k] for k in ("company", "title", "description", "qualifications") if row[k])
+
+
+def _embed(model: str, texts: List[str]) -> List[Any]: # 스레드에서 실행 (encode/API 호출 한 번)
+    if model == "jhgan":
+        from common_fastapi.ai.embed_jhgan import get_embedder_768
+        embeddings = get_embedder_768().create_embeddings(texts)
+    elif model == "openai":
+        from common_fastapi.ai.embed_openai import get_embeddings
+        embeddings = get_embeddings(texts)
+    else:
+        raise ValueError(f"지원하지 않는 임베딩 모델: {model}")
+    if len(embeddings) != len(texts):
+        raise RuntimeError(f"{model} 임베딩 생성 실패")
+    return embeddings
+
+
+class BatchEmbedError(RuntimeError): # 배치의 모든 행이 실패 (행 문제가 아니라 모델/API 문제로 보고 백오프)
+    pass
+
+
+async def _embed_rows(model: str, texts: List[str]) -> List[Optional[Any]]:
+    """배치 한 번에 임베딩, 실패하면 행 단위로 다시 시도 => 실패한 행만 None. 모두 실패하면 BatchEmbedError"""
+    try:
+        return await asyncio.to_thread(_embed, model, texts)
+    except Exception as e:
+        if len(texts) == 1:
+            logger.warning(f"[embed_worker] {model} 임베딩 실패: {e}")
+            return [None]
+        logger.warning(f"[embed_worker] {model} 배치 임베딩 실패 - 행 단위로 재시도: {e}")
+    out = []
+    for text in texts:
+        try:
+            out.append((await asyncio.to_thread(_embed, model, [text]))[0])
+        except Exception as e:
+            last = e
+            out.append(None)
+    if all(v is None for v in out):
+        raise BatchEmbedError(f"{model} 임베딩 모두 실패: {last}")
+    return out
+
+
+class EmbedWorker:
+
+    def __init__(self):
+        self.models = [m for m in EMBED_WORKER_MODELS if m in FIELDS and (m != "openai" or get_client_embed())] # 키 없으면 openai 제외
+        self._wake = asyncio.Event()
+        self._task = None
+        self._listen_conn = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        if self._listen_conn is not None:
+            try:
+                await self._listen_conn.close()
+            except Exception:
+                pass
+
+    def _on_notify(self, *args):
+        self._wake.set()
+
+    async def _listen(self): # LISTEN은 풀이 아닌 전용 커넥션으로 (pgbouncer transaction 모드 등에서 실패하면 polling만)
+        try:
+            self._listen_conn = await asyncpg.connect(DB_URL)
+            await self._listen_conn.add_listener(CHANNEL, self._on_notify)
+        except Exception as e:
+            logger.warning(f"[embed_worker] LISTEN 실패 - {EMBED_WORKER_POLL_S}초 polling만 사용: {e}")
+            self._listen_conn = None
+
+    async def _run(self):
+        if not self.models:
+            logger.warning("[embed_worker] 사용할 임베딩 모델이 없음 - 종료")
+            return
+        await self._listen()
+        logger.info(f"[embed_worker] 시작 : 모델 {self.models}, 배치 {EMBED_WORKER_BATCH}")
+        failures = 0
+        while True:
+            self._wake.clear() # 처리 도중 들어온 알림은 다음 대기에서 바로 깨움
+            try:
+                while await self._process_batch() >= EMBED_WORKER_BATCH: # 꽉 찬 배치면 남은 게 더 있음
+                    await self._backpressure()
+                await self._update_lag()
+                failures = 0
+            except asyncpg.UndefinedColumnError:
+                logger.error("[embed_worker] jobs1.embed_pending_at 없음 - migrations/003_jobs1_embed_tracking.sql 적용 필요, 종료")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                delay = min(EMBED_WORKER_RETRY_MAX_S, 2 ** failures)
+                EMBED_WORKER_RETRIES.inc()
+                logger.warning(f"[embed_worker] 실패 ({failures}회) - {delay}초 후 재시도: {e}")
+                await asyncio.sleep(delay)
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), EMBED_WORKER_POLL_S)
+                await asyncio.sleep(EMBED_WORKER_DEBOUNCE_S)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _backpressure(self): # 검색 요청이 몰리면 워커가 양보
+        stats = get_pool_stats(POOL_INTERACTIVE)
+        while stats.get("limit") and stats.get("in_use", 0) >= stats["limit"] * EMBED_WORKER_BUSY_RATIO:
+            await asyncio.sleep(EMBED_WORKER_BUSY_SLEEP_S)
+            stats = get_pool_stats(POOL_INTERACTIVE)
+
+    async def _process_batch(self) -> int:
+        t0 = time.perf_counter()
+        async with get_db_connection(pool=POOL_BATCH) as conn: # 선점 : 다른 워커가 잡고 있는 행은 건너뜀 (문장 하나로 짧게 잠금)
+            rows = await conn.fetch("""
+                WITH picked AS (
+                    SELECT id
+                      FROM public.jobs1
+                     WHERE embed_pending_at IS NOT NULL
+                       AND embed_attempts < $2
+                       AND (embed_claimed_until IS NULL OR embed_claimed_until < clock_timestamp())
+                     ORDER BY embed_pending_at
+                     LIMIT $1
+                       FOR UPDATE SKIP LOCKED
+                )
+                UPDATE public.jobs1 j
+                   SET embed_claimed_until = clock_timestamp() + make_interval(secs => $3)
+                  FROM picked
+                 WHERE j.id = picked.id
+             RETURNING j.id, j.company, j.title, j.description, j.qualifications, j.embed_pending_at, j.embed_attempts
+            """, EMBED_WORKER_BATCH, EMBED_WORKER_MAX_ATTEMPTS, EMBED_WORKER_CLAIM_S)
+        if not rows:
+            return 0
+
+        todo = [(row, embedding_text(row)) for row in rows]
+        empty = [row for row, text in todo if not text.strip()]
+        todo = [(row, text) for row, text in todo if text.strip()]
+        vectors: Dict[str, List[Any]] = {}
+        try:
+            for model in self.models: # 커넥션 없이 임베딩 (모델별 호출 한 번, 실패하면 행 단위)
+                vectors[model] = await _embed_rows(model, [text for _, text in todo]) if todo else []
+        except BatchEmbedError: # 행 문제가 아니므로 선점을 풀어서 백오프 후 바로 다시 가져갈 수 있게
+            async with get_db_connection(pool=POOL_BATCH) as conn:
+                await conn.executemany("UPDATE public.jobs1 SET embed_claimed_until = NULL WHERE id = $1", [(row["id"],) for row in rows])
+            raise
+        done = [i for i in range(len(todo)) if all(vectors[m][i] is not None for m in self.models)]
+        failed = [todo[i][0] for i in sorted(set(range(len(todo))) - set(done))]
+
+        sets = ", ".join(f"{FIELDS[model]} = ${i + 3}" for i, model in enumerate(self.models))
+        clear = "embed_pending_at = NULL, embed_attempts = 0, embed_claimed_until = NULL"
+        async with get_db_connection(pool=POOL_BATCH) as conn:
+            async with conn.transaction():
+                if done: # 그 사이 텍스트가 또 바뀐 행(embed_pending_at 다름)은 건너뜀 => 다음 배치에서 다시
+                    await conn.executemany(
+                        f"UPDATE public.jobs1 SET {sets}, {clear} WHERE id = $1 AND embed_pending_at = $2",
+                        [(todo[i][0]["id"], todo[i][0]["embed_pending_at"], *(vectors[m][i] for m in self.models)) for i in done]
+                    )
+                if empty:
+                    await conn.executemany(
+                        f"UPDATE public.jobs1 SET {clear} WHERE id = $1 AND embed_pending_at = $2",
+                        [(row["id"], row["embed_pending_at"]) for row in empty]
+                    )
+                if failed: # 선점은 그대로 두고(EMBED_WORKER_CLAIM_S 뒤 재시도) 실패 횟수만 증가
+                    await conn.executemany(
+                        "UPDATE public.jobs1 SET embed_attempts = embed_attempts + 1 WHERE id = $1 AND embed_pending_at = $2",
+                        [(row["id"], row["embed_pending_at"]) for row in failed]
+                    )
+        for row in failed:
+            if row["embed_attempts"] + 1 >= EMBED_WORKER_MAX_ATTEMPTS:
+                logger.error(f"[embed_worker] jobs1.id={row['id']} {EMBED_WORKER_MAX_ATTEMPTS}회 실패 - 건너뜀 (embed_attempts = 0 으로 되돌리면 재시도)")
+        EMBED_WORKER_ROWS.labels("embedded").inc(len(done))
+        EMBED_WORKER_ROWS.labels("empty").inc(len(empty))
+        EMBED_WORKER_ROWS.labels("failed").inc(len(failed))
+        EMBED_WORKER_BATCH_SECONDS.observe(time.perf_counter() - t0)
+        return len(rows)
+
+    async def _update_lag(self):
+        async with get_db_connection(pool=POOL_BATCH) as conn:
+            row = await conn.fetchrow("""
+                SELECT count(*) FILTER (WHERE embed_attempts < $1) AS pending,
+                       count(*) FILTER (WHERE embed_attempts >= $1) AS quarantined,
+                       COALESCE(EXTRACT(EPOCH FROM clock_timestamp() - min(embed_pending_at) FILTER (WHERE embed_attempts < $1)), 0) AS lag
+                  FROM public.jobs1
+                 WHERE embed_pending_at IS NOT NULL
+            """, EMBED_WORKER_MAX_ATTEMPTS)
+        EMBED_WORKER_PENDING.set(row["pending"])
+        EMBED_WORKER_QUARANTINED.set(row["quarantined"])
+        EMBED_WORKER_LAG.set(float(row["lag"]))
+
+
+embed_worker = EmbedWorker() if EMBED_WORKER else None